@@ -0,0 +1,185 @@
+"""
+Linear-chain node fusion for StateGraph workflows.
+
+Every node in a LangGraph graph runs as its own superstep, so a chain of
+small nodes such as validate -> initialize_state -> generate_initial_prompt
+pays scheduling, channel bookkeeping and checkpointing once per node.
+compile_graph(..., fuse=True) finds chains joined only by unconditional
+edges and replaces each with a single node named "a+b+c" that runs the
+original nodes in order. Each sub-node keeps its own @traceable span; the
+fused step records per-node wall time in its run metadata as node_timings_ms.
+
+A node is never fused if it is listed in barriers, has a retry/cache/timeout
+policy, is deferred, routes with Command destinations, or takes part in a
+join (add_edge([a, b], c)). Nodes that return Command without declaring
+destinations must be listed as barriers. With fusion the graph streams one
+update per chain instead of one per node.
+
+    app = compile_graph(workflow, fuse=True, barriers={"analyze_sentiment"})
+"""
+
+import copy
+import time
+from collections import defaultdict
+
+from langgraph.graph import StateGraph
+from langsmith.run_helpers import get_current_run_tree
+
+from trace_sampling import traceable
+
+
+def _is_plain_node(graph, spec):
+    return (
+        spec.retry_policy is None
+        and spec.cache_policy is None
+        and not spec.is_error_handler
+        and spec.error_handler_node is None
+        and not spec.ends
+        and not spec.defer
+        and spec.timeout is None
+        and spec.input_schema is graph.state_schema
+    )
+
+
+def find_linear_chains(graph: StateGraph, barriers=()):
+    """Return the fusable chains of graph as lists of node names (length >= 2)"""
+    successors = defaultdict(list)
+    predecessors = defaultdict(list)
+    for start, end in graph.edges:
+        successors[start].append(end)
+        predecessors[end].append(start)
+
+    unfusable = set(barriers)
+    for starts, end in graph.waiting_edges:
+        unfusable.update(starts)
+        unfusable.add(end)
+    branch_targets = set()
+    for branches in graph.branches.values():
+        for branch in branches.values():
+            if branch.ends is None:
+                # A path function without a path_map may jump to any node
+                return []
+            branch_targets.update(branch.ends.values())
+    for name, spec in graph.nodes.items():
+        if not _is_plain_node(graph, spec):
+            unfusable.add(name)
+            if isinstance(spec.ends, dict):
+                unfusable.update(spec.ends.values())
+            elif spec.ends:
+                unfusable.update(spec.ends)
+
+    def links(a, b):
+        return (
+            a in graph.nodes
+            and b in graph.nodes
+            and a not in unfusable
+            and b not in unfusable
+            and a not in graph.branches
+            and b not in branch_targets
+            and successors[a] == [b]
+            and predecessors[b] == [a]
+        )
+
+    chains = []
+    for name in graph.nodes:
+        if any(links(p, name) for p in predecessors[name]):
+            continue  # not the head of a chain
+        chain = [name]
+        while len(successors[chain[-1]]) == 1 and links(chain[-1], successors[chain[-1]][0]):
+            chain.append(successors[chain[-1]][0])
+        if len(chain) > 1:
+            chains.append(chain)
+    return chains
+
+
+def _reducers(graph):
+    return {
+        key: channel.operator
+        for key, channel in graph.channels.items()
+        if hasattr(channel, "operator")
+    }
+
+
+def _fused_step(name, steps, reducers, project_name=None):
+    """Build the function that runs steps ([(node name, runnable)]) as one node"""
+    trace_kwargs = {"name": name, "run_type": "chain"}
+    if project_name:
+        trace_kwargs["project_name"] = project_name
+
+    @traceable(**trace_kwargs)
+    def run(state, config):
+        # Later sub-nodes read earlier writes from a local view of the state;
+        # reducer channels are copied once so a failure leaves the graph untouched
+        view = dict(state)
+        copied = set()
+        updates = {}
+        timings = {}
+        for node_name, runnable in steps:
+            start = time.perf_counter()
+            update = runnable.invoke(view, config)
+            timings[node_name] = round((time.perf_counter() - start) * 1000, 3)
+            if update is None:
+                continue
+            if not isinstance(update, dict):
+                raise TypeError(f"Fused node {node_name} returned {type(update).__name__}; list it as a barrier")
+            for key, value in update.items():
+                reducer = reducers.get(key)
+                if reducer is None:
+                    view[key] = value
+                    updates[key] = value
+                    continue
+                if key not in copied:
+                    current = view.get(key)
+                    view[key] = current.copy() if current is not None else []
+                    copied.add(key)
+                view[key] = reducer(view[key], value)
+                updates[key] = reducer(updates[key], value) if key in updates else value
+
+        run_tree = get_current_run_tree()
+        if run_tree is not None:
+            run_tree.add_metadata({"node_timings_ms": timings})
+        return updates
+
+    return run
+
+
+def fuse_linear_chains(graph: StateGraph, barriers=(), project_name=None):
+    """Return an uncompiled copy of graph with each linear chain fused into one node"""
+    chains = find_linear_chains(graph, barriers)
+    rename = {}
+    for chain in chains:
+        for node in chain:
+            rename[node] = "+".join(chain)
+
+    fused = copy.copy(graph)
+    fused.compiled = False
+    fused.nodes = {name: spec for name, spec in graph.nodes.items() if name not in rename}
+    fused.edges = {
+        (rename.get(start, start), rename.get(end, end))
+        for start, end in graph.edges
+        if not (start in rename and rename[start] == rename.get(end))
+    }
+    fused.waiting_edges = set(graph.waiting_edges)
+    fused.branches = defaultdict(dict)
+    for source, branches in graph.branches.items():
+        fused.branches[rename.get(source, source)] = {
+            branch_name: branch._replace(ends={k: rename.get(v, v) for k, v in branch.ends.items()})
+            for branch_name, branch in branches.items()
+        }
+
+    reducers = _reducers(graph)
+    for chain in chains:
+        steps = [(node, graph.nodes[node].runnable) for node in chain]
+        fused.add_node(
+            rename[chain[0]],
+            _fused_step(rename[chain[0]], steps, reducers, project_name),
+            input_schema=graph.state_schema,
+        )
+    return fused
+
+
+def compile_graph(graph: StateGraph, fuse=False, barriers=(), project_name=None, **compile_kwargs):
+    """Compile graph, fusing its linear chains first when fuse is set"""
+    if fuse:
+        graph = fuse_linear_chains(graph, barriers, project_name)
+    return graph.compile(**compile_kwargs)
@@ -0,0 +1,185 @@
+"""
+Hedged requests for chat model calls.
+
+hedged_model() wraps a chat model so a slow call gets a backup: if the first
+request has not answered after the observed p95 latency (HEDGE_PERCENTILE),
+an identical second request is sent and whichever answers first is used.
+The loser is cancelled; async calls close its connection, while a sync
+loser is abandoned to finish in its worker thread.
+
+A global budget caps the extra load. Every call adds HEDGE_BUDGET (default
+0.05) to a token bucket, and a hedge spends one token, so at most ~5% of
+calls are duplicated with a small burst allowance. No call is hedged until
+HEDGE_MIN_SAMPLES latencies have been seen.
+
+Environment:
+    SENTIMENT_HEDGING    True to hedge the sentiment LLM call in workflow2 (default False)
+    HEDGE_PERCENTILE     latency percentile after which to hedge (default 95)
+    HEDGE_BUDGET         max hedges as a fraction of calls (default 0.05)
+    HEDGE_MIN_SAMPLES    calls observed before hedging starts (default 20)
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+HEDGE_PERCENTILE = float(os.environ.get("HEDGE_PERCENTILE", "95"))
+HEDGE_BUDGET = float(os.environ.get("HEDGE_BUDGET", "0.05"))
+HEDGE_MIN_SAMPLES = int(os.environ.get("HEDGE_MIN_SAMPLES", "20"))
+
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+_hedged = {}
+_hedged_lock = threading.Lock()
+
+
+class HedgePolicy:
+    """Rolling latency window, hedge delay and the shared hedge budget"""
+
+    def __init__(self, percentile=HEDGE_PERCENTILE, budget=HEDGE_BUDGET, min_samples=HEDGE_MIN_SAMPLES,
+                 window=1000, burst=5):
+        self.percentile = percentile
+        self.budget = budget
+        self.min_samples = min_samples
+        self.burst = burst
+        self.stats = Counter()
+        self._latencies = deque(maxlen=window)
+        self._delay = None
+        self._unsorted = 0
+        self._tokens = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        with self._lock:
+            self._latencies.append(seconds)
+            self._unsorted += 1
+            # Re-sorting the window on every call is wasted work; refresh every 10 samples
+            if len(self._latencies) >= self.min_samples and (self._delay is None or self._unsorted >= 10):
+                ordered = sorted(self._latencies)
+                self._delay = ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))]
+                self._unsorted = 0
+
+    def count(self, key):
+        with self._lock:
+            self.stats[key] += 1
+
+    def hedge_delay(self):
+        """Seconds to wait before hedging this call, or None when it cannot be hedged"""
+        with self._lock:
+            self.stats["calls"] += 1
+            self._tokens = min(self.burst, self._tokens + self.budget)
+            return self._delay
+
+    def take_hedge(self):
+        with self._lock:
+            # Tolerate float drift: ten 0.1 increments sum to 0.999...
+            if self._tokens < 1 - 1e-9:
+                self.stats["budget_denied"] += 1
+                return False
+            self._tokens -= 1
+            self.stats["hedged"] += 1
+            return True
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["hedge_rate"] = stats.get("hedged", 0) / max(1, stats.get("calls", 0))
+            stats["hedge_delay_ms"] = None if self._delay is None else round(self._delay * 1000, 1)
+            return stats
+
+
+class HedgedChatModel(BaseChatModel):
+    """Chat model that sends a backup request when the first one is slow"""
+
+    inner: Any = None
+    policy: Any = None
+
+    @property
+    def _llm_type(self):
+        return "hedged"
+
+    def _call(self, messages, stop, kwargs):
+        started = time.perf_counter()
+        reply = self.inner.invoke(messages, stop=stop, **kwargs)
+        self.policy.record(time.perf_counter() - started)
+        return reply
+
+    async def _acall(self, messages, stop, kwargs):
+        started = time.perf_counter()
+        reply = await self.inner.ainvoke(messages, stop=stop, **kwargs)
+        self.policy.record(time.perf_counter() - started)
+        return reply
+
+    def _submit(self, messages, stop, kwargs):
+        # Keep the caller's context (tracing parent run) in the worker thread
+        return _executor.submit(contextvars.copy_context().run, self._call, messages, stop, kwargs)
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        delay = self.policy.hedge_delay()
+        if delay is None:
+            return _result(self._call(messages, stop, kwargs))
+        primary = self._submit(messages, stop, kwargs)
+        if wait([primary], timeout=delay).done or not self.policy.take_hedge():
+            return _result(primary.result())
+        pending = {primary, self._submit(messages, stop, kwargs)}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    self.policy.count("hedge_won" if future is not primary else "primary_won")
+                    return _result(future.result())
+                error = future.exception()
+        raise error
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        delay = self.policy.hedge_delay()
+        if delay is None:
+            return _result(await self._acall(messages, stop, kwargs))
+        primary = asyncio.ensure_future(self._acall(messages, stop, kwargs))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if done or not self.policy.take_hedge():
+                return _result(await primary)
+            pending.add(asyncio.ensure_future(self._acall(messages, stop, kwargs)))
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        self.policy.count("hedge_won" if task is not primary else "primary_won")
+                        return _result(task.result())
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+
+def _result(message):
+    return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def hedged_model(inner, policy=None):
+    """The shared HedgedChatModel for inner; all wrappers share one budget unless a policy is given"""
+    if policy is not None:
+        return HedgedChatModel(inner=inner, policy=policy)
+    with _hedged_lock:
+        # Keyed by identity: registry models live for the whole process
+        wrapper = _hedged.get(id(inner))
+        if wrapper is None or wrapper.inner is not inner:
+            wrapper = _hedged[id(inner)] = HedgedChatModel(inner=inner, policy=default_policy)
+        return wrapper
+
+
+default_policy = HedgePolicy()
@@ -0,0 +1,208 @@
+"""
+Keyword intent routing for the agents' rule-based steps.
+
+Intents are declared as tables of IntentRules and compiled once into an
+IntentRouter. Every distinct term is one bit and every rule a mask over
+those bits, so each term is tested once per message however many rules use
+it, and the highest-priority rule whose terms are all present wins.
+Matching is on whole words, so "hi" no longer fires on "this"; terms are
+found with plain substring tests first and only those that occur are
+checked for word boundaries. Results are memoized per message text.
+
+Rule terms:
+    "task"          the word task
+    "task*"         any word starting with task (tasks, tasking)
+    "how are you"   a phrase, word by word
+    "?"             a question mark anywhere
+    NUMBER          any number
+    all_of          groups that must all match, e.g. [("add",), ("todo*", "task*")]
+    exact           the whole message, ignoring case and end punctuation
+
+    router.classify("Add task: call the plumber") -> IntentMatch(intent="add_todo", rule="add_todo")
+    router.classify_batch(messages)              -> list of IntentMatch
+
+Tables used by the agents are defined at the bottom: BOND7_ROUTER and
+SMALL_TALK_ROUTER for the 007 agents, WORKFLOW_FIXED_ROUTER for
+workflow_fixed's human_step.
+"""
+
+import re
+from collections import namedtuple
+from dataclasses import dataclass
+
+NUMBER = "#number"
+
+IntentMatch = namedtuple("IntentMatch", ["intent", "rule"])
+
+# Lowercased text -> space separated words; "?" becomes a word of its own
+_SEPARATORS = {code: " " for code in range(128) if not chr(code).isalnum()}
+_SEPARATORS[ord("?")] = " ? "
+_DIGIT = re.compile(r"[0-9]")
+_NUMBER = re.compile(r"(?<![^\W_])[0-9]+(?![^\W_])")
+_EXACT_STRIP = " \t\n.!"
+_WORD, _PREFIX, _PHRASE = "word", "prefix", "phrase"
+_MAX_MEMO = 50_000
+
+
+def _words(text):
+    return text.lower().translate(_SEPARATORS).split()
+
+
+def _whole_word(text, literal, prefix=False):
+    """Whether literal occurs in text as a word (or the start of one, for a prefix)"""
+    check_start, check_end = literal[0].isalnum(), literal[-1].isalnum() and not prefix
+    start = text.find(literal)
+    while start != -1:
+        end = start + len(literal)
+        if (not check_start or start == 0 or not text[start - 1].isalnum()) and \
+                (not check_end or end == len(text) or not text[end].isalnum()):
+            return True
+        start = text.find(literal, start + 1)
+    return False
+
+
+@dataclass(frozen=True)
+class IntentRule:
+    name: str
+    intent: str
+    priority: int = 0
+    any_of: tuple = ()
+    all_of: tuple = ()
+    exact: tuple = ()
+
+    def groups(self):
+        groups = [tuple(group) for group in self.all_of]
+        if self.any_of:
+            groups.append(tuple(self.any_of))
+        return groups
+
+
+@dataclass
+class _Compiled:
+    rule: IntentRule
+    mask: int = 0
+    exact_bit: int = 0
+
+    def __post_init__(self):
+        self.match = IntentMatch(self.rule.intent, self.rule.name)
+
+
+class IntentRouter:
+    """A compiled intent table"""
+
+    def __init__(self, rules, default="general_question"):
+        self.default = IntentMatch(default, None)
+        self._rules = []
+        self._terms = []        # (literal, kind, payload, bitmask), cheapest test first
+        self._number = 0
+        self._exact = {}        # normalized message -> bitmask
+        self._memo = {}         # message -> IntentMatch; chat traffic repeats short commands
+        bit = 1
+        # Highest priority first; declaration order breaks ties
+        for rule in sorted(rules, key=lambda rule: -rule.priority):
+            compiled = _Compiled(rule)
+            for group in rule.groups():
+                for term in group:
+                    self._add_term(term.lower(), bit)
+                compiled.mask |= bit
+                bit <<= 1
+            if rule.exact:
+                compiled.exact_bit = bit
+                for text in rule.exact:
+                    key = text.lower().strip(_EXACT_STRIP)
+                    self._exact[key] = self._exact.get(key, 0) | bit
+                bit <<= 1
+            self._rules.append(compiled)
+        self._terms = self._merge_terms(self._terms)
+
+    def _add_term(self, term, bit):
+        if term == NUMBER:
+            self._number |= bit
+        elif term.endswith("*"):
+            self._terms.append((term[:-1], _PREFIX, term[:-1], bit))
+        else:
+            words = _words(term)
+            if len(words) > 1:
+                self._terms.append((words[0], _PHRASE, " " + " ".join(words) + " ", bit))
+            else:
+                self._terms.append((words[0], _WORD, words[0], bit))
+
+    @staticmethod
+    def _merge_terms(terms):
+        """One entry per distinct test, so a word used by several rules is checked once"""
+        merged = {}
+        for literal, kind, payload, bit in terms:
+            merged[literal, kind, payload] = merged.get((literal, kind, payload), 0) | bit
+        return [key + (bit,) for key, bit in merged.items()]
+
+    def terms_mask(self, text):
+        """Bitmask of every rule term present in text"""
+        lowered = text.lower()
+        found = self._exact.get(lowered.strip(_EXACT_STRIP), 0) if self._exact else 0
+        # Plain substring tests settle most messages; only the terms whose text
+        # occurs are checked for word boundaries
+        for literal, kind, payload, bit in [term for term in self._terms if term[0] in lowered]:
+            if kind is _PHRASE:
+                if payload in " " + " ".join(_words(lowered)) + " ":
+                    found |= bit
+            elif _whole_word(lowered, literal, kind is _PREFIX):
+                found |= bit
+        if self._number and _DIGIT.search(lowered) and _NUMBER.search(lowered):
+            found |= self._number
+        return found
+
+    def classify(self, text):
+        """The intent for text and the name of the rule that fired (None for the default)"""
+        match = self._memo.get(text)
+        if match is None:
+            match = self.default
+            found = self.terms_mask(text or "")
+            if found:
+                for compiled in self._rules:
+                    if compiled.exact_bit & found or (compiled.mask and compiled.mask & found == compiled.mask):
+                        match = compiled.match
+                        break
+            if len(self._memo) >= _MAX_MEMO:
+                self._memo.clear()
+            self._memo[text] = match
+        return match
+
+    def classify_batch(self, texts):
+        """classify() for many messages"""
+        classify = self.classify
+        return [classify(text) for text in texts]
+
+
+TODO_WORDS = ("todo*", "task*")
+
+# 007 agent process_input
+BOND7_INTENTS = [
+    IntentRule("add_todo", "add_todo", 60, all_of=[("add",), TODO_WORDS]),
+    IntentRule("show_todos", "view_todos", 50, all_of=[("show", "list"), TODO_WORDS]),
+    IntentRule("next_page", "view_todos", 50, exact=("next", "next page", "more")),
+    IntentRule("upcoming_todos", "view_todos", 50, any_of=("upcoming",)),
+    IntentRule("complete_todo", "complete_todo", 40, all_of=[("done", "complete", "completed", "finished"), (NUMBER,)]),
+    IntentRule("goodbye", "end_conversation", 30, any_of=("bye", "exit", "quit", "goodbye")),
+]
+
+# 007 agent general_question replies (the intent is the reply key)
+SMALL_TALK_INTENTS = [
+    IntentRule("greeting", "greeting", 70, any_of=("hello", "hi")),
+    IntentRule("how_are_you", "how_are_you", 60, any_of=("how are you",)),
+    IntentRule("help", "help", 50, any_of=("help",)),
+    IntentRule("thanks", "thanks", 40, any_of=("thank*",)),
+    IntentRule("langgraph", "langgraph", 30, any_of=("langgraph",)),
+    IntentRule("langchain", "langchain", 20, any_of=("langchain",)),
+    IntentRule("capabilities", "capabilities", 10, any_of=("capabilit*", "do you do", "can you")),
+]
+
+# workflow_fixed human_step
+WORKFLOW_FIXED_INTENTS = [
+    IntentRule("end", "end_conversation", 30, exact=("end", "bye", "goodbye", "exit", "quit")),
+    IntentRule("reschedule", "reschedule", 20, any_of=("reschedul*",)),
+    IntentRule("question", "process_additional", 10, any_of=("?",)),
+]
+
+BOND7_ROUTER = IntentRouter(BOND7_INTENTS, default="general_question")
+SMALL_TALK_ROUTER = IntentRouter(SMALL_TALK_INTENTS, default="default")
+WORKFLOW_FIXED_ROUTER = IntentRouter(WORKFLOW_FIXED_INTENTS, default=None)
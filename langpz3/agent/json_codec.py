@@ -0,0 +1,83 @@
+"""
+JSON encoding shared by the workflows, the Flask bridges and the memory files.
+
+Uses orjson when it is installed and the stdlib json module otherwise; set
+JSON_CODEC=json to force the stdlib. Output is compact (no whitespace) unless
+pretty=True. Besides the usual JSON types it encodes:
+- LangChain messages as {"type", "content", "id"}
+  (plus name/tool_calls/additional_kwargs when set), which convert_to_messages
+  turns back into messages;
+- MessageLog (its stored records, without converting them to messages),
+  list/dict subclasses, dataclasses, sets and datetimes.
+
+    dumps(obj) -> str       dumpb(obj) -> bytes       loads(str or bytes)
+"""
+
+import dataclasses
+import datetime
+import json
+import os
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None and os.environ.get("JSON_CODEC", "orjson") != "json" else "json"
+
+
+def _message_dict(message):
+    data = {"type": message.type, "content": message.content, "id": message.id}
+    for field in ("name", "tool_calls", "additional_kwargs"):
+        value = getattr(message, field, None)
+        if value:
+            data[field] = value
+    return data
+
+
+def _encode_default(obj, default=None):
+    # Duck-typed so the GCP bridge can use the codec without LangChain installed
+    if hasattr(obj, "type") and hasattr(obj, "content"):
+        return _message_dict(obj)
+    if callable(getattr(obj, "records", None)):
+        return list(obj.records())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return list(obj)
+    if isinstance(obj, dict):
+        return dict(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if default is not None:
+        return default(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumpb(obj, pretty=False, default=None):
+    """Encode obj as UTF-8 JSON bytes; default handles otherwise unsupported objects"""
+    encode_default = lambda o: _encode_default(o, default)
+    if BACKEND == "orjson":
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if pretty:
+            options |= orjson.OPT_INDENT_2
+        try:
+            return orjson.dumps(obj, default=encode_default, option=options)
+        except orjson.JSONEncodeError:
+            # Integers beyond 64 bits and other edge cases the stdlib accepts
+            pass
+    if pretty:
+        return json.dumps(obj, indent=2, ensure_ascii=False, default=encode_default).encode()
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=encode_default).encode()
+
+
+def dumps(obj, pretty=False, default=None):
+    """Encode obj as a JSON string"""
+    return dumpb(obj, pretty, default).decode()
+
+
+def loads(data):
+    """Decode JSON from str or bytes"""
+    if BACKEND == "orjson":
+        return orjson.loads(data)
+    return json.loads(data)
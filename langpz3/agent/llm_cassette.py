@@ -0,0 +1,193 @@
+"""
+Record/replay ("cassette") layer for chat model calls.
+
+get_chat_model() wraps its models in a CassetteChatModel when
+LLM_CASSETTE_MODE is set, so tests and benchmarks can run the graphs
+offline with stable timings:
+    record   call the model and store every response (replacing old entries)
+    replay   answer from the cassette only; a prompt that was never recorded raises
+    auto     replay when recorded, otherwise call the model and record
+    off      no wrapping (default)
+
+Calls are keyed by a hash of the model name, temperature, the other model
+and call kwargs (max_tokens, bound tools, tool_choice, ...), stop sequences
+and the prompt messages (type plus content with whitespace collapsed), so
+reformatting a prompt template does not invalidate recordings. The cassette
+is a JSONL file (LLM_CASSETTE_PATH); each line holds the key, the reply
+content, usage and the recorded latency.
+
+LLM_CASSETTE_LATENCY sets the delay on replay:
+    recorded  sleep the recorded latency (default)
+    none      reply immediately
+    <ms>      a fixed delay, e.g. 50
+    x<factor> the recorded latency scaled, e.g. x0.1
+
+    LLM_CASSETTE_MODE=record pytest tests/test_workflow2_pytest.py   # once, with a key
+    LLM_CASSETTE_MODE=replay LLM_CASSETTE_LATENCY=none pytest tests/test_workflow2_pytest.py
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Optional
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+import json_codec
+
+LLM_CASSETTE_MODE = os.environ.get("LLM_CASSETTE_MODE", "off").lower()
+LLM_CASSETTE_PATH = os.environ.get("LLM_CASSETTE_PATH", "./agent/cassettes/llm.jsonl")
+LLM_CASSETTE_LATENCY = os.environ.get("LLM_CASSETTE_LATENCY", "recorded")
+
+MODES = ("record", "replay", "auto", "off")
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+class CassetteMiss(KeyError):
+    """A replayed prompt has no recording"""
+
+
+def _normalize(text):
+    return re.sub(r"\s+", " ", str(text)).strip()
+
+
+def prompt_key(model_name, temperature, messages, stop=None, params=None):
+    """Stable key for a call: model, temperature, stop, other params and normalized messages"""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{model_name}\x00{temperature}".encode())
+    if stop or params:
+        # Calls without either keep the keys recorded before these were part of it
+        extra = {"stop": stop, "params": params or {}}
+        digest.update(b"\x01" + json.dumps(extra, sort_keys=True, separators=(",", ":"), default=str).encode())
+    for message in messages:
+        digest.update(f"\x00{message.type}\x00{_normalize(message.content)}".encode())
+    return digest.hexdigest()
+
+
+def replay_delay(spec, recorded_ms):
+    """Seconds to wait before a replayed reply"""
+    spec = str(spec).strip().lower()
+    if spec == "recorded":
+        return recorded_ms / 1000
+    if spec in ("none", "0", ""):
+        return 0.0
+    if spec.startswith("x"):
+        return recorded_ms * float(spec[1:]) / 1000
+    return float(spec) / 1000
+
+
+class CassetteStore:
+    """Append-only JSONL cassette, indexed by key in memory (last entry wins)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json_codec.loads(line)
+                        self.entries[entry["key"]] = entry
+
+    def get(self, key):
+        return self.entries.get(key)
+
+    def put(self, entry):
+        line = json_codec.dumpb(entry) + b"\n"
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, "ab") as f:
+                f.write(line)
+            self.entries[entry["key"]] = entry
+
+
+def get_store(path=None):
+    """The shared store for a cassette file (loaded once per process)"""
+    path = os.path.abspath(path or LLM_CASSETTE_PATH)
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = CassetteStore(path)
+        return _stores[path]
+
+
+class CassetteChatModel(BaseChatModel):
+    """Chat model that records and replays another model's replies"""
+
+    inner: Optional[Any] = None
+    store: Any = None
+    mode: str = "auto"
+    latency: str = "recorded"
+    model_name: str = ""
+    temperature: float = 0
+    model_kwargs: Optional[dict] = None
+
+    @property
+    def _llm_type(self):
+        return "cassette"
+
+    def bind_tools(self, tools, **kwargs):
+        """Bind tools in OpenAI format; they reach the inner model, and the key, as call kwargs"""
+        return self.bind(tools=[convert_to_openai_tool(tool) for tool in tools], **kwargs)
+
+    def _lookup(self, messages, stop, kwargs):
+        params = {**(self.model_kwargs or {}), **kwargs}
+        key = prompt_key(self.model_name, self.temperature, messages, stop, params)
+        entry = self.store.get(key) if self.mode in ("replay", "auto") else None
+        if entry is None and (self.mode == "replay" or self.inner is None):
+            raise CassetteMiss(f"No recording for this prompt (key {key}) in {self.store.path}")
+        return key, entry
+
+    def _result(self, entry):
+        message = AIMessage(content=entry["content"], usage_metadata=entry.get("usage"),
+                            response_metadata={"cassette": True, "model_name": self.model_name})
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _record(self, key, reply, started):
+        self.store.put({
+            "key": key,
+            "model": self.model_name,
+            "content": reply.content,
+            "usage": reply.usage_metadata,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+            "recorded_at": time.time(),
+        })
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        key, entry = self._lookup(messages, stop, kwargs)
+        if entry is not None:
+            time.sleep(replay_delay(self.latency, entry.get("latency_ms", 0)))
+            return self._result(entry)
+        started = time.perf_counter()
+        reply = self.inner.invoke(messages, stop=stop, **kwargs)
+        self._record(key, reply, started)
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        key, entry = self._lookup(messages, stop, kwargs)
+        if entry is not None:
+            await asyncio.sleep(replay_delay(self.latency, entry.get("latency_ms", 0)))
+            return self._result(entry)
+        started = time.perf_counter()
+        reply = await self.inner.ainvoke(messages, stop=stop, **kwargs)
+        self._record(key, reply, started)
+        return ChatResult(generations=[ChatGeneration(message=reply)])
+
+
+def cassette_model(inner, model_name, temperature=0, mode=None, path=None, latency=None, model_kwargs=None):
+    """Wrap inner (None in replay mode) in a CassetteChatModel; model_kwargs is the config inner was built with"""
+    mode = (mode or LLM_CASSETTE_MODE).lower()
+    if mode not in MODES:
+        raise ValueError(f"Unknown LLM_CASSETTE_MODE {mode!r}; expected one of {', '.join(MODES)}")
+    return CassetteChatModel(inner=inner, store=get_store(path), mode=mode,
+                             latency=latency or LLM_CASSETTE_LATENCY, model_name=model_name, temperature=temperature,
+                             model_kwargs=model_kwargs)
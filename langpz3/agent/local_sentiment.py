@@ -0,0 +1,226 @@
+"""
+Local sentiment classifier for workflow2.
+
+Hashed word unigram/bigram features with a multinomial logistic regression on
+top. Inference is plain NumPy; the weights live in a single .npy matrix so a
+trained model can be loaded with mmap_mode="r" and shared across workers.
+
+Train it from the conversations stored in agent/memory:
+    python agent/local_sentiment.py --memory-dir agent/memory --out agent/models/sentiment.npy
+"""
+
+import argparse
+import glob
+import os
+import pickle
+
+import numpy as np
+
+LABELS = ("positive", "negative", "unknown")
+N_FEATURES = 2 ** 16  # hashed buckets; the extra last row of the weights is the bias
+BIAS_INDEX = N_FEATURES
+
+# Tokens are runs of [a-z0-9'] (and non-ASCII bytes); everything else is a separator
+_WORD_BYTES = set(b"abcdefghijklmnopqrstuvwxyz0123456789'") | set(range(128, 256))
+_NORMALIZE = bytes(c if c in _WORD_BYTES else 32 for c in range(256))
+_HASH_BASE = 1099511628211  # odd, so it is invertible modulo 2**64
+_HASH_BASE_INV = pow(_HASH_BASE, -1, 2 ** 64)
+_BIGRAM_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+_powers = np.ones(0, dtype=np.uint64)
+_inverse_powers = np.ones(0, dtype=np.uint64)
+
+
+def _hash_powers(n):
+    """Powers of the hash base and its inverse, grown on demand and reused"""
+    global _powers, _inverse_powers
+    if len(_powers) < n:
+        size = max(n, 2 * len(_powers), 4096)
+        _powers = np.cumprod(np.full(size, _HASH_BASE, dtype=np.uint64))
+        _inverse_powers = np.cumprod(np.full(size, _HASH_BASE_INV, dtype=np.uint64))
+    return _powers[:n], _inverse_powers[:n]
+
+
+def _bucket(hashes):
+    return ((hashes ^ (hashes >> np.uint64(29))) & np.uint64(N_FEATURES - 1)).astype(np.int64)
+
+
+def featurize(texts):
+    """Flatten a batch into (feature indices, row of each index).
+
+    The whole batch is tokenized in one pass over a single byte buffer. Each
+    token gets a polynomial hash computed from prefix sums, so no per-token
+    Python work is needed; bigrams are hashed from adjacent unigram hashes.
+    """
+    encoded = [text.encode("utf-8") for text in texts]
+    lengths = np.fromiter(map(len, encoded), dtype=np.int64, count=len(encoded))
+    text_starts = np.concatenate([[0], np.cumsum(lengths[:-1] + 1)])
+    buffer = np.frombuffer(b" ".join(encoded).lower().translate(_NORMALIZE) + b" ", dtype=np.uint8)
+
+    is_word = buffer != 32
+    edges = np.diff(is_word.astype(np.int8), prepend=np.int8(0))
+    token_starts = np.flatnonzero(edges == 1)
+    token_ends = np.flatnonzero(edges == -1) - 1
+
+    # take() rather than fancy indexing: a plain gather, several times faster here
+    powers, inverse_powers = _hash_powers(len(buffer))
+    weighted = buffer.astype(np.uint64)
+    np.multiply(weighted, inverse_powers, out=weighted)
+    np.cumsum(weighted, out=weighted)
+    hashes = ((weighted.take(token_ends) - weighted.take(token_starts)
+               + buffer.take(token_starts) * inverse_powers.take(token_starts)) * powers.take(token_ends))
+
+    # Tokens are in text order, so each text's row repeats once per token it starts
+    tokens_per_text = np.add.reduceat((edges == 1).view(np.int8), text_starts, dtype=np.int64)
+    unigram_rows = np.repeat(np.arange(len(texts)), tokens_per_text)
+    same_text = unigram_rows[:-1] == unigram_rows[1:]
+    bigram_hashes = ((hashes[:-1] * _BIGRAM_MULTIPLIER) ^ hashes[1:])[same_text]
+
+    indices = np.concatenate([_bucket(hashes), _bucket(bigram_hashes), np.full(len(texts), BIAS_INDEX)])
+    rows = np.concatenate([unigram_rows, unigram_rows[:-1][same_text], np.arange(len(texts))])
+    return indices, rows
+
+
+def extract_features(text):
+    """Return the hashed feature indices (unigrams, bigrams and bias) for a text"""
+    indices, _ = featurize([text])
+    return indices.tolist()
+
+
+def _scores(weights, indices, rows, n_rows):
+    gathered = np.take(weights, indices, axis=0)
+    return np.stack([
+        np.bincount(rows, weights=gathered[:, label], minlength=n_rows)
+        for label in range(len(LABELS))
+    ], axis=1)
+
+
+def _softmax(scores):
+    scores = scores - scores.max(axis=1, keepdims=True)
+    np.exp(scores, out=scores)
+    scores /= scores.sum(axis=1, keepdims=True)
+    return scores
+
+
+class LocalSentimentModel:
+    """Hashed n-gram logistic regression over LABELS"""
+
+    def __init__(self, weights):
+        if weights.shape != (N_FEATURES + 1, len(LABELS)):
+            raise ValueError(f"Unexpected weight shape {weights.shape}")
+        self.weights = weights
+
+    @classmethod
+    def load(cls, path):
+        return cls(np.load(path, mmap_mode="r"))
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        np.save(path, np.asarray(self.weights, dtype=np.float32))
+
+    def predict_proba(self, texts):
+        """Class probabilities, shape (len(texts), len(LABELS))"""
+        if not texts:
+            return np.zeros((0, len(LABELS)), dtype=np.float32)
+        indices, rows = featurize(texts)
+        return _softmax(_scores(self.weights, indices, rows, len(texts)))
+
+    def predict(self, texts):
+        """Return a (label, confidence) pair for every text"""
+        probs = self.predict_proba(texts)
+        best = probs.argmax(axis=1)
+        return [(LABELS[i], float(probs[row, i])) for row, i in enumerate(best)]
+
+    def classify(self, text):
+        return self.predict([text])[0]
+
+
+def train(samples, epochs=300, learning_rate=0.5, l2=1e-4):
+    """Fit a model on (text, label) pairs with full-batch gradient descent"""
+    samples = [(text, label) for text, label in samples if label in LABELS]
+    if not samples:
+        raise ValueError("No labelled samples to train on")
+
+    texts = [text for text, _ in samples]
+    targets = np.zeros((len(samples), len(LABELS)))
+    targets[np.arange(len(samples)), [LABELS.index(label) for _, label in samples]] = 1.0
+
+    indices, rows = featurize(texts)
+    weights = np.zeros((N_FEATURES + 1, len(LABELS)))
+    for _ in range(epochs):
+        probs = _softmax(_scores(weights, indices, rows, len(samples)))
+        grad_scores = (probs - targets) / len(samples)
+        grad = l2 * weights
+        np.add.at(grad, indices, grad_scores[rows])
+        weights -= learning_rate * grad
+
+    return LocalSentimentModel(weights.astype(np.float32))
+
+
+def _message_field(message, field):
+    if isinstance(message, dict):
+        return message.get(field)
+    if isinstance(message, tuple):
+        # Compact (type, content, id) record written by workflow2
+        return message[("type", "content", "id").index(field)]
+    return getattr(message, field, None)
+
+
+def load_labelled_utterances(memory_dir, reply_labels, skip_replies=()):
+    """Yield (utterance, label) pairs from stored conversation histories.
+
+    The sentiment the workflow decided on is recoverable from the templated
+    reply that answers each human message, so reply_labels maps reply text to
+    the sentiment label that produced it. A human turn is paired with the next
+    AI message found in reply_labels; system prompts and other AI messages in
+    between (the greeting of a new run) are skipped. A reply in skip_replies
+    (the fallback also sent on errors) drops the turn, as does a newer human
+    turn arriving first.
+    """
+    for path in sorted(glob.glob(os.path.join(memory_dir, "*_messages.pkl"))):
+        try:
+            with open(path, "rb") as f:
+                messages = pickle.load(f)
+        except Exception as e:
+            print(f"Skipping {path}: {str(e)}")
+            continue
+        utterance = None
+        for message in messages:
+            kind = _message_field(message, "type")
+            if kind == "human":
+                utterance = _message_field(message, "content")
+            elif kind == "ai" and utterance is not None:
+                content = _message_field(message, "content")
+                if content in skip_replies:
+                    utterance = None
+                elif reply_labels.get(content) in LABELS:
+                    yield utterance, reply_labels[content]
+                    utterance = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the local sentiment model")
+    parser.add_argument("--memory-dir", default="./agent/memory")
+    parser.add_argument("--out", default="./agent/models/sentiment.npy")
+    parser.add_argument("--epochs", type=int, default=300)
+    args = parser.parse_args()
+
+    # Imported here so the classifier itself does not depend on the graph
+    from workflow2 import SENTIMENT_REPLIES, POSITIVE_RESPONSES, NEGATIVE_RESPONSES
+
+    # The "unknown" reply is also the fallback when analysis fails, so it does not label anything
+    reply_labels = {SENTIMENT_REPLIES[label]: label for label in ("positive", "negative")}
+    skip_replies = {SENTIMENT_REPLIES["unknown"], SENTIMENT_REPLIES["sentiment-loop"]}
+    samples = list(load_labelled_utterances(args.memory_dir, reply_labels, skip_replies))
+    print(f"Loaded {len(samples)} labelled utterances from {args.memory_dir}")
+
+    # Seed with the canned responses so a fresh install still has both classes
+    samples += [(text, "positive") for text in POSITIVE_RESPONSES]
+    samples += [(text, "negative") for text in NEGATIVE_RESPONSES]
+
+    model = train(samples, epochs=args.epochs)
+    model.save(args.out)
+    print(f"Saved model trained on {len(samples)} samples to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
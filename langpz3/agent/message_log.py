@@ -0,0 +1,344 @@
+"""
+Append-only, compact message channel for LangGraph state.
+
+`add_messages` copies the whole history, converts every message and rebuilds
+an id index on every update. Here the history is a MessageLog: a snapshot
+that owns only a length, over an append-only backing list (plus an id ->
+position index) shared with the snapshots it grew from. Appending to the
+newest snapshot appends to the backing, so a step costs the same however
+long the history is; snapshots already handed out (stream values,
+checkpoints) keep their length and never see later messages. Only a
+snapshot that diverges copies the backing first: an append to an older
+snapshot, a message replacing one with the same id, or a RemoveMessage.
+
+Plain messages (no tool calls, names or extra kwargs) are kept as
+CompactMessage records (type, content, id) with __slots__, rather than full
+LangChain objects, which carry metadata dicts and pydantic bookkeeping for
+every turn. Reading the log (indexing, iterating, list(log)) turns a record
+into a LangChain message on first access and caches it, so nodes and the LLM
+boundary still see BaseMessage objects. log.records() and last_message()
+read without converting, so history nobody looks at stays compact.
+response_metadata and usage_metadata are not kept for those turns.
+
+Use the channel in the state schema:
+    messages: Annotated[List[BaseMessage], MessageLogChannel()]
+
+MessageLogChannel checkpoints the log as plain (type, content, id) fields
+and LangChain messages, which every checkpointer stores and restores without
+registering custom types. The fields are sealed in immutable blocks of
+CHUNK_SIZE records as the log grows, so taking a checkpoint does not copy
+the history either. append_messages is the same merge as a plain reducer
+for graphs without a checkpointer.
+
+to_records/from_records give the (type, content, id) form used by the
+workflow2 memory pickles.
+"""
+
+import threading
+import uuid
+from collections.abc import Sequence
+from itertools import islice
+
+from langchain_core.messages import (
+    AIMessage, BaseMessage, HumanMessage, RemoveMessage, SystemMessage, convert_to_messages,
+)
+from langgraph.channels.binop import BinaryOperatorAggregate
+from langgraph.graph.message import REMOVE_ALL_MESSAGES
+
+MESSAGE_CLASSES = {"human": HumanMessage, "ai": AIMessage, "system": SystemMessage}
+
+# Records per sealed checkpoint block
+CHUNK_SIZE = 256
+
+
+class CompactMessage:
+    """A stored message reduced to (type, content, id)"""
+
+    __slots__ = ("type", "content", "id", "_message")
+
+    def __init__(self, type, content, id=None):
+        self.type = type
+        self.content = content
+        self.id = id if id is not None else str(uuid.uuid4())
+        self._message = None
+
+    @classmethod
+    def from_message(cls, message):
+        """The compact form of message, or None if it has fields that would be lost"""
+        if (message.type not in MESSAGE_CLASSES or message.additional_kwargs or message.name
+                or getattr(message, "tool_calls", None) or getattr(message, "invalid_tool_calls", None)):
+            return None
+        return cls(message.type, message.content, message.id)
+
+    def to_message(self):
+        """The LangChain message, built once and cached"""
+        if self._message is None:
+            self._message = MESSAGE_CLASSES[self.type](content=self.content, id=self.id)
+        return self._message
+
+    def to_tuple(self):
+        return (self.type, self.content, self.id)
+
+    def __repr__(self):
+        return f"CompactMessage({self.type!r}, {self.content!r}, {self.id!r})"
+
+
+def _materialize(item):
+    return item.to_message() if type(item) is CompactMessage else item
+
+
+def _coerce(message):
+    """A CompactMessage record where possible, otherwise a LangChain message"""
+    if type(message) is CompactMessage:
+        return message
+    if isinstance(message, (tuple, list)) and len(message) == 3 and message[0] in MESSAGE_CLASSES:
+        # A (type, content, id) record, from memory or a checkpoint
+        return CompactMessage(*message)
+    if not isinstance(message, BaseMessage):
+        message = convert_to_messages([message])[0]
+    if isinstance(message, RemoveMessage):
+        return message
+    if message.id is None:
+        message.id = str(uuid.uuid4())
+    return CompactMessage.from_message(message) or message
+
+
+def _fields(item):
+    """Checkpoint form of one item: its (type, content, id), or (None, message, None)"""
+    if type(item) is CompactMessage:
+        return (item.type, item.content, item.id)
+    return (None, item, None)
+
+
+class _Backing:
+    """Storage shared by a log and the snapshots it grew from; only ever appended to"""
+
+    __slots__ = ("items", "positions", "sealed", "tail", "lock")
+
+    def __init__(self):
+        self.items = []  # CompactMessage records and whole messages
+        self.positions = {}  # id -> position in items
+        self.sealed = []  # checkpoint fields of each full block, as tuples
+        self.tail = []  # checkpoint fields of the block being filled
+        self.lock = threading.Lock()
+
+    def append(self, item):
+        self.positions[item.id] = len(self.items)
+        self.items.append(item)
+        self.tail.extend(_fields(item))
+        if len(self.tail) == 3 * CHUNK_SIZE:
+            self.sealed.append(tuple(self.tail))
+            self.tail = []
+
+    def replace(self, position, item):
+        self.items[position] = item
+        block, offset = divmod(position, CHUNK_SIZE)
+        if block < len(self.sealed):
+            fields = list(self.sealed[block])
+            fields[3 * offset:3 * offset + 3] = _fields(item)
+            self.sealed[block] = tuple(fields)
+        else:
+            self.tail[3 * offset:3 * offset + 3] = _fields(item)
+
+    def blocks(self, length):
+        """Checkpoint fields of the first length items; sealed blocks are shared, not copied"""
+        with self.lock:
+            full = length // CHUNK_SIZE
+            blocks = self.sealed[:full]
+            rest = length - full * CHUNK_SIZE
+            if rest:
+                block = self.sealed[full] if full < len(self.sealed) else self.tail
+                blocks.append(tuple(block[:3 * rest]))
+        return blocks
+
+    def fork(self, length):
+        """A private copy of the first length items"""
+        with self.lock:
+            items = self.items[:length]
+        copy = _Backing()
+        copy.items = items
+        copy.positions = {item.id: i for i, item in enumerate(items)}
+        copy.sealed = self.sealed[:length // CHUNK_SIZE]
+        rest = length - len(copy.sealed) * CHUNK_SIZE
+        if rest:
+            copy.tail = list(self.blocks(length)[-1])
+        return copy
+
+
+class MessageLog(Sequence):
+    """A read-only snapshot of a message history: the first len(log) items of a shared backing"""
+
+    __slots__ = ("_backing", "_length")
+
+    def __init__(self, messages=()):
+        self._backing, self._length = _merge(_Backing(), 0, messages)
+
+    @classmethod
+    def _view(cls, backing, length):
+        log = cls.__new__(cls)
+        log._backing = backing
+        log._length = length
+        return log
+
+    @classmethod
+    def from_blocks(cls, blocks):
+        """Rebuild a log from MessageLogChannel checkpoint blocks"""
+        backing = _Backing()
+        for block in blocks:
+            for i in range(0, len(block), 3):
+                kind, content, message_id = block[i:i + 3]
+                backing.append(CompactMessage(kind, content, message_id) if kind is not None else content)
+        return cls._view(backing, len(backing.items))
+
+    def merge(self, messages):
+        """A new log with messages appended, or replacing those with the same id"""
+        return MessageLog._view(*_merge(self._backing, self._length, messages))
+
+    def records(self):
+        """The stored items (CompactMessage or BaseMessage) without converting them"""
+        return islice(self._backing.items, self._length)
+
+    def blocks(self):
+        """Checkpoint form: lists of (type, content, id) fields, (None, message, None) for whole messages"""
+        return self._backing.blocks(self._length)
+
+    def copy(self):
+        # Snapshots are never modified, so a copy can share the backing
+        return MessageLog._view(self._backing, self._length)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [_materialize(item) for item in self._backing.items[:self._length][index]]
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("message index out of range")
+        return _materialize(self._backing.items[index])
+
+    def __iter__(self):
+        return map(_materialize, self.records())
+
+    def __reversed__(self):
+        items = self._backing.items
+        return (_materialize(items[i]) for i in range(self._length - 1, -1, -1))
+
+    def __eq__(self, other):
+        if not isinstance(other, (list, MessageLog)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+
+    __hash__ = None
+
+    def __add__(self, other):
+        return list(self) + list(other)
+
+    def __radd__(self, other):
+        return list(other) + list(self)
+
+    def __reduce__(self):
+        return (MessageLog, (list(self.records()),))
+
+    def __repr__(self):
+        return f"MessageLog({list(self.records())!r})"
+
+
+def _merge(backing, length, messages):
+    """Merge messages into the first length items of backing; returns the new (backing, length)"""
+    owned = False  # True once backing is a private fork, which can be changed in place
+    for item in map(_coerce, messages):
+        if isinstance(item, RemoveMessage):
+            backing, length = _remove(backing, length, item.id)
+            owned = True
+            continue
+        with backing.lock:
+            position = backing.positions.get(item.id)
+            replacing = position is not None and position < length
+            if not replacing and length == len(backing.items):
+                # The newest snapshot: appending is invisible to the older ones
+                backing.append(item)
+                length += 1
+                continue
+        if not owned:
+            backing = backing.fork(length)
+            owned = True
+        if replacing:
+            backing.replace(position, item)
+        else:
+            backing.append(item)
+            length += 1
+    return backing, length
+
+
+def _remove(backing, length, message_id):
+    # Removal is rare, so it simply rebuilds the log
+    if message_id == REMOVE_ALL_MESSAGES:
+        return _Backing(), 0
+    position = backing.positions.get(message_id)
+    if position is None or position >= length:
+        raise ValueError(f"Attempting to delete a message with an ID that doesn't exist ('{message_id}')")
+    kept = [item for i, item in enumerate(islice(backing.items, length)) if i != position]
+    return _merge(_Backing(), 0, kept)
+
+
+def append_messages(left, right):
+    """Reducer: a new log with right merged into left by id; left is never modified"""
+    if not isinstance(right, (list, MessageLog)):
+        right = [right]
+    if not isinstance(left, MessageLog):
+        # First update of a run
+        left = MessageLog(left or ())
+    return left.merge(right)
+
+
+class MessageLogChannel(BinaryOperatorAggregate):
+    """State channel merging messages with append_messages, checkpointed as plain fields"""
+
+    def __init__(self, typ=list, operator=append_messages):
+        super().__init__(typ, operator)
+        self.value = MessageLog()
+
+    def checkpoint(self):
+        if isinstance(self.value, MessageLog):
+            return {"message_log": self.value.blocks()}
+        return self.value
+
+    def from_checkpoint(self, checkpoint):
+        channel = super().from_checkpoint(checkpoint)
+        if isinstance(checkpoint, dict) and "message_log" in checkpoint:
+            channel.value = MessageLog.from_blocks(checkpoint["message_log"])
+        elif isinstance(channel.value, list):
+            # Written by add_messages or an older append_messages
+            channel.value = MessageLog(channel.value)
+        return channel
+
+
+def last_message(messages, message_type):
+    """The newest message of message_type ("human", "ai", ...), or None; converts only that one"""
+    if isinstance(messages, MessageLog):
+        items = messages._backing.items
+        for i in range(len(messages) - 1, -1, -1):
+            if items[i].type == message_type:
+                return _materialize(items[i])
+        return None
+    return next((message for message in reversed(messages) if message.type == message_type), None)
+
+
+def to_records(messages):
+    """Compact, picklable form of a history: (type, content, id) tuples where possible"""
+    if isinstance(messages, MessageLog):
+        messages = messages.records()
+    records = []
+    for item in messages:
+        if isinstance(item, BaseMessage):
+            item = CompactMessage.from_message(item) or item
+        records.append(item.to_tuple() if type(item) is CompactMessage else item)
+    return records
+
+
+def from_records(records):
+    """Inverse of to_records; LangChain messages and dicts pass through unchanged"""
+    return [MESSAGE_CLASSES[item[0]](content=item[1], id=item[2]) if isinstance(item, tuple) else item
+            for item in records]
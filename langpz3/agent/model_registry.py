@@ -0,0 +1,107 @@
+"""
+Process-wide registry of chat model clients.
+
+Every workflow gets its models from get_chat_model(), which keeps one
+long-lived ChatOpenAI per (model, temperature, config) and makes them all share
+a single pair of pooled httpx clients. System prompts are never baked into the
+cached instances; prepend them per call with with_system_prompt().
+
+Environment:
+    MODEL_TIMEOUT          request timeout in seconds (default 60)
+    MODEL_MAX_CONNECTIONS  size of the shared connection pool (default 20)
+    MODEL_MAX_RETRIES      retries per request (default 2)
+    MODEL_BASE_URL         OpenAI-compatible endpoint to use instead of api.openai.com
+    LLM_CASSETTE_MODE      record/replay/auto to record or replay model calls (see llm_cassette.py)
+    LLM_CASSETTE_PATH      cassette file (default ./agent/cassettes/llm.jsonl)
+"""
+
+import os
+import threading
+
+import httpx
+from langchain_core.messages import HumanMessage, SystemMessage
+
+MODEL_TIMEOUT = float(os.environ.get("MODEL_TIMEOUT", "60"))
+MODEL_MAX_CONNECTIONS = int(os.environ.get("MODEL_MAX_CONNECTIONS", "20"))
+MODEL_MAX_RETRIES = int(os.environ.get("MODEL_MAX_RETRIES", "2"))
+MODEL_BASE_URL = os.environ.get("MODEL_BASE_URL") or None
+LLM_CASSETTE_MODE = os.environ.get("LLM_CASSETTE_MODE", "off").lower()
+
+# Short names used by the workflows
+MODEL_ALIASES = {"openai": "gpt-4o"}
+
+_lock = threading.Lock()
+_models = {}
+_http_clients = None
+
+
+def _shared_http_clients():
+    """The sync and async httpx clients every model shares (created once)"""
+    global _http_clients
+    if _http_clients is None:
+        limits = httpx.Limits(
+            max_connections=MODEL_MAX_CONNECTIONS,
+            max_keepalive_connections=MODEL_MAX_CONNECTIONS,
+        )
+        timeout = httpx.Timeout(MODEL_TIMEOUT, connect=min(10.0, MODEL_TIMEOUT))
+        _http_clients = (
+            httpx.Client(limits=limits, timeout=timeout),
+            httpx.AsyncClient(limits=limits, timeout=timeout),
+        )
+    return _http_clients
+
+
+def _create_model(model_name, temperature, config):
+    from langchain_openai import ChatOpenAI
+
+    http_client, http_async_client = _shared_http_clients()
+    return ChatOpenAI(
+        model=model_name,
+        temperature=temperature,
+        timeout=MODEL_TIMEOUT,
+        max_retries=MODEL_MAX_RETRIES,
+        base_url=MODEL_BASE_URL,
+        http_client=http_client,
+        http_async_client=http_async_client,
+        **config,
+    )
+
+
+def get_chat_model(model_name="openai", temperature=0, **config):
+    """Return the shared chat model for this model name, temperature and config"""
+    model_name = MODEL_ALIASES.get(model_name, model_name)
+    key = (model_name, temperature, tuple(sorted(config.items())))
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        model = _models.get(key)
+        if model is None:
+            # Replaying needs no real client (or API key)
+            model = None if LLM_CASSETTE_MODE == "replay" else _create_model(model_name, temperature, config)
+            if LLM_CASSETTE_MODE != "off":
+                from llm_cassette import cassette_model
+                model = cassette_model(model, model_name, temperature, mode=LLM_CASSETTE_MODE, model_kwargs=config)
+            _models[key] = model
+    return model
+
+
+def with_system_prompt(messages, system_prompt=None):
+    """Prepend a per-call system prompt to a prompt string or message list"""
+    if isinstance(messages, str):
+        messages = [HumanMessage(content=messages)]
+    if not system_prompt:
+        return list(messages)
+    return [SystemMessage(content=system_prompt)] + list(messages)
+
+
+def close_models():
+    """Drop all cached models and close the shared connection pools"""
+    global _http_clients
+    with _lock:
+        _models.clear()
+        if _http_clients is not None:
+            # The async client can only be closed from a running loop; let it be collected
+            _http_clients[0].close()
+            _http_clients = None
@@ -3,13 +3,19 @@
 from typing import TypedDict, Dict, Any, List, Annotated
 from langgraph.graph import StateGraph, END
 import os
-from langsmith.run_helpers import traceable
 import json
+import re
 from datetime import datetime
 from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage
 from langgraph.graph import add_messages
 import sys
-from functools import lru_cache
+
+# Shared modules (model registry) live in the parent agent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_registry import get_chat_model
+from trace_sampling import traceable
+from todo_store import get_todo_list
+from intent_router import BOND7_ROUTER, SMALL_TALK_ROUTER
 
 # Safe environment variable handling
 try:
@@ -18,22 +24,41 @@ try:
 except ImportError:
     print("Warning: langchain_openai or openai not available")
 
+# Todos shown per view_todos reply
+TODO_PAGE_SIZE = int(os.environ.get("TODO_PAGE_SIZE", "10"))
+
+# general_question replies, keyed by SMALL_TALK_ROUTER intent
+SMALL_TALK_REPLIES = {
+    "default": "I'm here to help you stay productive. Would you like to add a task to your todo list or see your current tasks?",
+    "greeting": "Hello there! How can I help you today with your productivity tasks?",
+    "how_are_you": "I'm functioning perfectly! Thank you for asking. How can I help you with your tasks today?",
+    "help": "I can help you manage your tasks and boost your productivity. Try asking me to add a task or show your to-do list!",
+    "thanks": "You're welcome! Is there anything else I can help you with?",
+    "langgraph": "LangGraph is a powerful framework for building AI applications with structured workflows. It's what makes me work!",
+    "langchain": "LangChain is a framework for developing applications powered by language models. It's a key technology behind agents like me.",
+    "capabilities": "I can help you manage your tasks with my to-do list functionality. I can add tasks, show your current tasks, and chat with you about productivity topics.",
+}
+
 # Enhanced State Definition for 007 Productivity Agent
 class AgentState(TypedDict):
     user: dict  # Store user information (name, preferences)
-    todos: list  # Store todo items
+    todo_offset: int  # Start of the last todo page shown (todos live in todo_store)
+    todos_added: int  # Todos added this session
     messages: Annotated[List[BaseMessage], add_messages]  # For conversation tracking
     current_step: str  # For tracking workflow progress
     skills_used: list  # Track which skills were used in the session
     human_input_received: bool  # Flag to indicate if we've received human input
 
+def _todo_list(state):
+    """The todo store for this conversation's user"""
+    user = state.get("user") or {}
+    return get_todo_list(user.get("email") or user.get("name") or "anonymous")
+
 # Initialize Models with error handling
-@lru_cache(maxsize=4)
 def get_model():
     """Get a model for generating responses"""
     try:
-        model = ChatOpenAI(temperature=0.7, model_name="gpt-4o")
-        return model
+        return get_chat_model("openai", temperature=0.7)
     except Exception as e:
         print(f"Error initializing model: {str(e)}")
         return None
@@ -46,8 +71,10 @@ def validate_input(state: AgentState):
     # Initialize workflow tracking fields if not present
     if "user" not in state:
         state["user"] = {"name": None}
-    if "todos" not in state:
-        state["todos"] = []
+    if "todo_offset" not in state:
+        state["todo_offset"] = 0
+    if "todos_added" not in state:
+        state["todos_added"] = 0
     if "current_step" not in state:
         state["current_step"] = "initialize_agent"
     if "messages" not in state:
@@ -141,18 +168,10 @@ def process_input(state: AgentState):
                 "current_step": "human_step"
             }
     
-    # Determine intent based on keywords
-    intent = "general_question"  # Default intent
-    lower_content = message_content.lower()
-    
-    if "add" in lower_content and ("todo" in lower_content or "task" in lower_content):
-        intent = "add_todo"
-    elif "show" in lower_content and ("todo" in lower_content or "task" in lower_content):
-        intent = "view_todos"
-    elif "list" in lower_content and ("todo" in lower_content or "task" in lower_content):
-        intent = "view_todos"
-    elif any(word in lower_content for word in ["bye", "exit", "quit", "goodbye"]):
-        intent = "end_conversation"
+    # Determine intent from the keyword table (see intent_router.py)
+    match = BOND7_ROUTER.classify(message_content)
+    intent = match.intent
+    print(f"Intent {intent} (rule {match.rule})")
     
     # Add the intent to skills used
     skills_used = state["skills_used"] 
@@ -187,29 +206,77 @@ def add_todo(state: AgentState):
         task = task.replace("todo", "", 1)
         task = task.strip()
     
-    # Add to todos
-    todos = state["todos"]
-    todos.append({"task": task, "created_at": datetime.now().isoformat()})
+    # Optional due date: "... by 2025-05-01" or "... due 2025-05-01"
+    due = None
+    due_match = re.search(r"\s*\b(?:by|due)\s+(\d{4}-\d{2}-\d{2})\b", task)
+    if due_match:
+        due = due_match.group(1)
+        task = (task[:due_match.start()] + task[due_match.end():]).strip()
+    
+    # Add to the user's todo store
+    todo = _todo_list(state).add(task, due=due)
+    due_note = f" (due {due})" if due else ""
     
     return {
-        "todos": todos,
-        "messages": [AIMessage(content=f"I've added \"{task}\" to your todo list. Is there anything else you'd like me to do?")],
+        "todos_added": state.get("todos_added", 0) + 1,
+        "messages": [AIMessage(content=f"I've added \"{task}\"{due_note} to your todo list as #{todo['id']}. Is there anything else you'd like me to do?")],
         "current_step": "human_step"
     }
 
 @traceable(project_name="007-productivity-agent")
 def view_todos(state: AgentState):
-    """Show the todo list"""
+    """Show one page of open todos, or the next few due"""
+    
+    todos = _todo_list(state)
+    rule = BOND7_ROUTER.classify(state["messages"][-1].content).rule
+    
+    if rule == "upcoming_todos":
+        upcoming = todos.upcoming(TODO_PAGE_SIZE)
+        if not upcoming:
+            response = "Nothing on your todo list has a due date coming up."
+        else:
+            lines = ["Coming up next:"] + [f"#{todo['id']} {todo['task']} (due {todo['due'][:10]})" for todo in upcoming]
+            response = "\n".join(lines)
+        return {
+            "messages": [AIMessage(content=response)],
+            "current_step": "human_step"
+        }
     
-    todos = state["todos"]
+    # "next page" continues from the last page shown; anything else starts over
+    offset = 0
+    if rule == "next_page":
+        offset = state.get("todo_offset", 0) + TODO_PAGE_SIZE
+    page, total = todos.page(status="open", offset=offset, limit=TODO_PAGE_SIZE)
+    if not page and offset:
+        offset = 0
+        page, total = todos.page(status="open", offset=0, limit=TODO_PAGE_SIZE)
     
-    if not todos:
+    if not page:
         response = "You don't have any tasks in your todo list yet. Would you like to add one?"
     else:
-        response = "Here's your current todo list:\n"
-        for i, todo in enumerate(todos, 1):
-            response += f"{i}. {todo['task']}\n"
-        response += "\nIs there anything else you'd like me to do?"
+        lines = [f"Here's your current todo list ({offset + 1}-{offset + len(page)} of {total}):"]
+        lines += [f"#{todo['id']} {todo['task']}" + (f" (due {todo['due'][:10]})" if todo.get("due") else "") for todo in page]
+        if offset + len(page) < total:
+            lines.append("\nSay \"next page\" to see more.")
+        lines.append("\nIs there anything else you'd like me to do?")
+        response = "\n".join(lines)
+    
+    return {
+        "todo_offset": offset,
+        "messages": [AIMessage(content=response)],
+        "current_step": "human_step"
+    }
+
+@traceable(project_name="007-productivity-agent")
+def complete_todo(state: AgentState):
+    """Mark a todo as done by its number"""
+    
+    match = re.search(r"\d+", state["messages"][-1].content)
+    todo = _todo_list(state).complete(int(match.group())) if match else None
+    if todo is None:
+        response = "I couldn't find that task. Say \"show my todos\" to see their numbers."
+    else:
+        response = f"Nice work! I've marked \"{todo['task']}\" as done."
     
     return {
         "messages": [AIMessage(content=response)],
@@ -226,24 +293,8 @@ def general_question(state: AgentState):
     # Use a simple rule-based response system
     content = latest_message.content.lower()
     
-    # Default response
-    response = "I'm here to help you stay productive. Would you like to add a task to your todo list or see your current tasks?"
-    
-    # Check for common phrases
-    if "hello" in content or "hi" in content:
-        response = "Hello there! How can I help you today with your productivity tasks?"
-    elif "how are you" in content:
-        response = "I'm functioning perfectly! Thank you for asking. How can I help you with your tasks today?"
-    elif "help" in content:
-        response = "I can help you manage your tasks and boost your productivity. Try asking me to add a task or show your to-do list!"
-    elif "thank" in content:
-        response = "You're welcome! Is there anything else I can help you with?"
-    elif "langgraph" in content:
-        response = "LangGraph is a powerful framework for building AI applications with structured workflows. It's what makes me work!"
-    elif "langchain" in content:
-        response = "LangChain is a framework for developing applications powered by language models. It's a key technology behind agents like me."
-    elif "capability" in content or "do you do" in content or "can you" in content:
-        response = "I can help you manage your tasks with my to-do list functionality. I can add tasks, show your current tasks, and chat with you about productivity topics."
+    # Canned reply for the phrase that matches (see intent_router.py)
+    response = SMALL_TALK_REPLIES[SMALL_TALK_ROUTER.classify(content).intent]
     
     try:
         # Try to use the model if available
@@ -268,7 +319,7 @@ def end_conversation(state: AgentState):
     """End the conversation"""
     
     # Create a summary of what was accomplished
-    tasks_added = len(state["todos"])
+    tasks_added = state.get("todos_added", 0)
     skills_used = state["skills_used"]
     
     farewell = f"It was great helping you today! "
@@ -295,6 +346,7 @@ def create_agent_graph():
     workflow.add_node("process_input", process_input)
     workflow.add_node("add_todo", add_todo)
     workflow.add_node("view_todos", view_todos)
+    workflow.add_node("complete_todo", complete_todo)
     workflow.add_node("general_question", general_question)
     workflow.add_node("end_conversation", end_conversation)
     
@@ -320,6 +372,7 @@ def create_agent_graph():
         {
             "add_todo": "add_todo",
             "view_todos": "view_todos", 
+            "complete_todo": "complete_todo",
             "general_question": "general_question",
             "end_conversation": "end_conversation",
             "human_step": "human_step"
@@ -329,6 +382,7 @@ def create_agent_graph():
     # All handlers go back to human_step
     workflow.add_edge("add_todo", "human_step")
     workflow.add_edge("view_todos", "human_step")
+    workflow.add_edge("complete_todo", "human_step")
     workflow.add_edge("general_question", "human_step")
     
     # Set entry point
@@ -349,7 +403,8 @@ def main():
     state = {
         "messages": [],
         "user": {"name": None},
-        "todos": [],
+        "todo_offset": 0,
+        "todos_added": 0,
         "skills_used": [],
         "human_input_received": False,
         "current_step": "validate_input"
@@ -8,15 +8,17 @@ import argparse
 import os
 import sys
 import time
-import json
 from pathlib import Path
 from typing import Dict, List, Any, TypedDict, Annotated
-from functools import lru_cache
+
+# Shared modules (model registry, JSON codec) live in the parent agent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import json_codec
 
 # Langchain/OpenAI imports with error handling
 try:
     from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage
-    from langchain_openai import ChatOpenAI
+    from model_registry import get_chat_model
     IMPORTS_AVAILABLE = True
 except ImportError:
     print("Warning: langchain/openai packages not available. Will use mock mode only.")
@@ -139,9 +141,8 @@ class MockLanguageModel:
         print(f"🔄 Mock model bind called with system message: {system_message[:50] if system_message else 'None'}")
         return self
 
-# Model initialization with caching
-@lru_cache(maxsize=4)
-def get_model(model_name: str = "openai", system_prompt: str = None, mocked: bool = False):
+# Model initialization; real clients are cached by the shared model registry
+def get_model(model_name: str = "openai", mocked: bool = False):
     """Get a language model, with improved logging for mocked vs real mode"""
     print(f"📝 get_model called with: model_name={model_name}, mocked={mocked}")
     
@@ -151,14 +152,8 @@ def get_model(model_name: str = "openai", system_prompt: str = None, mocked: boo
     
     try:
         if model_name == "openai":
-            print("🔌 Initializing REAL OpenAI model (gpt-4o)")
-            model = ChatOpenAI(temperature=0, model_name="gpt-4o")
-            
-            if system_prompt:
-                print(f"🧠 Using system prompt: {system_prompt[:50]}...")
-                # Don't bind system message directly to the model
-            
-            return model
+            print("🔌 Using shared OpenAI model (gpt-4o)")
+            return get_chat_model(model_name)
         else:
             raise ValueError(f"Unsupported model type: {model_name}")
     except Exception as e:
@@ -254,9 +249,9 @@ def save_memory(state: AgentState, user_key: str):
             "last_updated": time.time()
         }
         
-        # Save to file
-        with open(memory_file, 'w') as f:
-            json.dump(memory_data, f, indent=2)
+        # Save to file (compact JSON via the shared codec)
+        with open(memory_file, 'wb') as f:
+            f.write(json_codec.dumpb(memory_data))
         
         print(f"💾 Saved memory for user {user_key}")
     except Exception as e:
@@ -271,8 +266,8 @@ def load_memory(user_key: str) -> dict:
             print(f"📝 No existing memory found for user {user_key}")
             return {}
         
-        with open(memory_file, 'r') as f:
-            memory_data = json.load(f)
+        with open(memory_file, 'rb') as f:
+            memory_data = json_codec.loads(f.read())
         
         print(f"📖 Loaded memory for user {user_key}")
         return memory_data
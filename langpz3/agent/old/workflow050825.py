@@ -5,8 +5,12 @@ from langsmith.run_helpers import traceable
 from datetime import datetime
 from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage
 from langgraph.graph import add_messages
-from functools import lru_cache
 import json
+import sys
+
+# Shared modules (model registry) live in the parent agent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_registry import get_chat_model
 
 # Safe environment variable handling
 try:
@@ -30,11 +34,10 @@ class WorkflowState(TypedDict):
     skills_used: List[str]  # Track which skills have been used
     processed_inputs: List[str]  # Track processed inputs to prevent loops
 
-@lru_cache(maxsize=1)
 def get_llm():
     """Get the language model with error handling"""
     try:
-        return ChatOpenAI(temperature=0, model="gpt-4")
+        return get_chat_model("gpt-4", temperature=0)
     except Exception as e:
         print(f"Error initializing LLM: {str(e)}")
         return None
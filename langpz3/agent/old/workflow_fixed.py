@@ -5,8 +5,13 @@ from langsmith.run_helpers import traceable
 from datetime import datetime
 from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage
 from langgraph.graph import add_messages
-from functools import lru_cache
 import json
+import sys
+
+# Shared modules (model registry) live in the parent agent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_registry import get_chat_model
+from intent_router import WORKFLOW_FIXED_ROUTER
 
 # Safe environment variable handling
 try:
@@ -26,11 +31,10 @@ class WorkflowState(TypedDict):
     sentiment_attempts: int  # Track number of sentiment analysis attempts
     human_input_received: bool  # Flag to prevent recursion
 
-@lru_cache(maxsize=1)
 def get_llm():
     """Get the language model with error handling"""
     try:
-        return ChatOpenAI(temperature=0, model="gpt-4")
+        return get_chat_model("gpt-4", temperature=0)
     except Exception as e:
         print(f"Error initializing LLM: {str(e)}")
         return None
@@ -355,20 +359,14 @@ def human_step(state: WorkflowState) -> Dict:
         if isinstance(last_message, HumanMessage):
             # We have received human input, so process it
             state["human_input_received"] = True
-            content = last_message.content.lower()
             
-            # Check for end conversation
-            if content in ["end", "bye", "goodbye", "exit", "quit"]:
+            # End, reschedule or a question, by priority (see intent_router.py)
+            intent = WORKFLOW_FIXED_ROUTER.classify(last_message.content).intent
+            if intent == "end_conversation":
                 state["messages"].append(AIMessage(content="Thank you for your time! Have a great day!"))
                 return {"current_step": END}
-            
-            # Check for reschedule
-            if "reschedule" in content:
-                return {"current_step": "reschedule"}
-            
-            # Check for additional questions
-            if "?" in content:
-                return {"current_step": "process_additional"}
+            if intent:
+                return {"current_step": intent}
             
             # If no name yet, go to process_name
             if not state["customer"].get("name"):
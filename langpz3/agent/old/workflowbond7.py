@@ -3,14 +3,17 @@
 from typing import TypedDict, Dict, Any, List, Annotated, Literal
 from langgraph.graph import StateGraph, END
 import os
-from langsmith.run_helpers import traceable
 import json
 from datetime import datetime
 from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage
 from langgraph.graph import add_messages
-from functools import lru_cache
 import sys
 
+# Shared modules (model registry) live in the parent agent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_registry import get_chat_model
+from trace_sampling import traceable
+
 # Safe environment variable handling
 try:
     from langchain_openai import ChatOpenAI
@@ -32,13 +35,11 @@ class AgentState(TypedDict):
     processed_inputs: list  # Track processed inputs to avoid loops
 
 # Initialize Models with error handling
-@lru_cache(maxsize=4)
 def _get_model(model_name: str):
     """Get a model with the specified name"""
     try:
         if model_name == "openai":
-            model = ChatOpenAI(temperature=0, model_name="gpt-4o")
-            return model
+            return get_chat_model(model_name)
         else:
             raise ValueError(f"Unsupported model type: {model_name}")
     except Exception as e:
@@ -3,13 +3,17 @@
 from typing import TypedDict, Dict, Any, List, Annotated
 from langgraph.graph import StateGraph, END
 import os
-from langsmith.run_helpers import traceable
 import json
 from datetime import datetime
 from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage
 from langgraph.graph import add_messages
 import sys
-from functools import lru_cache
+
+# Shared modules (model registry) live in the parent agent directory
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from model_registry import get_chat_model, with_system_prompt
+from trace_sampling import traceable
+from intent_router import SMALL_TALK_ROUTER
 
 # Safe environment variable handling
 try:
@@ -18,6 +22,18 @@ try:
 except ImportError:
     print("Warning: langchain_openai or openai not available")
 
+# general_question replies, keyed by SMALL_TALK_ROUTER intent
+SMALL_TALK_REPLIES = {
+    "default": "I'm here to help you stay productive. Would you like to add a task to your todo list or see your current tasks?",
+    "greeting": "Hello there! How can I help you today with your productivity tasks?",
+    "how_are_you": "I'm functioning perfectly! Thank you for asking. How can I help you with your tasks today?",
+    "help": "I can help you manage your tasks and boost your productivity. Try asking me to add a task or show your to-do list!",
+    "thanks": "You're welcome! Is there anything else I can help you with?",
+    "langgraph": "LangGraph is a powerful framework for building AI applications with structured workflows. It's what makes me work!",
+    "langchain": "LangChain is a framework for developing applications powered by language models. It's a key technology behind agents like me.",
+    "capabilities": "I can help you manage your tasks with my to-do list functionality. I can add tasks, show your current tasks, and chat with you about productivity topics.",
+}
+
 # Enhanced State Definition for 007 Productivity Agent
 class AgentState(TypedDict):
     user: dict  # Store user information (name, preferences)
@@ -78,6 +94,8 @@ class MockLanguageModel:
         # Create a response object similar to what the real model would return
         return AIMessage(content=response_text)
     
+    invoke = __call__
+    
     def bind(self, system_message=None):
         """Support the bind method that real models have"""
         print(f"🔄 Mock model bind called with system message: {system_message[:50] if system_message else 'None'}")
@@ -151,11 +169,11 @@ Keep your response concise and friendly."""
             # Get model
             try:
                 print("🚀 Calling OpenAI model to generate response")
-                model = _get_model("openai", system_prompt, mocked=is_mocked)
+                model = _get_model("openai", mocked=is_mocked)
                 
                 import time
                 start_time = time.time()
-                response = model(messages)
+                response = model.invoke(with_system_prompt(messages, system_prompt))
                 end_time = time.time()
                 
                 print(f"✅ Response generated in {end_time - start_time:.2f}s")
@@ -194,11 +212,11 @@ Keep your responses concise and focused."""
             # Get model
             try:
                 print("🚀 Calling OpenAI model to generate response")
-                model = _get_model("openai", system_prompt, mocked=is_mocked)
+                model = _get_model("openai", mocked=is_mocked)
                 
                 import time
                 start_time = time.time()
-                response = model(messages)
+                response = model.invoke(with_system_prompt(messages, system_prompt))
                 end_time = time.time()
                 
                 print(f"✅ Response generated in {end_time - start_time:.2f}s")
@@ -225,8 +243,7 @@ Keep your responses concise and focused."""
     }
 
 # Initialize Models with error handling
-@lru_cache(maxsize=4)
-def _get_model(model_name: str, system_prompt: str = None, mocked: bool = False):
+def _get_model(model_name: str, mocked: bool = False):
     """Get a language model, with improved logging for mocked vs real mode"""
     print(f"📝 _get_model called with: model_name={model_name}, mocked={mocked}")
     
@@ -237,16 +254,10 @@ def _get_model(model_name: str, system_prompt: str = None, mocked: bool = False)
             return MockLanguageModel(model_name)
         
         if model_name == "openai":
-            print("🔌 Initializing REAL OpenAI model (gpt-4o)")
-            model = ChatOpenAI(temperature=0, model_name="gpt-4o")
+            print("🔌 Using shared OpenAI model (gpt-4o)")
+            return get_chat_model(model_name)
         else:
             raise ValueError(f"Unsupported model type: {model_name}")
-        
-        if system_prompt:
-            print(f"🧠 Binding system prompt: {system_prompt[:50]}...")
-            model = model.bind(system_message=system_prompt)
-        
-        return model
     except Exception as e:
         print(f"❌ Error initializing model: {str(e)}")
         # Return a mock model if initialization fails
@@ -410,7 +421,7 @@ def general_question(state: AgentState):
     
     try:
         # Try to use the model
-        model = get_model()
+        model = _get_model("openai")
         if model:
             # Only use the last few messages to keep context small
             context = state["messages"][-5:]  # Last 5 messages max
@@ -428,24 +439,8 @@ def general_question(state: AgentState):
     latest_message = state["messages"][-1]
     content = latest_message.content.lower()
     
-    # Default response
-    response = "I'm here to help you stay productive. Would you like to add a task to your todo list or see your current tasks?"
-    
-    # Check for common phrases
-    if "hello" in content or "hi" in content:
-        response = "Hello there! How can I help you today with your productivity tasks?"
-    elif "how are you" in content:
-        response = "I'm functioning perfectly! Thank you for asking. How can I help you with your tasks today?"
-    elif "help" in content:
-        response = "I can help you manage your tasks and boost your productivity. Try asking me to add a task or show your to-do list!"
-    elif "thank" in content:
-        response = "You're welcome! Is there anything else I can help you with?"
-    elif "langgraph" in content:
-        response = "LangGraph is a powerful framework for building AI applications with structured workflows. It's what makes me work!"
-    elif "langchain" in content:
-        response = "LangChain is a framework for developing applications powered by language models. It's a key technology behind agents like me."
-    elif "capability" in content or "do you do" in content or "can you" in content:
-        response = "I can help you manage your tasks with my to-do list functionality. I can add tasks, show your current tasks, and chat with you about productivity topics."
+    # Canned reply for the phrase that matches (see intent_router.py)
+    response = SMALL_TALK_REPLIES[SMALL_TALK_ROUTER.classify(content).intent]
     
     return {
         "messages": [AIMessage(content=response)],
@@ -0,0 +1,193 @@
+"""
+Declarative schema for the workflow payload (customer, task, vendor).
+
+WORKFLOW_SCHEMA lists each section's fields and their kinds. compile_schema
+turns a schema into a validator once: every field is resolved to a check
+function specialised for its kind and options, so validating a payload is
+one flat loop with no schema lookups. The bridges validate at the HTTP
+edge, so a bad request is rejected before any graph work; inside the graph
+workflow2 only checks presence (require_fields, raising the same
+ValueErrors as before) and runs the full validator when PAYLOAD_DEBUG is
+set.
+
+Field kinds:
+    str     a string (coercion turns numbers into strings; normalising strips it)
+    email   name@domain.tld (normalising only strips it: the address is the
+            conversation memory and routing key, so its case is kept)
+    phone   7 to 15 digits, optionally with +, spaces, dots, dashes and
+            parentheses (normalising keeps the digits and a leading +)
+    zip     5-digit ZIP or ZIP+4 (coercion pads integers: 2139 -> "02139";
+            normalising writes ZIP+4 as 12345-6789)
+
+    validate = compile_schema(WORKFLOW_SCHEMA, coerce=True, normalize=True)
+    payload, errors = validate(request_json)
+    valid, rejected = validate_batch(payloads, validate)
+
+Other keys (messages, memory, ...) are passed through unchanged.
+
+Environment:
+    PAYLOAD_DEBUG   when True, workflow2 also runs the full validator in the graph
+"""
+
+import os
+import re
+
+PAYLOAD_DEBUG = os.environ.get("PAYLOAD_DEBUG", "False").lower() == "true"
+
+WORKFLOW_SCHEMA = {
+    "customer": {"name": "str", "email": "email", "phoneNumber": "phone", "zipCode": "zip"},
+    "task": {"description": "str", "category": "str"},
+    "vendor": {"name": "str", "email": "email", "phoneNumber": "phone"},
+}
+
+_EMAIL = re.compile(r"[^@\s]+@[^@\s]+\.[^@\s.]+")
+_PHONE = re.compile(r"\+?[0-9 ().\-]+")
+_ZIP = re.compile(r"([0-9]{5})(?:-?([0-9]{4}))?")
+_NON_DIGITS = re.compile(r"[^0-9]")
+
+
+class SchemaError(ValueError):
+    """A payload that does not match the schema; str() is the first problem, .errors all of them"""
+
+    def __init__(self, errors):
+        super().__init__(errors[0])
+        self.errors = errors
+
+
+class _Invalid(Exception):
+    pass
+
+
+def _number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _string_check(coerce, normalize):
+    def check(value):
+        if type(value) is not str:
+            if not (coerce and _number(value)):
+                raise _Invalid("must be a string")
+            value = str(value)
+        return value.strip() if normalize else value
+    return check
+
+
+def _email_check(coerce, normalize):
+    def check(value):
+        if type(value) is not str:
+            raise _Invalid("must be a string")
+        address = value.strip()
+        if not _EMAIL.fullmatch(address):
+            raise _Invalid(f"not an email address: {value!r}")
+        return address if normalize else value
+    return check
+
+
+def _phone_check(coerce, normalize):
+    def check(value):
+        if type(value) is not str:
+            if not (coerce and isinstance(value, int) and not isinstance(value, bool)):
+                raise _Invalid("must be a string")
+            value = str(value)
+        number = value.strip()
+        digits = _NON_DIGITS.sub("", number)
+        if not _PHONE.fullmatch(number) or not 7 <= len(digits) <= 15:
+            raise _Invalid(f"not a phone number: {value!r}")
+        if normalize:
+            return ("+" if number.startswith("+") else "") + digits
+        return value
+    return check
+
+
+def _zip_check(coerce, normalize):
+    def check(value):
+        if type(value) is not str:
+            if not (coerce and isinstance(value, int) and not isinstance(value, bool) and 0 <= value < 100000):
+                raise _Invalid("must be a string")
+            # Integer ZIPs lose their leading zeros
+            value = f"{value:05d}"
+        match = _ZIP.fullmatch(value.strip())
+        if not match:
+            raise _Invalid(f"not a ZIP code: {value!r}")
+        if normalize:
+            return match.group(1) + (f"-{match.group(2)}" if match.group(2) else "")
+        return value
+    return check
+
+
+FIELD_CHECKS = {"str": _string_check, "email": _email_check, "phone": _phone_check, "zip": _zip_check}
+
+
+def compile_schema(schema, coerce=False, normalize=False, optional_sections=()):
+    """A validator for schema: validator(payload) -> (payload, errors)
+
+    The returned payload carries the coerced/normalised values (a copy; the
+    input is not modified) and errors is a list of messages, empty when the
+    payload is valid. Sections in optional_sections may be missing or empty.
+    """
+    plan = tuple(
+        (section, section in optional_sections,
+         tuple((field, FIELD_CHECKS[kind](coerce, normalize)) for field, kind in fields.items()))
+        for section, fields in schema.items()
+    )
+
+    def validate(payload):
+        if not isinstance(payload, dict):
+            return payload, ["Payload must be a JSON object"]
+        errors = []
+        cleaned = dict(payload)
+        for section, optional, fields in plan:
+            data = payload.get(section)
+            if data is None or (optional and not data):
+                if not optional:
+                    errors.append(f"Missing {section} data")
+                continue
+            if not isinstance(data, dict):
+                errors.append(f"{section} must be an object")
+                continue
+            values = dict(data)
+            for field, check in fields:
+                if field not in data:
+                    errors.append(f"Missing {field} in {section}")
+                    continue
+                try:
+                    values[field] = check(data[field])
+                except _Invalid as e:
+                    errors.append(f"Invalid {field} in {section}: {e}")
+            cleaned[section] = values
+        return cleaned, errors
+
+    validate.schema = schema
+    return validate
+
+
+def validate_batch(payloads, validator):
+    """Validate many payloads; returns ([(position, payload)] for the valid ones, {position: errors} for the rest)"""
+    valid, rejected = [], {}
+    for position, payload in enumerate(payloads):
+        cleaned, errors = validator(payload)
+        if errors:
+            rejected[position] = errors
+        else:
+            valid.append((position, cleaned))
+    return valid, rejected
+
+
+_REQUIRED = tuple((section, tuple(fields)) for section, fields in WORKFLOW_SCHEMA.items())
+_debug_validator = compile_schema(WORKFLOW_SCHEMA)
+
+
+def require_fields(state):
+    """In-graph presence check: raises ValueError for the first missing section or field.
+    With PAYLOAD_DEBUG the values are validated too (SchemaError, a ValueError)."""
+    for section, fields in _REQUIRED:
+        if section not in state:
+            raise ValueError(f"Missing {section} data")
+        data = state[section]
+        for field in fields:
+            if field not in data:
+                raise ValueError(f"Missing {field} in {section}")
+    if PAYLOAD_DEBUG:
+        _, errors = _debug_validator(state)
+        if errors:
+            raise SchemaError(errors)
@@ -0,0 +1,213 @@
+"""
+Persistent per-user todo lists for the 007 productivity agent.
+
+Each user's todos are an append-only JSONL log in TODO_STORE_DIR
+(<user>_todos.jsonl): one line per add, update or delete. The log is
+replayed into memory once per process and compacted when superseded lines
+outnumber live todos. In memory a TodoList keeps:
+- an id index (insertion ordered, so pages come out in creation order);
+- a status index (open/done), for paging and counting one status;
+- a min-heap of due dates for upcoming reminders. Completed or deleted
+  todos are dropped from the heap lazily, when they reach the top.
+
+Adding a todo is O(1) plus O(log n) with a due date, and a page costs its
+offset plus its size, no matter how many todos the user has.
+
+    todos = get_todo_list("ana@example.com")
+    todo = todos.add("Call the plumber", due="2025-05-01")
+    page, total = todos.page(status="open", offset=0, limit=10)
+    todos.upcoming(5)
+
+Environment:
+    TODO_STORE_DIR    directory for the todo logs (default ./agent/todos)
+"""
+
+import heapq
+import itertools
+import os
+import re
+import threading
+from datetime import datetime
+
+import json_codec
+
+TODO_STORE_DIR = os.environ.get("TODO_STORE_DIR", "./agent/todos")
+
+STATUSES = ("open", "done")
+
+_lists = {}
+_lists_lock = threading.Lock()
+
+
+def _safe_name(user_id):
+    return re.sub(r"[^A-Za-z0-9@._-]", "_", str(user_id)) or "anonymous"
+
+
+def _due_key(due):
+    if due is None:
+        return None
+    if isinstance(due, datetime):
+        return due.isoformat()
+    # Validates the string; ISO timestamps then sort correctly as text
+    return datetime.fromisoformat(str(due)).isoformat()
+
+
+class TodoList:
+    """One user's todos, with id, status and due-date indexes"""
+
+    def __init__(self, path):
+        self.path = path
+        self.items = {}
+        self.by_status = {status: {} for status in STATUSES}
+        self._due_heap = []
+        self._next_id = 1
+        self._log_lines = 0
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                for line in f:
+                    if line.strip():
+                        self._apply(json_codec.loads(line))
+                        self._log_lines += 1
+
+    @staticmethod
+    def _pending(todo):
+        """Open, with a due date and no reminder sent yet"""
+        return bool(todo.get("due")) and todo["status"] == "open" and not todo.get("reminded")
+
+    def _apply(self, entry):
+        op, todo_id = entry["op"], entry["id"]
+        if op == "add":
+            todo = {k: v for k, v in entry.items() if k != "op"}
+            self.items[todo_id] = todo
+            self.by_status[todo["status"]][todo_id] = None
+            if self._pending(todo):
+                heapq.heappush(self._due_heap, (todo["due"], todo_id))
+            self._next_id = max(self._next_id, todo_id + 1)
+        elif op == "update":
+            todo = self.items.get(todo_id)
+            if todo is None:
+                return
+            if "status" in entry and entry["status"] != todo["status"]:
+                del self.by_status[todo["status"]][todo_id]
+                self.by_status[entry["status"]][todo_id] = None
+            was_pending = self._pending(todo)
+            old_due = todo.get("due")
+            todo.update({k: v for k, v in entry.items() if k not in ("op", "id")})
+            # Reopened, rescheduled or reminder reset: (re)queue it
+            if self._pending(todo) and (not was_pending or todo["due"] != old_due):
+                heapq.heappush(self._due_heap, (todo["due"], todo_id))
+        elif op == "delete":
+            todo = self.items.pop(todo_id, None)
+            if todo is not None:
+                del self.by_status[todo["status"]][todo_id]
+
+    def _write(self, entry):
+        # Caller holds the lock
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.write(json_codec.dumpb(entry) + b"\n")
+        self._log_lines += 1
+        self._apply(entry)
+        if self._log_lines > 2 * len(self.items) + 100:
+            self._compact()
+
+    def _compact(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            for todo in self.items.values():
+                f.write(json_codec.dumpb({"op": "add", **todo}) + b"\n")
+        os.replace(tmp_path, self.path)
+        self._log_lines = len(self.items)
+        self._due_heap = [(todo["due"], todo_id) for todo_id, todo in self.items.items() if self._pending(todo)]
+        heapq.heapify(self._due_heap)
+
+    def add(self, task, due=None):
+        with self._lock:
+            entry = {"op": "add", "id": self._next_id, "task": task, "status": "open",
+                     "created_at": datetime.now().isoformat(), "due": _due_key(due)}
+            self._write(entry)
+            return self.items[entry["id"]]
+
+    def get(self, todo_id):
+        return self.items.get(todo_id)
+
+    def update(self, todo_id, **fields):
+        """Set status, task or due on a todo; returns it, or None if there is no such todo"""
+        if "status" in fields and fields["status"] not in STATUSES:
+            raise ValueError(f"Unknown todo status {fields['status']!r}")
+        if "due" in fields:
+            # A new due date gets a new reminder
+            fields["due"] = _due_key(fields["due"])
+            fields["reminded"] = False
+        with self._lock:
+            if todo_id not in self.items:
+                return None
+            self._write({"op": "update", "id": todo_id, **fields})
+            return self.items[todo_id]
+
+    def complete(self, todo_id):
+        return self.update(todo_id, status="done")
+
+    def remove(self, todo_id):
+        with self._lock:
+            if todo_id not in self.items:
+                return False
+            self._write({"op": "delete", "id": todo_id})
+            return True
+
+    def count(self, status=None):
+        return len(self.items) if status is None else len(self.by_status[status])
+
+    def page(self, status=None, offset=0, limit=10):
+        """(todos from offset, at most limit of them, total) in creation order"""
+        with self._lock:
+            ids = self.items if status is None else self.by_status[status]
+            todo_ids = list(itertools.islice(ids, offset, offset + limit))
+            return [self.items[todo_id] for todo_id in todo_ids], len(ids)
+
+    def _valid_due(self, entry):
+        due, todo_id = entry
+        todo = self.items.get(todo_id)
+        return todo is not None and todo.get("due") == due and self._pending(todo)
+
+    def upcoming(self, limit=5):
+        """Open todos with a due date and no reminder sent yet, soonest first"""
+        with self._lock:
+            # Drop completed, deleted and rescheduled entries from the top
+            heap = self._due_heap
+            while heap and not self._valid_due(heap[0]):
+                heapq.heappop(heap)
+            # Walk the heap from the root, smallest first: O(k log k) rather than O(n)
+            soonest, seen, frontier = [], set(), [(heap[0], 0)] if heap else []
+            while frontier and len(soonest) < limit:
+                entry, i = heapq.heappop(frontier)
+                # A todo reopened with the same due date can have two entries
+                if self._valid_due(entry) and entry[1] not in seen:
+                    seen.add(entry[1])
+                    soonest.append(self.items[entry[1]])
+                for child in (2 * i + 1, 2 * i + 2):
+                    if child < len(heap):
+                        heapq.heappush(frontier, (heap[child], child))
+            return soonest
+
+    def pop_due(self, now=None):
+        """Open todos due at or before now, each returned once (for sending reminders)"""
+        now = _due_key(now or datetime.now())
+        due = []
+        with self._lock:
+            while self._due_heap and self._due_heap[0][0] <= now:
+                entry = heapq.heappop(self._due_heap)
+                if self._valid_due(entry):
+                    self._write({"op": "update", "id": entry[1], "reminded": True})
+                    due.append(self.items[entry[1]])
+        return due
+
+
+def get_todo_list(user_id, store_dir=None):
+    """The shared TodoList for a user (loaded from disk once per process)"""
+    path = os.path.abspath(os.path.join(store_dir or TODO_STORE_DIR, f"{_safe_name(user_id)}_todos.jsonl"))
+    with _lists_lock:
+        if path not in _lists:
+            _lists[path] = TodoList(path)
+        return _lists[path]
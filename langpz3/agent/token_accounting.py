@@ -0,0 +1,195 @@
+"""
+Per-run token, latency and cost accounting for model calls.
+
+call_usage() turns one model call into a usage record. It uses the
+provider-reported token counts when the reply carries usage_metadata, and
+otherwise counts locally. Records add up with add_usage(), the reducer for
+workflow2's usage channel, so the run result carries totals for every call.
+The channel keeps summing across runs on a checkpointed thread;
+subtract_usage() gives one run's share.
+
+Local counts use tiktoken when it is installed, falling back to ~4
+characters per token otherwise. The encoder is loaded once per process;
+tiktoken keeps its BPE files in TIKTOKEN_CACHE_DIR. Counts are memoized per
+message text, so static system prompts and restored history messages are
+tokenized once, not on every run.
+
+Finished runs go into the process-wide ledger (and USAGE_LOG as JSONL when
+set), which aggregates them by customer and vendor:
+    ledger.snapshot(top=10) -> totals plus the most expensive customers/vendors
+
+Environment:
+    USAGE_LOG   append each run's usage to this JSONL file (default off)
+"""
+
+import os
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+import json_codec
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+USAGE_LOG = os.environ.get("USAGE_LOG", "")
+
+# USD per million tokens (input, output)
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+}
+
+# OpenAI chat format overhead: tokens per message and to prime the reply
+TOKENS_PER_MESSAGE = 3
+TOKENS_PER_REPLY = 3
+
+# Models whose encoder could not be loaded and are estimated instead
+_estimated_models = set()
+
+
+@lru_cache(maxsize=None)
+def _encoding(model_name):
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception as e:
+        # The BPE file could not be downloaded or read from the cache
+        print(f"Tokenizer unavailable for {model_name}, estimating counts: {str(e)}")
+        _estimated_models.add(model_name)
+        return None
+
+
+def tokenizer_name():
+    """"tiktoken", or "estimate" when counts fall back to characters / 4"""
+    return "tiktoken" if tiktoken is not None and not _estimated_models else "estimate"
+
+
+@lru_cache(maxsize=8192)
+def count_tokens(text, model_name="gpt-4o"):
+    """Tokens in text (memoized, so repeated prompts and history are counted once)"""
+    encoding = _encoding(model_name)
+    if encoding is None:
+        return max(1, len(text) // 4) if text else 0
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _text(content):
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+def count_message_tokens(messages, model_name="gpt-4o"):
+    """Prompt tokens for a prompt string or list of messages, including chat overhead"""
+    if isinstance(messages, str):
+        return count_tokens(messages, model_name) + TOKENS_PER_MESSAGE + TOKENS_PER_REPLY
+    total = TOKENS_PER_REPLY
+    for message in messages:
+        total += TOKENS_PER_MESSAGE + count_tokens(_text(message.content), model_name)
+    return total
+
+
+def call_cost(model_name, prompt_tokens, completion_tokens):
+    prices = MODEL_PRICES.get(model_name)
+    if prices is None:
+        return 0.0
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+def call_usage(model_name, prompt, reply, seconds):
+    """Usage record for one model call; prefers the provider's counts over local ones"""
+    model_name = (getattr(reply, "response_metadata", None) or {}).get("model_name") or model_name
+    reported = getattr(reply, "usage_metadata", None)
+    if reported:
+        prompt_tokens = reported.get("input_tokens", 0)
+        completion_tokens = reported.get("output_tokens", 0)
+    else:
+        prompt_tokens = count_message_tokens(prompt, model_name)
+        completion_tokens = count_tokens(_text(reply.content), model_name)
+    return {
+        "calls": 1,
+        "estimated_calls": 0 if reported else 1,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "latency_ms": round(seconds * 1000, 1),
+        "cost_usd": call_cost(model_name, prompt_tokens, completion_tokens),
+    }
+
+
+def add_usage(left, right):
+    """Reducer for usage channels: adds the counters of two records"""
+    if not left:
+        return dict(right or {})
+    if not right:
+        return dict(left)
+    merged = dict(left)
+    for key, value in right.items():
+        merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def subtract_usage(total, earlier):
+    """The usage added to a usage channel since it held earlier"""
+    if not earlier:
+        return dict(total or {})
+    return {key: value - earlier.get(key, 0) for key, value in (total or {}).items()}
+
+
+class UsageLedger:
+    """Process-wide usage totals, per customer and per vendor"""
+
+    def __init__(self, log_path=USAGE_LOG):
+        self.log_path = log_path
+        self.runs = 0
+        self.totals = {}
+        self.by_customer = defaultdict(dict)
+        self.by_vendor = defaultdict(dict)
+        self._lock = threading.Lock()
+
+    def record(self, usage, customer=None, vendor=None, log=True):
+        customer, vendor = customer or "unknown", vendor or "unknown"
+        run = add_usage(usage, {"runs": 1})
+        with self._lock:
+            self.runs += 1
+            self.totals = add_usage(self.totals, run)
+            self.by_customer[customer] = add_usage(self.by_customer[customer], run)
+            self.by_vendor[vendor] = add_usage(self.by_vendor[vendor], run)
+            if log and self.log_path:
+                with open(self.log_path, "ab") as f:
+                    f.write(json_codec.dumpb({"customer": customer, "vendor": vendor, **usage}) + b"\n")
+
+    def snapshot(self, top=10, key="cost_usd"):
+        """Totals plus the top customers and vendors by key (cost_usd or total_tokens)"""
+        def ranked(groups):
+            rows = sorted(groups.items(), key=lambda item: item[1].get(key, 0), reverse=True)[:top]
+            return [{"id": group_id, **usage} for group_id, usage in rows]
+
+        with self._lock:
+            return {
+                "runs": self.runs,
+                "tokenizer": tokenizer_name(),
+                "totals": dict(self.totals),
+                "by_customer": ranked(self.by_customer),
+                "by_vendor": ranked(self.by_vendor),
+            }
+
+    def load(self, path):
+        """Add the runs from a USAGE_LOG file, e.g. to aggregate several processes"""
+        with open(path, "rb") as f:
+            for line in f:
+                if line.strip():
+                    entry = json_codec.loads(line)
+                    customer, vendor = entry.pop("customer", None), entry.pop("vendor", None)
+                    self.record(entry, customer, vendor, log=False)
+
+
+ledger = UsageLedger()
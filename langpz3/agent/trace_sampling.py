@@ -0,0 +1,149 @@
+"""
+Tail-based sampling for LangSmith tracing.
+
+The workflows import traceable from here instead of langsmith. With the
+default TRACE_SAMPLE_RATE=1 it is langsmith's traceable and every run is
+exported as before. Below 1, a SamplingClient becomes the process-wide
+LangSmith client, used by @traceable and by LangGraph's callback tracer.
+Each trace then goes one of two ways:
+- Traces picked by the sample rate stream through as usual. The pick is
+  made once per trace, from its id.
+- All other traces are held in memory: the run dicts langsmith hands to the
+  client, which are not serialized yet. When the root run ends, the trace is
+  exported if it took at least TRACE_SLOW_MS or any span in it raised, and
+  is otherwise dropped without ever being serialized.
+
+Environment:
+    TRACE_SAMPLE_RATE    fraction of traces always exported (default 1 = all)
+    TRACE_SLOW_MS        traces at least this slow are always exported (default 5000)
+    TRACE_MAX_BUFFERED   held traces kept at once; beyond this the oldest is exported (default 1000)
+"""
+
+import os
+import threading
+import uuid
+from collections import Counter, OrderedDict
+
+from langsmith import Client
+from langsmith import run_helpers
+from langsmith.run_trees import configure
+
+TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE", "1"))
+TRACE_SLOW_MS = float(os.environ.get("TRACE_SLOW_MS", "5000"))
+TRACE_MAX_BUFFERED = int(os.environ.get("TRACE_MAX_BUFFERED", "1000"))
+
+_lock = threading.Lock()
+_client = None
+
+
+def _snapshot(values):
+    # Shallow copy, plus copies of list values such as the message history,
+    # which the reducer keeps appending to after the span has ended
+    if not values:
+        return values
+    return {k: v.copy() if isinstance(v, list) else v for k, v in values.items()}
+
+
+def head_sampled(trace_id, rate):
+    """Deterministic per-trace pick: the same trace id always gets the same answer"""
+    if rate >= 1:
+        return True
+    return uuid.UUID(str(trace_id)).int % 10000 < rate * 10000
+
+
+class _HeldTrace:
+    __slots__ = ("calls", "error")
+
+    def __init__(self):
+        self.calls = []
+        self.error = False
+
+
+class SamplingClient(Client):
+    """LangSmith client that exports sampled, slow and failed traces only"""
+
+    def __init__(self, sample_rate=TRACE_SAMPLE_RATE, slow_ms=TRACE_SLOW_MS, max_buffered=TRACE_MAX_BUFFERED, **kwargs):
+        super().__init__(**kwargs)
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.max_buffered = max_buffered
+        self.sampling_stats = Counter()
+        self._held = OrderedDict()
+        self._held_lock = threading.Lock()
+
+    def _hold(self, trace_id, call, root_created=False):
+        """Buffer a call for a held trace; returns (held, finished trace or None)"""
+        evicted = None
+        with self._held_lock:
+            trace = self._held.get(trace_id)
+            if trace is None:
+                if not root_created or head_sampled(trace_id, self.sample_rate):
+                    return False, None
+                trace = self._held[trace_id] = _HeldTrace()
+                if len(self._held) > self.max_buffered:
+                    # The longest-held trace is also the slowest so far, so export it
+                    _, evicted = self._held.popitem(last=False)
+            trace.calls.append(call)
+            if call[0] == "update":
+                trace.error = trace.error or bool(call[2].get("error"))
+                if str(call[1]) == trace_id:
+                    # The root run has ended: the trace is complete
+                    del self._held[trace_id]
+                    return True, trace
+        if evicted is not None:
+            self.sampling_stats["exported_evicted"] += 1
+            self._export(evicted)
+        return True, None
+
+    def _export(self, trace):
+        for call in trace.calls:
+            if call[0] == "create":
+                _, name, inputs, run_type, kwargs = call
+                Client.create_run(self, name, inputs, run_type, **kwargs)
+            else:
+                _, run_id, kwargs = call
+                Client.update_run(self, run_id, **kwargs)
+
+    def create_run(self, name, inputs, run_type, **kwargs):
+        run_id = kwargs.get("id")
+        trace_id = str(kwargs.get("trace_id") or run_id)
+        is_root = run_id is not None and str(run_id) == trace_id
+        held, _ = self._hold(trace_id, ("create", name, _snapshot(inputs), run_type, kwargs), root_created=is_root)
+        if not held:
+            if is_root:
+                self.sampling_stats["exported_sampled"] += 1
+            return super().create_run(name, inputs, run_type, **kwargs)
+
+    def update_run(self, run_id, **kwargs):
+        trace_id = str(kwargs.get("trace_id") or run_id)
+        held_kwargs = dict(kwargs, inputs=_snapshot(kwargs.get("inputs")), outputs=_snapshot(kwargs.get("outputs")))
+        held, finished = self._hold(trace_id, ("update", run_id, held_kwargs))
+        if not held:
+            return super().update_run(run_id, **kwargs)
+        if finished is None:
+            return
+        start, end = kwargs.get("start_time"), kwargs.get("end_time")
+        slow = start is not None and end is not None and (end - start).total_seconds() * 1000 >= self.slow_ms
+        if finished.error or slow:
+            self.sampling_stats["exported_error" if finished.error else "exported_slow"] += 1
+            self._export(finished)
+        else:
+            self.sampling_stats["dropped"] += 1
+
+
+def get_sampling_client():
+    """The process-wide SamplingClient, installed as langsmith's default client on first use"""
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = SamplingClient()
+                configure(client=_client)
+    return _client
+
+
+def traceable(*args, **kwargs):
+    """langsmith's traceable, routed through the sampling policy when it is active"""
+    if TRACE_SAMPLE_RATE < 1:
+        get_sampling_client()
+    return run_helpers.traceable(*args, **kwargs)
@@ -0,0 +1,257 @@
+"""
+Per-user retrieval memory for workflow2.
+
+Instead of replaying a customer's whole history on every run, each stored
+turn gets a hashed-feature embedding (the unigram/bigram hashing of
+local_sentiment.py, folded into VECTOR_MEMORY_DIM signed buckets and
+L2-normalised) and a run restores only the K turns most similar to the
+incoming message plus the last few. Per user, in the store directory
+(workflow2 uses its MEMORY_DIR):
+- <user>_turns.jsonl     one (type, content, id) record per turn, append-only
+- <user>_offsets.u64     byte offset of each record, so K turns are K seeks
+- <user>_vectors.f32     the embeddings, a raw float32 matrix opened with np.memmap
+- <user>_ivf.npz         inverted-file index, built once a user has more
+                         than EXACT_MAX_ROWS turns
+
+Up to EXACT_MAX_ROWS turns a search is one matrix-vector product over the
+memmap (exact top-k). Above that, rows are clustered with spherical k-means
+into about sqrt(n) lists and a search scores only the rows of the nprobe
+closest lists, plus any rows added since the index was built; the index is
+rebuilt when those outnumber the indexed rows. Opening a store reads no
+rows, so load time and prompt size stay bounded however long the history.
+
+    memory = get_vector_memory("ana@example.com", "./agent/memory")
+    memory.add(messages)                              # new, non-system turns
+    records = memory.recall("Can they start Monday?", k=4, recent=6)
+
+Environment:
+    VECTOR_MEMORY_DIM   embedding size, a power of two (default 256)
+"""
+
+import os
+import re
+import threading
+
+import numpy as np
+
+import json_codec
+from local_sentiment import BIAS_INDEX, featurize
+
+VECTOR_MEMORY_DIM = int(os.environ.get("VECTOR_MEMORY_DIM", "256"))
+
+EXACT_MAX_ROWS = 4096
+DEFAULT_NPROBE = 16
+KMEANS_ITERATIONS = 10
+KMEANS_SAMPLE = 20_000
+MIN_LISTS, MAX_LISTS = 16, 1024
+_ASSIGN_CHUNK = 65_536
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def _safe_name(user_id):
+    return re.sub(r"[^A-Za-z0-9@._-]", "_", str(user_id)) or "anonymous"
+
+
+def _text(content):
+    """Searchable text of a message's content (plain or a list of parts)"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return " ".join(part if isinstance(part, str) else str(part.get("text", "")) for part in content
+                        if isinstance(part, (str, dict)))
+    return str(content)
+
+
+def embed(texts, dim=VECTOR_MEMORY_DIM):
+    """Unit-length float32 embeddings, one row per text (all zero for a text with no words)"""
+    vectors = np.zeros((len(texts), dim), dtype=np.float32)
+    if not texts:
+        return vectors
+    indices, rows = featurize(list(texts))
+    features = indices != BIAS_INDEX
+    indices, rows = indices[features], rows[features]
+    # Low bits pick the bucket, the next bit the sign, so collisions tend to cancel
+    signs = np.where((indices // dim) & 1, -1.0, 1.0).astype(np.float32)
+    np.add.at(vectors, (rows, indices % dim), signs)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def _top(scores, k):
+    """Positions of the k highest positive scores, best first"""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    best = np.argpartition(-scores, k - 1)[:k]
+    best = best[np.argsort(-scores[best], kind="stable")]
+    return best[scores[best] > 0]
+
+
+class IVFIndex:
+    """Inverted lists over the first `rows` embeddings: rows of list l are order[starts[l]:starts[l + 1]]"""
+
+    def __init__(self, centroids, order, starts, rows):
+        self.centroids = centroids
+        self.order = order
+        self.starts = starts
+        self.rows = rows
+
+    @classmethod
+    def train(cls, vectors, seed=0):
+        """Spherical k-means on a sample of vectors, then every row assigned to its closest centroid"""
+        n = len(vectors)
+        n_lists = int(min(MAX_LISTS, max(MIN_LISTS, np.sqrt(n))))
+        rng = np.random.default_rng(seed)
+        sample = np.asarray(vectors[np.sort(rng.choice(n, size=min(n, KMEANS_SAMPLE), replace=False))])
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)].copy()
+        for _ in range(KMEANS_ITERATIONS):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            members = np.zeros((n_lists, len(sample)), dtype=np.float32)
+            members[assignment, np.arange(len(sample))] = 1
+            sums = members @ sample
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            # An emptied list keeps its old centroid
+            centroids = np.where(norms > 0, sums / np.maximum(norms, 1e-12), centroids).astype(np.float32)
+        assignment = np.concatenate([np.argmax(np.asarray(vectors[i:i + _ASSIGN_CHUNK]) @ centroids.T, axis=1)
+                                     for i in range(0, n, _ASSIGN_CHUNK)])
+        order = np.argsort(assignment, kind="stable")
+        starts = np.searchsorted(assignment[order], np.arange(n_lists + 1))
+        return cls(centroids, order, starts, n)
+
+    def candidates(self, query, nprobe):
+        """Rows in the nprobe lists whose centroids are closest to query"""
+        probe = _top(self.centroids @ query, nprobe)
+        if len(probe) == 0:
+            probe = np.arange(min(nprobe, len(self.centroids)))
+        return np.concatenate([self.order[self.starts[l]:self.starts[l + 1]] for l in probe])
+
+    def save(self, path):
+        with open(path + ".tmp", "wb") as f:
+            np.savez(f, centroids=self.centroids, order=self.order, starts=self.starts, rows=self.rows)
+        os.replace(path + ".tmp", path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["centroids"], data["order"], data["starts"], int(data["rows"]))
+
+
+class VectorMemory:
+    """One user's stored turns, their embeddings and (for long histories) an IVF index"""
+
+    def __init__(self, prefix, dim=VECTOR_MEMORY_DIM, exact_max_rows=EXACT_MAX_ROWS, nprobe=DEFAULT_NPROBE):
+        self.prefix = prefix
+        self.dim = dim
+        self.exact_max_rows = exact_max_rows
+        self.nprobe = nprobe
+        self.turns_path = prefix + "_turns.jsonl"
+        self.offsets_path = prefix + "_offsets.u64"
+        self.vectors_path = prefix + "_vectors.f32"
+        self.index_path = prefix + "_ivf.npz"
+        self._lock = threading.Lock()
+        self._vectors = None
+        self._index = None
+        # Ids recalled or added in this process; add() skips them so a
+        # restored turn is not stored twice
+        self._known_ids = set()
+        directory = os.path.dirname(prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        # The offsets file is written last, so it counts complete turns only
+        try:
+            return os.path.getsize(self.offsets_path) // 8
+        except OSError:
+            return 0
+
+    def vectors(self):
+        """The embeddings as a read-only (n, dim) memmap"""
+        n = len(self)
+        if self._vectors is None or len(self._vectors) != n:
+            self._vectors = (np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(n, self.dim))
+                             if n else np.zeros((0, self.dim), dtype=np.float32))
+        return self._vectors
+
+    def add(self, messages):
+        """Store the human and AI turns not stored yet; returns how many were added"""
+        records = [(message.type, message.content, message.id) for message in messages
+                   if message.type in ("human", "ai") and message.id not in self._known_ids]
+        if not records:
+            return 0
+        lines = [json_codec.dumpb(list(record)) + b"\n" for record in records]
+        vectors = embed([_text(record[1]) for record in records], self.dim)
+        with self._lock:
+            with open(self.turns_path, "ab") as f:
+                start = f.tell()
+                f.write(b"".join(lines))
+            offsets = start + np.cumsum([0] + [len(line) for line in lines[:-1]], dtype=np.uint64)
+            # Vector rows past len() are overwritten if a previous add was cut short
+            with open(self.vectors_path, "ab") as f:
+                f.truncate(len(self) * self.dim * 4)
+                f.write(vectors.tobytes())
+            with open(self.offsets_path, "ab") as f:
+                f.write(offsets.astype(np.uint64).tobytes())
+        self._known_ids.update(record[2] for record in records)
+        return len(records)
+
+    def turns(self, rows):
+        """(type, content, id) records for the given rows, in the order given"""
+        if not len(rows):
+            return []
+        offsets = np.memmap(self.offsets_path, dtype=np.uint64, mode="r")
+        records = []
+        with open(self.turns_path, "rb") as f:
+            for row in rows:
+                f.seek(int(offsets[row]))
+                records.append(tuple(json_codec.loads(f.readline())))
+        return records
+
+    def _current_index(self, n):
+        if self._index is None and os.path.exists(self.index_path):
+            try:
+                self._index = IVFIndex.load(self.index_path)
+            except Exception as e:
+                # Truncated or corrupt: drop it; it is rebuilt from the vectors below
+                print(f"Error loading vector index {self.index_path}, rebuilding it: {str(e)}")
+                os.remove(self.index_path)
+        # Rebuilt once the unindexed tail outgrows the indexed rows
+        if self._index is None or self._index.rows > n or n - self._index.rows > self._index.rows:
+            self._index = IVFIndex.train(self.vectors())
+            self._index.save(self.index_path)
+        return self._index
+
+    def search(self, query, k):
+        """Rows of the k stored turns most similar to query (cosine), best first"""
+        n = len(self)
+        if n == 0 or k <= 0 or not query:
+            return []
+        q = embed([query], self.dim)[0]
+        vectors = self.vectors()
+        if n <= self.exact_max_rows:
+            return _top(np.asarray(vectors) @ q, k).tolist()
+        index = self._current_index(n)
+        candidates = np.concatenate([index.candidates(q, self.nprobe), np.arange(index.rows, n)])
+        candidates.sort()  # sequential reads from the memmap
+        return candidates[_top(np.asarray(vectors[candidates]) @ q, k)].tolist()
+
+    def recall(self, query, k=4, recent=6):
+        """The k turns most relevant to query plus the last `recent`, in conversation order"""
+        n = len(self)
+        rows = set(range(max(0, n - recent), n))
+        relevant = [row for row in self.search(query, k + len(rows)) if row not in rows][:k]
+        records = self.turns(sorted(rows.union(relevant)))
+        self._known_ids.update(record[2] for record in records)
+        return records
+
+
+def get_vector_memory(user_id, store_dir):
+    """The shared VectorMemory for a user in store_dir (one per process)"""
+    prefix = os.path.abspath(os.path.join(store_dir, _safe_name(user_id)))
+    with _stores_lock:
+        if prefix not in _stores:
+            _stores[prefix] = VectorMemory(prefix)
+        return _stores[prefix]
@@ -0,0 +1,192 @@
+"""
+Vendor matching for workflow2: pick vendors for a task category near a customer.
+
+Vendors are loaded once into a VendorIndex:
+- one bucket per category (lowercased), holding that category's vendors as
+  NumPy arrays sorted by 3-digit zip prefix, with the start of each prefix,
+  so the vendors of any set of prefixes are a few array slices;
+- a 1000 x 1000 zip3 distance matrix and, per prefix, every prefix ordered
+  by distance. Distances are haversine miles between prefix centroids when
+  VENDOR_ZIP_CENTROIDS is given (CSV: zip3,lat,lon), otherwise an
+  approximation from how far apart the prefixes are numerically (ZIP
+  prefixes are assigned roughly geographically).
+
+A match walks outward through the closest prefixes until it has at least
+`candidates` vendors, gathers them with one vectorized index, scores them
+    score = rating_weight * rating / 5 - distance_weight * min(distance, max_distance) / max_distance
+and returns the top k. The ranked candidates depend only on the category
+and the customer's prefix, so they are kept per (category, prefix) and a
+repeat lookup is a slice.
+
+    index = VendorIndex.load("vendors.json")
+    index.match("Plumbing", "94105", k=3)  -> [{"vendor": {...}, "score": 0.93, "distance": 4.1}, ...]
+
+Vendor records are the workflow's vendor dicts (name, email, phoneNumber)
+plus category (or a categories list), zipCode and an optional rating (0-5).
+
+Environment:
+    VENDORS_FILE            JSON list or JSONL file of vendors; workflow2 fills a
+                            missing vendor from it (unset: no matching)
+    VENDOR_ZIP_CENTROIDS    optional zip3,lat,lon CSV for real distances
+"""
+
+import csv
+import os
+import threading
+
+import numpy as np
+
+import json_codec
+
+VENDORS_FILE = os.environ.get("VENDORS_FILE", "")
+VENDOR_ZIP_CENTROIDS = os.environ.get("VENDOR_ZIP_CENTROIDS", "")
+
+N_PREFIXES = 1000
+DEFAULT_RATING = 3.0
+# Without centroids, neighbouring prefixes are taken to be about this far apart
+PROXY_MILES_PER_PREFIX = 25.0
+UNKNOWN_DISTANCE = 5000.0
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def zip3(zip_code):
+    """The 3-digit prefix of a ZIP code as an int, or None"""
+    digits = str(zip_code or "").strip()[:3]
+    return int(digits) if len(digits) == 3 and digits.isdigit() else None
+
+
+def _categories(vendor):
+    categories = vendor.get("categories") or [vendor.get("category")]
+    return {str(category).strip().lower() for category in categories if category}
+
+
+def zip3_distances(centroids_path=None):
+    """N_PREFIXES x N_PREFIXES float32 distances in (approximate) miles"""
+    prefixes = np.arange(N_PREFIXES)
+    if not centroids_path:
+        return (np.abs(prefixes[:, None] - prefixes[None, :]) * PROXY_MILES_PER_PREFIX).astype(np.float32)
+    lat = np.full(N_PREFIXES, np.nan)
+    lon = np.full(N_PREFIXES, np.nan)
+    with open(centroids_path, newline="") as f:
+        for row in csv.reader(f):
+            prefix = zip3(row[0]) if row else None
+            if prefix is not None:
+                lat[prefix], lon[prefix] = float(row[1]), float(row[2])
+    lat, lon = np.radians(lat), np.radians(lon)
+    a = (np.sin((lat[:, None] - lat[None, :]) / 2) ** 2
+         + np.cos(lat[:, None]) * np.cos(lat[None, :]) * np.sin((lon[:, None] - lon[None, :]) / 2) ** 2)
+    distances = 2 * 3958.8 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    # Prefixes without a centroid are only close to themselves
+    distances = np.where(np.isnan(distances), UNKNOWN_DISTANCE, distances)
+    np.fill_diagonal(distances, 0)
+    return distances.astype(np.float32)
+
+
+class _CategoryBucket:
+    """One category's vendors, sorted by zip prefix"""
+
+    def __init__(self, vendor_ids, prefixes, ratings):
+        order = np.argsort(prefixes, kind="stable")
+        self.vendor_ids = vendor_ids[order]
+        self.prefixes = prefixes[order]
+        self.ratings = ratings[order]
+        self.starts = np.searchsorted(self.prefixes, np.arange(N_PREFIXES + 1)).astype(np.int64)
+        self.counts = np.diff(self.starts)
+        self.ranked = {}  # customer prefix -> nearest vendors, ranked (at most N_PREFIXES entries)
+
+
+class VendorIndex:
+    """Vendors by category and zip prefix, with precomputed prefix distances"""
+
+    def __init__(self, vendors, distances=None, rating_weight=1.0, distance_weight=1.0, max_distance=100.0,
+                 candidates=200):
+        self.vendors = []
+        self.distances = zip3_distances() if distances is None else distances
+        # Prefixes ordered nearest first, for every customer prefix
+        self.nearest = np.argsort(self.distances, axis=1, kind="stable").astype(np.int16)
+        self.rating_weight = rating_weight
+        self.distance_weight = distance_weight
+        self.max_distance = max_distance
+        self.n_candidates = candidates
+
+        by_category = {}
+        skipped = 0
+        for vendor in vendors:
+            prefix = zip3(vendor.get("zipCode"))
+            categories = _categories(vendor)
+            if prefix is None or not categories or vendor.get("active", True) is False:
+                skipped += 1
+                continue
+            vendor_id = len(self.vendors)
+            self.vendors.append(vendor)
+            rating = vendor.get("rating")
+            for category in categories:
+                by_category.setdefault(category, []).append(
+                    (vendor_id, prefix, DEFAULT_RATING if rating is None else float(rating)))
+        if skipped:
+            print(f"Vendor index skipped {skipped} vendors without a category or valid zipCode")
+        self.buckets = {}
+        for category, rows in by_category.items():
+            ids, prefixes, ratings = zip(*rows)
+            self.buckets[category] = _CategoryBucket(np.array(ids, dtype=np.int32), np.array(prefixes, dtype=np.int16),
+                                                     np.array(ratings, dtype=np.float32))
+
+    @classmethod
+    def load(cls, path, centroids_path=None, **kwargs):
+        """Index the vendors in a JSON list or JSONL file"""
+        with open(path, "rb") as f:
+            data = f.read()
+        if data.lstrip()[:1] == b"[":
+            vendors = json_codec.loads(data)
+        else:
+            vendors = [json_codec.loads(line) for line in data.splitlines() if line.strip()]
+        return cls(vendors, distances=zip3_distances(centroids_path), **kwargs)
+
+    def categories(self):
+        return sorted(self.buckets)
+
+    def _ranked(self, bucket, prefix):
+        """The vendors in the prefixes closest to prefix (at least `candidates` of them), best score first,
+        as (positions in bucket, scores, distances)"""
+        ranked = bucket.ranked.get(prefix)
+        if ranked is None:
+            nearest = self.nearest[prefix]
+            counts = bucket.counts[nearest]
+            total = np.cumsum(counts)
+            reach = int(np.searchsorted(total, min(self.n_candidates, int(total[-1])))) + 1
+            chosen = nearest[:reach][counts[:reach] > 0]
+            lengths = bucket.counts[chosen]
+            # Concatenated slices starts[p]:starts[p] + counts[p], without a Python loop
+            offsets = np.repeat(bucket.starts[chosen] - (np.cumsum(lengths) - lengths), lengths)
+            positions = offsets + np.arange(len(offsets))
+            distances = self.distances[prefix, bucket.prefixes[positions]]
+            scores = (self.rating_weight / 5) * bucket.ratings[positions] \
+                - (self.distance_weight / self.max_distance) * np.minimum(distances, self.max_distance)
+            order = np.argsort(-scores, kind="stable")
+            ranked = (positions[order], scores[order], distances[order])
+            bucket.ranked[prefix] = ranked
+        return ranked
+
+    def match(self, category, zip_code, k=1):
+        """The k best vendors for category near zip_code, best first"""
+        bucket = self.buckets.get(str(category or "").strip().lower())
+        prefix = zip3(zip_code)
+        if bucket is None or prefix is None or k <= 0:
+            return []
+        positions, scores, distances = self._ranked(bucket, prefix)
+        return [{"vendor": self.vendors[vendor_id], "score": round(score, 4), "distance": round(distance, 1)}
+                for vendor_id, score, distance in zip(bucket.vendor_ids[positions[:k]].tolist(), scores[:k].tolist(),
+                                                      distances[:k].tolist())]
+
+
+def get_vendor_index():
+    """The VendorIndex for VENDORS_FILE, loaded once; None when no vendor file is configured"""
+    global _index
+    if _index is None and VENDORS_FILE:
+        with _index_lock:
+            if _index is None:
+                _index = VendorIndex.load(VENDORS_FILE, centroids_path=VENDOR_ZIP_CENTROIDS or None)
+                print(f"Loaded {len(_index.vendors)} vendors in {len(_index.buckets)} categories from {VENDORS_FILE}")
+    return _index
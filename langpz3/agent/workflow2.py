@@ -2,15 +2,27 @@
 from typing import TypedDict, Dict, Any, List, Annotated
 from langgraph.graph import StateGraph, END
 import os
-from langsmith.run_helpers import traceable
 import json
 import random
 from datetime import datetime
 from langchain_core.messages import BaseMessage, SystemMessage, HumanMessage, AIMessage
-from langgraph.graph import add_messages
 from functools import lru_cache
 import sys
 import pickle
+import time
+
+# Make sibling modules importable when the graph is loaded by file path (langgraph dev)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from model_registry import MODEL_ALIASES, get_chat_model
+import json_codec
+from message_log import MessageLog, MessageLogChannel, last_message, to_records
+from graph_fusion import compile_graph
+from trace_sampling import traceable
+from hedging import hedged_model
+from token_accounting import add_usage, call_usage, count_message_tokens, ledger, subtract_usage
+from vector_memory import get_vector_memory
+from vendor_matching import get_vendor_index
+from payload_schema import require_fields
 
 # Safe environment variable handling
 try:
@@ -22,6 +34,17 @@ except ImportError:
 # Set default values for environment variables
 MOCK_USER_RESPONSES = os.environ.get("MOCK_USER_RESPONSES", "False").lower() == "true"
 MOCK_SENTIMENT_ANALYSIS = os.environ.get("MOCK_SENTIMENT_ANALYSIS", "False").lower() == "true"
+# Optional local classifier tried before the LLM (see local_sentiment.py)
+LOCAL_SENTIMENT_MODEL = os.environ.get("LOCAL_SENTIMENT_MODEL", "")
+LOCAL_SENTIMENT_THRESHOLD = float(os.environ.get("LOCAL_SENTIMENT_THRESHOLD", "0.8"))
+# Run each linear chain of nodes as one graph step (see graph_fusion.py)
+FUSE_LINEAR_CHAINS = os.environ.get("FUSE_LINEAR_CHAINS", "False").lower() == "true"
+# Send a backup sentiment request when the first is slower than p95 (see hedging.py)
+SENTIMENT_HEDGING = os.environ.get("SENTIMENT_HEDGING", "False").lower() == "true"
+# Restore only relevant and recent turns instead of the whole history (see vector_memory.py)
+VECTOR_MEMORY = os.environ.get("VECTOR_MEMORY", "False").lower() == "true"
+MEMORY_TOP_K = int(os.environ.get("MEMORY_TOP_K", "4"))
+MEMORY_RECENT = int(os.environ.get("MEMORY_RECENT", "6"))
 
 # Define mock user responses
 POSITIVE_RESPONSES = [
@@ -36,36 +59,61 @@ NEGATIVE_RESPONSES = [
     "I have some concerns about the timeline. Can they start next month instead?"
 ]
 
+# Replies sent by process_sentiment, keyed by sentiment
+SENTIMENT_REPLIES = {
+    "positive": "Wonderful, talk to you soon.",
+    "negative": "I understand you have some concerns. Could you please tell me more about them?",
+    "sentiment-loop": "I'm having trouble understanding your sentiment. Let me escalate this to our support team.",
+    "unknown": "Thank you for your response. Is there anything else you'd like to know about this task?"
+}
+
 # Enhanced State Definition
 class WorkflowState(TypedDict):
     customer: dict
     task: dict
     vendor: dict
     summary: str  # Added during processing
-    messages: Annotated[List[BaseMessage], add_messages]  # For conversation tracking
+    messages: Annotated[List[BaseMessage], MessageLogChannel()]  # For conversation tracking
     sentiment: str  # For tracking customer sentiment
     reason: str  # For storing sentiment reason
     current_step: str  # For tracking workflow progress
     sentiment_attempts: int  # For tracking sentiment analysis attempts
+    usage: Annotated[dict, add_usage]  # Tokens, latency and cost of the thread's model calls
+    usage_start: dict  # usage when this run started; the channel keeps summing across runs on a thread
+    context_tokens: int  # Size of the conversation the next run restores
 
 # Initialize Models with error handling
-@lru_cache(maxsize=4)
-def _get_model(model_name: str, system_prompt: str = None):
+def _get_model(model_name: str):
+    """Shared model client from the registry; system prompts are passed per call"""
     try:
-        if model_name == "openai":
-            model = ChatOpenAI(temperature=0, model_name="gpt-4o")
-        else:
-            raise ValueError(f"Unsupported model type: {model_name}")
-        
-        if system_prompt:
-            model = model.bind(system_message=system_prompt)
-        
-        return model
+        return get_chat_model(model_name)
     except Exception as e:
         print(f"Error initializing model: {str(e)}")
         # Return a mock model if initialization fails
         return None
 
+@lru_cache(maxsize=1)
+def _get_local_sentiment_model():
+    if not LOCAL_SENTIMENT_MODEL:
+        return None
+    try:
+        from local_sentiment import LocalSentimentModel
+        return LocalSentimentModel.load(LOCAL_SENTIMENT_MODEL)
+    except Exception as e:
+        print(f"Error loading local sentiment model: {str(e)}")
+        return None
+
+def _classify_locally(text):
+    """Return (sentiment, reason) from the local model, or None to escalate to the LLM"""
+    model = _get_local_sentiment_model()
+    if model is None:
+        return None
+    sentiment, confidence = model.classify(text)
+    if confidence < LOCAL_SENTIMENT_THRESHOLD:
+        print(f"Local sentiment {sentiment} below threshold ({confidence:.2f}), escalating to LLM")
+        return None
+    return sentiment, f"classified locally (confidence {confidence:.2f})"
+
 # Added file-based conversational memory utilities
 MEMORY_DIR = "./agent/memory"
 
@@ -77,6 +125,8 @@ def load_conversation_memory(user_id):
     path = get_memory_path(user_id)
     if os.path.exists(path):
         with open(path, "rb") as f:
+            # Compact (type, content, id) records, kept compact by the messages
+            # channel; older files hold message objects
             return pickle.load(f)
     return []
 
@@ -84,42 +134,94 @@ def save_conversation_memory(user_id, messages):
     path = get_memory_path(user_id)
     os.makedirs(os.path.dirname(path), exist_ok=True)
     with open(path, "wb") as f:
-        pickle.dump(messages, f)
+        pickle.dump(to_records(messages), f)
+
+def _memory_query(state):
+    """What the stored turns are ranked against: the incoming reply, else the task"""
+    message = last_message(state.get("messages") or [], "human")
+    if message is not None:
+        return message.content if isinstance(message.content, str) else str(message.content)
+    task = state.get("task", {})
+    return f"{task.get('category', '')} {task.get('description', '')}"
+
+def restore_conversation_memory(user_id, state):
+    """The stored turns a run starts with: the whole history, or with
+    VECTOR_MEMORY the MEMORY_TOP_K most relevant plus the last MEMORY_RECENT"""
+    if not VECTOR_MEMORY:
+        return load_conversation_memory(user_id)
+    memory = get_vector_memory(user_id, MEMORY_DIR)
+    if not len(memory) and os.path.exists(get_memory_path(user_id)):
+        # First run with the vector store: index the pickled history once
+        memory.add(MessageLog(load_conversation_memory(user_id)).records())
+    return memory.recall(_memory_query(state), k=MEMORY_TOP_K, recent=MEMORY_RECENT)
+
+def store_conversation_memory(user_id, messages):
+    """Save the run's history; the vector store only appends the turns it has not seen"""
+    if VECTOR_MEMORY:
+        get_vector_memory(user_id, MEMORY_DIR).add(messages)
+    else:
+        save_conversation_memory(user_id, messages)
 
 # Node Implementations
-@traceable(project_name="prizm-workflow-2")
-def validate_input(state: WorkflowState):
-    required_fields = {
-        "customer": ["name", "email", "phoneNumber", "zipCode"],
-        "task": ["description", "category"],
-        "vendor": ["name", "email", "phoneNumber"]
-    }
+def _match_vendor(state):
+    """Best vendor for the task's category near the customer, or None"""
+    index = get_vendor_index()
+    if index is None:
+        return None
+    matches = index.match(state.get("task", {}).get("category"), state.get("customer", {}).get("zipCode"), k=1)
+    if not matches:
+        print("No vendor found for this task")
+        return None
+    print(f"Matched vendor {matches[0]['vendor'].get('name')} (score {matches[0]['score']}, {matches[0]['distance']} mi)")
+    return matches[0]["vendor"]
+
+def _validate_and_initialize(state):
+    """Check the required input fields; returns the tracking fields to initialize"""
+    # Initialize workflow tracking fields if not present
+    updates = {}
     
-    for section, fields in required_fields.items():
-        if section not in state:
-            raise ValueError(f"Missing {section} data")
-        for field in fields:
-            if field not in state[section]:
-                raise ValueError(f"Missing {field} in {section}")
+    # Fill a missing vendor from the vendor directory (VENDORS_FILE)
+    if not state.get("vendor"):
+        vendor = _match_vendor(state)
+        if vendor:
+            state = {**state, "vendor": vendor}
+            updates["vendor"] = vendor
+    
+    # Presence only; the bridges validate values at the edge (full check with PAYLOAD_DEBUG)
+    require_fields(state)
     
-    # Initialize workflow tracking fields if not present
     if "current_step" not in state:
-        state["current_step"] = "initialize_state"
-    if "messages" not in state:
-        state["messages"] = []
+        updates["current_step"] = "initialize_state"
     if "sentiment" not in state:
-        state["sentiment"] = ""
+        updates["sentiment"] = ""
     if "reason" not in state:
-        state["reason"] = ""
+        updates["reason"] = ""
     if "sentiment_attempts" not in state:
-        state["sentiment_attempts"] = 0
+        updates["sentiment_attempts"] = 0
+    updates["usage_start"] = dict(state.get("usage") or {})
+    return updates
+
+@traceable(project_name="prizm-workflow-2")
+def validate_input(state: WorkflowState):
+    updates = _validate_and_initialize(state)
     
-    # Load conversation memory if available
+    # Load conversation memory if available; the reducer appends it to the history
     user_id = state["customer"].get("email")
     if user_id:
-        state["messages"] = load_conversation_memory(user_id)
+        updates["messages"] = restore_conversation_memory(user_id, state)
     
-    return state
+    return updates
+
+@traceable(project_name="prizm-workflow-2")
+def validate_request(state: WorkflowState):
+    """Validation only; parallel_app loads memory in its own branch"""
+    return _validate_and_initialize(state)
+
+@traceable(project_name="prizm-workflow-2")
+def load_memory(state: WorkflowState):
+    """Restore the customer's stored conversation (parallel_app branch)"""
+    user_id = state["customer"].get("email")
+    return {"messages": restore_conversation_memory(user_id, state) if user_id else []}
 
 @traceable(project_name="prizm-workflow-2")
 def initialize_state(state: WorkflowState):
@@ -129,9 +231,8 @@ def initialize_state(state: WorkflowState):
         "current_step": "initial_prompt"
     }
 
-@traceable(project_name="prizm-workflow-2")
-def generate_initial_prompt(state: WorkflowState):
-    """Generate the initial prompt for customer interaction"""
+def _initial_messages(state):
+    """System prompt and greeting for the start of an interaction"""
     customer = state["customer"]
     task = state["task"]
     vendor = state["vendor"]
@@ -144,21 +245,29 @@ def generate_initial_prompt(state: WorkflowState):
 Generate a follow-up message based on the customer's response.
 Be friendly and professional.
 
-Customer details: {json.dumps(customer, indent=2)}
-Task details: {json.dumps(task, indent=2)}
-Vendor details: {json.dumps(vendor, indent=2)}"""
+Customer details: {json_codec.dumps(customer)}
+Task details: {json_codec.dumps(task)}
+Vendor details: {json_codec.dumps(vendor)}"""
     
     # Add the messages
-    messages = [
+    return [
         SystemMessage(content=system_prompt),
         AIMessage(content=greeting)
     ]
-    
+
+@traceable(project_name="prizm-workflow-2")
+def generate_initial_prompt(state: WorkflowState):
+    """Generate the initial prompt for customer interaction"""
     return {
-        "messages": messages,
+        "messages": _initial_messages(state),
         "current_step": "analyze_sentiment"
     }
 
+@traceable(project_name="prizm-workflow-2")
+def build_prompt(state: WorkflowState):
+    """generate_initial_prompt for parallel_app; analyze_sentiment sets current_step there"""
+    return {"messages": _initial_messages(state)}
+
 @traceable(project_name="prizm-workflow-2")
 def analyze_sentiment(state: WorkflowState):
     """Analyze customer sentiment from conversation"""
@@ -169,12 +278,17 @@ def analyze_sentiment(state: WorkflowState):
     print(f"Starting analyze_sentiment with sentiment={current_sentiment}, reason={current_reason}")
 
     messages = state.get("messages", [])
+    usage = None  # Set when the LLM is called
     sentiment_attempts = state.get("sentiment_attempts", 0) + 1
     
     print(f"Found {len(messages)} messages at start")
     
-    # STEP 1: Add mock user response if needed
-    if MOCK_USER_RESPONSES and all(not isinstance(m, HumanMessage) for m in messages):
+    # STEP 1: Find the latest human message (scanning back from the end)
+    last_human_message = last_message(messages, "human")
+    
+    # STEP 2: Add mock user response if needed; only new messages are returned
+    new_messages = []
+    if MOCK_USER_RESPONSES and last_human_message is None:
         # Choose random response type (positive/negative)
         is_positive = random.choice([True, False])
         
@@ -186,21 +300,13 @@ def analyze_sentiment(state: WorkflowState):
             print(f"\nAdding mock NEGATIVE response: '{response}'")
         
         # Add the response to messages
-        messages = messages + [HumanMessage(content=response)]
-        print(f"Added mock user response, now have {len(messages)} messages")
-    
-    # STEP 2: Find the human message
-    last_human_message = None
-    for message in reversed(messages):
-        if isinstance(message, HumanMessage):
-            last_human_message = message
-            break
+        last_human_message = HumanMessage(content=response)
+        new_messages.append(last_human_message)
+        print(f"Added mock user response, now have {len(messages) + 1} messages")
     
     if not last_human_message:
         print("No human messages found even after trying to add one!")
         return {
-            **state,
-            "messages": messages,
             "sentiment": "unknown",
             "reason": "no human message found"
         }
@@ -212,6 +318,8 @@ def analyze_sentiment(state: WorkflowState):
     reason = ""
     
     try:
+        local_result = None if MOCK_SENTIMENT_ANALYSIS else _classify_locally(last_human_message.content)
+
         if MOCK_SENTIMENT_ANALYSIS:
             # Use rule-based analysis when mocking
             text = last_human_message.content.lower()
@@ -244,12 +352,17 @@ def analyze_sentiment(state: WorkflowState):
                 sentiment = "unknown"
                 reason = "no clear sentiment indicators"
                 print("Unknown sentiment")
+        elif local_result:
+            sentiment, reason = local_result
+            print(f"Local model detected sentiment: {sentiment}, reason: {reason}")
         else:
             # Use LLM for sentiment analysis
             print("Using LLM for sentiment analysis...")
             model = _get_model("openai")
             if model is None:
                 raise ValueError("Failed to initialize LLM")
+            if SENTIMENT_HEDGING:
+                model = hedged_model(model)
             
             # Create a prompt for sentiment analysis
             sentiment_prompt = f"""Analyze the customer's response and determine their sentiment and reason.
@@ -267,7 +380,9 @@ def analyze_sentiment(state: WorkflowState):
             Example: {{"sentiment": "positive", "reason": "customer is eager to proceed"}}"""
             
             # Get LLM response
+            started = time.perf_counter()
             response = model.invoke(sentiment_prompt)
+            usage = call_usage(MODEL_ALIASES["openai"], sentiment_prompt, response, time.perf_counter() - started)
             print(f"LLM response: {response}")
             
             # Parse the response
@@ -311,18 +426,35 @@ def analyze_sentiment(state: WorkflowState):
     
     print(f"Final sentiment analysis: sentiment={sentiment}, reason={reason}")
     
-    # Return the FULL state including the new values and updated messages
-    full_state = {
-        **state,
-        "messages": messages,
+    # Return only what changed; the reducer appends any new messages
+    updates = {
+        "messages": new_messages,
         "sentiment": sentiment,
         "reason": reason,
         "current_step": "process_sentiment",
         "sentiment_attempts": 0
     }
+    if usage:
+        updates["usage"] = usage
     
-    print(f"Returning from analyze_sentiment with sentiment={full_state['sentiment']}")
-    return full_state
+    print(f"Returning from analyze_sentiment with sentiment={updates['sentiment']}")
+    return updates
+
+@traceable(project_name="prizm-workflow-2")
+def analyze_incoming_sentiment(state: WorkflowState):
+    """parallel_app branch: classify a reply that came in with the request.
+    Without one, app classifies the restored history or adds the mock reply
+    after the greeting, so that waits for analyze_joined_sentiment."""
+    if last_message(state.get("messages") or [], "human") is None:
+        return {}
+    return analyze_sentiment(state)
+
+@traceable(project_name="prizm-workflow-2")
+def analyze_joined_sentiment(state: WorkflowState):
+    """parallel_app, after the join: analyze_sentiment on the full history if the branch left it"""
+    if state.get("current_step") == "process_sentiment":
+        return {}
+    return analyze_sentiment(state)
 
 @traceable(project_name="prizm-workflow-2")
 def process_sentiment(state: WorkflowState):
@@ -331,31 +463,13 @@ def process_sentiment(state: WorkflowState):
     print(f"process_sentiment received sentiment={state.get('sentiment', '')}, reason={state.get('reason', '')}")
     
     sentiment = state.get("sentiment", "")
-    # Get the existing messages from state
-    existing_messages = state.get("messages", [])
-    
-    if sentiment == "positive":
-        # For positive sentiment, proceed with the task
-        response = "Wonderful, talk to you soon."
-        
-    elif sentiment == "negative":
-        # For negative sentiment, ask for more information
-        response = "I understand you have some concerns. Could you please tell me more about them?"
-        
-    elif sentiment == "sentiment-loop":
-        # Handle sentiment loop (too many attempts)
-        response = "I'm having trouble understanding your sentiment. Let me escalate this to our support team."
-    
-    else:
-        # For unknown sentiment, provide a generic response
-        response = "Thank you for your response. Is there anything else you'd like to know about this task?"
     
-    # Add the response to the messages
-    messages = existing_messages + [AIMessage(content=response)]
+    # Unrecognised sentiments get the generic follow-up
+    response = SENTIMENT_REPLIES.get(sentiment, SENTIMENT_REPLIES["unknown"])
     
+    # Only the new reply is returned; the reducer appends it to the history
     return {
-        **state,  # Include ALL existing state
-        "messages": messages,
+        "messages": [AIMessage(content=response)],
         "current_step": "process_data",
     }
 
@@ -373,9 +487,7 @@ def process_data(state: WorkflowState):
     if state.get("sentiment"):
         summary += f" (Customer sentiment: {state.get('sentiment')})"
     
-    # Return the FULL state with summary added
     return {
-        **state,  # Include ALL existing state
         "summary": summary
     }
 
@@ -399,23 +511,31 @@ def format_output(state: WorkflowState):
     # Log what's coming in
     print(f"format_output received sentiment={state.get('sentiment', '')}, reason={state.get('reason', '')}")
     
-    # Convert message objects to serializable dictionaries
-    messages_dict = messages_to_dict(state.get("messages", []))
-    
-    # Ensure all values are present
+    # Ensure all values are present. The history is already in the messages
+    # channel; writing it back here would make the reducer append it twice.
     result = {
         "customer_email": state.get("customer", {}).get("email"),
         "vendor_email": state.get("vendor", {}).get("email"),
         "project_summary": state.get("summary", ""),
         "sentiment": state.get("sentiment", ""),
-        "reason": state.get("reason", ""),
-        "messages": messages_dict
+        "reason": state.get("reason", "")
     }
     
-    # Save conversation memory
+    # Save conversation memory, from the stored records: nothing here needs
+    # them converted to LangChain messages
+    messages = state.get("messages", [])
+    history = list(messages.records()) if isinstance(messages, MessageLog) else messages
     user_id = state.get("customer", {}).get("email")
     if user_id:
-        save_conversation_memory(user_id, state.get("messages", []))
+        store_conversation_memory(user_id, history)
+    
+    # Size of the conversation the next run restores, and this run's calls
+    # (earlier runs on the thread are already in the ledger)
+    result["context_tokens"] = count_message_tokens(history)
+    run_usage = add_usage(subtract_usage(state.get("usage"), state.get("usage_start")),
+                          {"context_tokens": result["context_tokens"]})
+    ledger.record(run_usage, customer=user_id, vendor=state.get("vendor", {}).get("email"))
+    print(f"format_output usage: {run_usage}")
     
     # Log what's going out
     print(f"format_output returning sentiment={result['sentiment']}, reason={result['reason']}")
@@ -443,8 +563,43 @@ workflow.add_edge("format", END)
 
 workflow.set_entry_point("validate")
 
+# Nodes that call out to a model stay their own step
+FUSION_BARRIERS = {"analyze_sentiment", "analyze_joined_sentiment"}
+
 # First compile the workflow
-app = workflow.compile()
+app = compile_graph(workflow, fuse=FUSE_LINEAR_CHAINS, barriers=FUSION_BARRIERS, project_name="prizm-workflow-2")
+
+# Alternative topology: memory load, prompt build and sentiment analysis of a
+# reply sent with the request do not depend on each other, so they run as
+# concurrent branches after validation. app runs sentiment after the restored
+# history is appended, so with a stored history it can classify the latest
+# stored reply instead. A request without a reply is classified after the
+# join, as in app: from the restored history, or from the mock reply
+# (MOCK_USER_RESPONSES) appended after the greeting.
+parallel_workflow = StateGraph(WorkflowState)
+parallel_workflow.add_node("validate", validate_request)
+# Writes from one step are applied in node-name order, so "memory" before
+# "prompt" keeps the history ordered as in app: input, memory, greeting. The
+# sentiment branch adds no messages.
+parallel_workflow.add_node("memory", load_memory)
+parallel_workflow.add_node("prompt", build_prompt)
+parallel_workflow.add_node("analyze_sentiment", analyze_incoming_sentiment)
+parallel_workflow.add_node("analyze_joined_sentiment", analyze_joined_sentiment)
+parallel_workflow.add_node("process_sentiment", process_sentiment)
+parallel_workflow.add_node("process", process_data)
+parallel_workflow.add_node("format", format_output)
+
+parallel_workflow.set_entry_point("validate")
+for branch in ("memory", "prompt", "analyze_sentiment"):
+    parallel_workflow.add_edge("validate", branch)
+parallel_workflow.add_edge(["memory", "prompt", "analyze_sentiment"], "analyze_joined_sentiment")
+parallel_workflow.add_edge("analyze_joined_sentiment", "process_sentiment")
+parallel_workflow.add_edge("process_sentiment", "process")
+parallel_workflow.add_edge("process", "format")
+parallel_workflow.add_edge("format", END)
+
+parallel_app = compile_graph(parallel_workflow, fuse=FUSE_LINEAR_CHAINS, barriers=FUSION_BARRIERS,
+                             project_name="prizm-workflow-2")
 
 # Test Execution
 if __name__ == "__main__":
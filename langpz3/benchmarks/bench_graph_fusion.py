@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+"""
+Per-invocation cost of workflow2 with and without linear-chain fusion.
+
+Runs the graph with mock user responses and mock sentiment analysis (no LLM
+calls) and conversation memory in a temporary directory, so the numbers are
+graph overhead plus the nodes' own work.
+
+    python benchmarks/bench_graph_fusion.py [invocations]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+# No-LLM configuration; must be set before workflow2 is imported
+os.environ["MOCK_USER_RESPONSES"] = "true"
+os.environ["MOCK_SENTIMENT_ANALYSIS"] = "true"
+os.environ["LANGCHAIN_TRACING_V2"] = "false"
+os.environ["LANGSMITH_TRACING"] = "false"
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+import workflow2
+from graph_fusion import compile_graph
+
+INPUT = {
+    "customer": {"name": "Bench User", "email": "bench@example.com", "phoneNumber": "555-0100", "zipCode": "12345"},
+    "task": {"description": "Fix the sink", "category": "Plumbing"},
+    "vendor": {"name": "Acme Plumbing", "email": "acme@example.com", "phoneNumber": "555-0199"},
+}
+
+def time_invocations(app, n):
+    samples = []
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for _ in range(n):
+            # Fresh memory each run so every invocation does the same work
+            for name in os.listdir(workflow2.MEMORY_DIR):
+                os.remove(os.path.join(workflow2.MEMORY_DIR, name))
+            start = time.perf_counter()
+            app.invoke(INPUT)
+            samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    with tempfile.TemporaryDirectory() as memory_dir:
+        workflow2.MEMORY_DIR = memory_dir
+        os.makedirs(memory_dir, exist_ok=True)
+        apps = {
+            "unfused": compile_graph(workflow2.workflow),
+            "fused": compile_graph(workflow2.workflow, fuse=True, barriers=workflow2.FUSION_BARRIERS),
+        }
+        for app in apps.values():
+            time_invocations(app, 20)  # warm up
+        results = {name: time_invocations(app, n) for name, app in apps.items()}
+
+    print(f"{'graph':>8} {'steps':>6} {'p50':>10} {'mean':>10}")
+    for name, samples in results.items():
+        steps = len(apps[name].builder.nodes)
+        print(f"{name:>8} {steps:>6} {statistics.median(samples):>7.0f} us {statistics.fmean(samples):>7.0f} us")
+    saved = statistics.median(results["unfused"]) - statistics.median(results["fused"])
+    print(f"fusion saves {saved:.0f} us per invocation (p50)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+"""
+Tail latency of the sentiment LLM call with and without hedging.
+
+Sends --calls sentiment prompts (--concurrency at a time) to the local fake
+OpenAI server, whose time to first token is lognormal with a long tail
+(--ttft, default median 150 ms, sigma 0.8: p99 is about 6x the median).
+The first --warmup calls of each run only fill the latency window. Reports
+p50/p99 per call, the hedge rate and the extra requests the server saw.
+
+    python benchmarks/bench_hedging.py --calls 600 --concurrency 8
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(os.path.join(ROOT, 'agent'))
+sys.path.append(os.path.join(ROOT, 'tools'))
+
+import fake_openai_server
+
+PROMPT = """Analyze the customer's response and determine their sentiment and reason.
+            Response: {reply}
+
+            Return the analysis in JSON format with two fields: sentiment and reason."""
+
+def run(model, calls, concurrency, warmup):
+    replies = ["Yes, I'll contact them tomorrow. Thanks!", "I'm not sure if I can afford this right now."]
+
+    def call(i):
+        start = time.perf_counter()
+        model.invoke(PROMPT.format(reply=replies[i % 2]))
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(call, range(warmup)))
+        requests_before = fake_openai_server.stats()["requests"]
+        latencies = sorted(pool.map(call, range(calls)))
+    extra = fake_openai_server.stats()["requests"] - requests_before - calls
+    return latencies, extra
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=600)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--ttft", default="lognormal:150:0.8")
+    parser.add_argument("--budget", type=float, default=0.05)
+    args = parser.parse_args()
+
+    server = fake_openai_server.make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    fake_openai_server.CONFIG["ttft"] = args.ttft
+    os.environ.update(MODEL_BASE_URL=f"http://127.0.0.1:{server.server_port}/v1", OPENAI_API_KEY="sk-local")
+    from hedging import HedgePolicy, hedged_model
+    from model_registry import get_chat_model
+
+    inner = get_chat_model("openai")
+    policy = HedgePolicy(budget=args.budget)
+    print(f"{args.calls} calls, concurrency {args.concurrency}, TTFT {args.ttft}")
+    print(f"{'mode':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} {'extra req':>10}")
+    for name, model in (("plain", inner), ("hedged", hedged_model(inner, policy))):
+        random.seed(11)
+        latencies, extra = run(model, args.calls, args.concurrency, args.warmup)
+        print(f"{name:>8} {statistics.median(latencies) * 1000:>8.1f} "
+              f"{latencies[int(len(latencies) * 0.9) - 1] * 1000:>8.1f} "
+              f"{latencies[int(len(latencies) * 0.99) - 1] * 1000:>8.1f} {latencies[-1] * 1000:>8.1f} "
+              f"{extra / args.calls:>10.1%}")
+    stats = policy.snapshot()
+    print(f"hedge delay {stats['hedge_delay_ms']} ms, hedged {stats.get('hedged', 0)} of {stats['calls']} calls "
+          f"({stats['hedge_rate']:.1%}), hedge won {stats.get('hedge_won', 0)}, "
+          f"denied by budget {stats.get('budget_denied', 0)}")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
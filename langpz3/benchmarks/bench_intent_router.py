@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+"""
+Intent routing cost on a synthetic chat corpus: compiled router vs the old cascades.
+
+Builds --messages messages from agent-style phrases (todo commands, small
+talk, rescheduling, questions, farewells and filler text) and classifies all
+of them with:
+- the keyword cascades the agents used before (copied below), and
+- intent_router's compiled tables, built fresh for each run: once over the
+  distinct messages (every call a miss in the router's memo) and once over
+  the whole corpus with classify_batch.
+Also counts the messages where the two disagree; these are mostly substring
+hits the router now rejects ("hi" inside "this", "add" inside "address").
+
+    python benchmarks/bench_intent_router.py --messages 100000
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from collections import Counter
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+from intent_router import BOND7_INTENTS, SMALL_TALK_INTENTS, WORKFLOW_FIXED_INTENTS, IntentRouter
+
+PHRASES = [
+    "add task: call the plumber about the leak", "Add a todo to email the contractor", "show my todos",
+    "can you list my tasks", "next page", "upcoming", "done 3", "I finished task 12", "bye", "ok goodbye then",
+    "hello", "hi there", "how are you doing", "help", "thanks a lot", "what is langgraph", "tell me about langchain",
+    "what can you do", "Can we reschedule the meeting?", "What time will they arrive?", "end",
+    "this is the address for the site", "I think that works for me", "maybe later this week",
+    "the kitchen cabinets should arrive on Monday", "please update the address on file",
+]
+FILLER = ("the quote for the bathroom remodel looked reasonable and I would like to compare it with the other "
+          "contractor before deciding which one to hire for the job").split()
+
+def cascade_process_input(content):
+    lower_content = content.lower()
+    intent = "general_question"
+    if "add" in lower_content and ("todo" in lower_content or "task" in lower_content):
+        intent = "add_todo"
+    elif "show" in lower_content and ("todo" in lower_content or "task" in lower_content):
+        intent = "view_todos"
+    elif "list" in lower_content and ("todo" in lower_content or "task" in lower_content):
+        intent = "view_todos"
+    elif lower_content.strip(" .!") in ("next", "next page", "more") or "upcoming" in lower_content:
+        intent = "view_todos"
+    elif any(word in lower_content for word in ["done", "complete", "finished"]) and any(c.isdigit() for c in lower_content):
+        intent = "complete_todo"
+    elif any(word in lower_content for word in ["bye", "exit", "quit", "goodbye"]):
+        intent = "end_conversation"
+    return intent
+
+def cascade_general_question(content):
+    content = content.lower()
+    if "hello" in content or "hi" in content:
+        return "greeting"
+    elif "how are you" in content:
+        return "how_are_you"
+    elif "help" in content:
+        return "help"
+    elif "thank" in content:
+        return "thanks"
+    elif "langgraph" in content:
+        return "langgraph"
+    elif "langchain" in content:
+        return "langchain"
+    elif "capability" in content or "do you do" in content or "can you" in content:
+        return "capabilities"
+    return "default"
+
+def cascade_human_step(content):
+    content = content.lower()
+    if content in ["end", "bye", "goodbye", "exit", "quit"]:
+        return "end_conversation"
+    if "reschedule" in content:
+        return "reschedule"
+    if "?" in content:
+        return "process_additional"
+    return None
+
+def make_corpus(size, seed=3):
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        kind = rng.random()
+        if kind < 0.5:
+            corpus.append(rng.choice(PHRASES))
+        elif kind < 0.8:
+            corpus.append(" ".join(rng.choices(FILLER, k=rng.randint(5, 30))))
+        else:
+            corpus.append(rng.choice(PHRASES) + " " + " ".join(rng.choices(FILLER, k=rng.randint(3, 15))))
+    return corpus
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=100_000)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.messages)
+    distinct = list(dict.fromkeys(corpus))
+    print(f"{args.messages} messages ({len(distinct)} distinct), mean {sum(map(len, corpus)) / len(corpus):.0f} chars")
+    print(f"{'':>16} {'distinct, us/msg':^21} {'whole corpus, ms':^21}")
+    print(f"{'step':>16} {'cascade':>10} {'router':>10} {'cascade':>10} {'batch':>10} {'disagree':>9}")
+    for name, cascade, rules, default in (("process_input", cascade_process_input, BOND7_INTENTS, "general_question"),
+                                          ("general_question", cascade_general_question, SMALL_TALK_INTENTS, "default"),
+                                          ("human_step", cascade_human_step, WORKFLOW_FIXED_INTENTS, None)):
+        _, distinct_cascade_s = timed(lambda: [cascade(m) for m in distinct])
+        router = IntentRouter(rules, default=default)
+        _, distinct_router_s = timed(lambda: [router.classify(m) for m in distinct])
+        old, cascade_s = timed(lambda: [cascade(m) for m in corpus])
+        router = IntentRouter(rules, default=default)
+        batch, batch_s = timed(lambda: router.classify_batch(corpus))
+        new = [match.intent for match in batch]
+        differ = Counter((o, n) for o, n in zip(old, new) if o != n)
+        print(f"{name:>16} {distinct_cascade_s * 1e6 / len(distinct):>10.2f} {distinct_router_s * 1e6 / len(distinct):>10.2f} "
+              f"{cascade_s * 1000:>10.1f} {batch_s * 1000:>10.1f} {sum(differ.values()) / len(corpus):>9.1%}")
+        for (o, n), count in differ.most_common(2):
+            print(f"{'':>16}   cascade {o} -> router {n}: {count}")
+
+if __name__ == "__main__":
+    main()
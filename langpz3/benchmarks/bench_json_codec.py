@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+"""
+Encode/decode cost of a workflow result with a 1k-message history.
+
+Compares what the bridge did before (json.dumps(default=str) for the log
+plus json.dumps(indent=2) again for the response) with json_codec on each
+backend, and the size of the encoded body.
+
+    python benchmarks/bench_json_codec.py
+"""
+
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+import json_codec
+from message_log import append_messages
+
+HISTORY = 1000
+REPEAT = 20
+
+def make_result(n):
+    messages = append_messages([], [
+        (HumanMessage if i % 2 else AIMessage)(content=f"Message {i}: I'll contact them tomorrow, thanks!", id=f"history-{i}")
+        for i in range(n)
+    ])
+    return {
+        "customer": {"name": "John Smith", "email": "john.smith@example.com", "phoneNumber": "555-123-4567", "zipCode": "94105"},
+        "task": {"description": "Kitchen renovation", "category": "Remodeling"},
+        "vendor": {"name": "Bay Area Remodelers", "email": "contact@bayarearemodelers.com", "phoneNumber": "555-987-6543"},
+        "messages": messages,
+        "sentiment": "positive",
+        "reason": "customer agreed to proceed",
+    }
+
+def per_call_ms(fn):
+    fn()
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+def main():
+    result = make_result(HISTORY)
+    as_dicts = [{"type": m.type, "content": m.content, "id": m.id} for m in result["messages"]]
+    plain = dict(result, messages=as_dicts)
+
+    def before():
+        # Log encoding plus a second, pretty-printed encoding for the response
+        json.dumps(result, default=str)
+        return json.dumps(plain, indent=2).encode()
+
+    print(f"{HISTORY}-message result")
+    print(f"{'':>22} {'encode ms':>10} {'decode ms':>10} {'bytes':>9}")
+    body = before()
+    print(f"{'before (2x stdlib)':>22} {per_call_ms(before):>10.2f} {per_call_ms(lambda: json.loads(body)):>10.2f} {len(body):>9}")
+    for backend in ("json", "orjson"):
+        if backend == "orjson" and json_codec.orjson is None:
+            print(f"{'json_codec (orjson)':>22} not installed")
+            continue
+        json_codec.BACKEND = backend
+        body = json_codec.dumpb(result)
+        encode = per_call_ms(lambda: json_codec.dumpb(result))
+        decode = per_call_ms(lambda: json_codec.loads(body))
+        print(f"{'json_codec (' + backend + ')':>22} {encode:>10.2f} {decode:>10.2f} {len(body):>9}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""
+Offline workflow2 runs from an LLM cassette.
+
+Records the sentiment calls for a set of customer replies once, against the
+local fake OpenAI server (tools/fake_openai_server.py, 300 ms time to first
+token), then replays --runs graph invocations from the cassette with no
+network and no API key. Reports per-run latency for each phase.
+
+    python benchmarks/bench_llm_replay.py --runs 2000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(os.path.join(ROOT, 'agent'))
+sys.path.append(os.path.join(ROOT, 'tools'))
+
+import fake_openai_server
+
+def make_state(reply):
+    return {
+        "customer": {"name": "John Smith", "email": "", "phoneNumber": "555-123-4567", "zipCode": "94105"},
+        "task": {"description": "Kitchen renovation", "category": "Remodeling"},
+        "vendor": {"name": "Bay Area Remodelers", "email": "contact@bayarearemodelers.com", "phoneNumber": "555-987-6543"},
+        "messages": [{"type": "human", "content": reply}],
+    }
+
+def summary(latencies):
+    ordered = sorted(latencies)
+    return (f"p50 {statistics.median(ordered) * 1000:7.2f} ms  "
+            f"p99 {ordered[int(len(ordered) * 0.99) - 1] * 1000:7.2f} ms  "
+            f"{len(ordered) / sum(ordered):8.1f} runs/s")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=500)
+    args = parser.parse_args()
+
+    server = fake_openai_server.make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    fake_openai_server.CONFIG["ttft"] = "fixed:300"
+    cassette = os.path.join(tempfile.mkdtemp(), "llm.jsonl")
+    os.environ.update(
+        LLM_CASSETTE_MODE="auto", LLM_CASSETTE_PATH=cassette, LLM_CASSETTE_LATENCY="none",
+        MODEL_BASE_URL=f"http://127.0.0.1:{server.server_port}/v1", OPENAI_API_KEY="sk-local",
+        MOCK_SENTIMENT_ANALYSIS="False",
+    )
+    import model_registry
+    from workflow2 import NEGATIVE_RESPONSES, POSITIVE_RESPONSES, app
+
+    replies = list(POSITIVE_RESPONSES) + list(NEGATIVE_RESPONSES)
+    recording = []
+    for reply in replies:
+        start = time.perf_counter()
+        app.invoke(make_state(reply))
+        recording.append(time.perf_counter() - start)
+    server.shutdown()
+
+    # Replay only, so a prompt missing from the cassette fails loudly
+    model_registry.LLM_CASSETTE_MODE = "replay"
+    model_registry.close_models()
+    replaying = []
+    sentiments = Counter()
+    for i in range(args.runs):
+        start = time.perf_counter()
+        result = app.invoke(make_state(replies[i % len(replies)]))
+        replaying.append(time.perf_counter() - start)
+        sentiments[result["sentiment"]] += 1
+
+    print(f"record ({len(replies)} prompts, fake server): {summary(recording)}")
+    print(f"replay ({args.runs} runs, offline):        {summary(replaying)}  {dict(sentiments)}")
+
+if __name__ == "__main__":
+    main()
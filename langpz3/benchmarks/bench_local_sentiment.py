@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""
+Throughput of the local sentiment model (agent/local_sentiment.py).
+
+    python benchmarks/bench_local_sentiment.py [--batch 10000] [--model agent/models/sentiment.npy]
+
+Without --model a model is trained on the canned workflow2 responses first.
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+from local_sentiment import LocalSentimentModel, train
+
+POSITIVE = [
+    "Yes, I'll contact them tomorrow. Thanks!",
+    "Sounds great, I'll reach out to them right away.",
+    "Perfect timing, I was just looking for someone like this!",
+]
+NEGATIVE = [
+    "I'm a bit concerned about the budget. Can we discuss this further?",
+    "I'm not sure if I can afford this right now.",
+    "I have some concerns about the timeline. Can they start next month instead?",
+]
+FILLER = "okay so the vendor said maybe next week but my schedule is tight and the kitchen needs work".split()
+
+def synthetic_utterances(n, seed=0):
+    rng = random.Random(seed)
+    base = POSITIVE + NEGATIVE
+    return [
+        f"{rng.choice(base)} {' '.join(rng.choice(FILLER) for _ in range(rng.randint(0, 8)))}"
+        for _ in range(n)
+    ]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--model", default=None)
+    args = parser.parse_args()
+
+    if args.model:
+        model = LocalSentimentModel.load(args.model)
+    else:
+        model = train([(t, "positive") for t in POSITIVE] + [(t, "negative") for t in NEGATIVE])
+
+    texts = synthetic_utterances(args.batch)
+    model.predict_proba(texts)  # warm up the hash tables
+
+    best = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        model.predict_proba(texts)
+        best = min(best, time.perf_counter() - start)
+
+    single = []
+    for text in texts[:1000]:
+        start = time.perf_counter()
+        model.classify(text)
+        single.append(time.perf_counter() - start)
+    single.sort()
+
+    print(f"Batch of {len(texts)}: {best * 1000:.1f} ms, {len(texts) / (best * 1000):.0f} utterances/ms")
+    print(f"Single classify: p50 {single[len(single) // 2] * 1e6:.0f} us, p99 {single[int(len(single) * 0.99)] * 1e6:.0f} us")
+
+if __name__ == "__main__":
+    main()
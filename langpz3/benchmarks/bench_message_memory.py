@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""
+Bytes per stored message: full LangChain messages vs a compact MessageLog.
+
+Builds a workflow2-style history (alternating AI replies carrying
+response_metadata and human turns) and reports resident bytes per message
+(tracemalloc) for a list of BaseMessage objects (what add_messages keeps in
+the graph channel) and for a MessageLog of the same turns (what the
+MessageLogChannel keeps, including its id index and checkpoint blocks).
+Each form is built from fresh strings inside the measurement, so the bytes
+cover everything it retains, content strings included. Also reports pickled
+bytes per message for the list and for its to_records form (what the memory
+pickles hold), and the cost of converting each way.
+
+    python benchmarks/bench_message_memory.py
+"""
+
+import gc
+import os
+import pickle
+import sys
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from message_log import MessageLog, from_records, to_records
+
+HISTORY = 1000
+
+def make_history(n):
+    messages = []
+    for i in range(n):
+        if i % 2:
+            messages.append(HumanMessage(content=f"Yes, I'll contact them tomorrow ({i})", id=f"history-{i}"))
+        else:
+            messages.append(AIMessage(
+                content=f"Great! Please let us know once you've contacted the vendor ({i}).",
+                id=f"history-{i}",
+                response_metadata={"model_name": "gpt-4o", "finish_reason": "stop"},
+            ))
+    return messages
+
+def resident_bytes(build):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / HISTORY, value
+
+def main():
+    gc.collect()
+    full_bytes, full = resident_bytes(lambda: make_history(HISTORY))
+    gc.collect()
+    compact_bytes, log = resident_bytes(lambda: MessageLog(make_history(HISTORY)))
+    records = to_records(log)
+
+    full_pickle = len(pickle.dumps(full)) / HISTORY
+    compact_pickle = len(pickle.dumps(records)) / HISTORY
+
+    gc.collect()
+    start = time.perf_counter()
+    to_records(full)
+    to_us = (time.perf_counter() - start) / HISTORY * 1e6
+    start = time.perf_counter()
+    from_records(records)
+    from_us = (time.perf_counter() - start) / HISTORY * 1e6
+
+    print(f"{HISTORY} messages")
+    print(f"{'':>14} {'resident B/msg':>15} {'pickled B/msg':>14}")
+    print(f"{'BaseMessage':>14} {full_bytes:>15.0f} {full_pickle:>14.0f}")
+    print(f"{'MessageLog':>14} {compact_bytes:>15.0f} {compact_pickle:>14.0f}")
+    print(f"to_records {to_us:.2f} us/msg, from_records {from_us:.1f} us/msg")
+
+if __name__ == "__main__":
+    main()
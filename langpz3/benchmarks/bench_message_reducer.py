@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""
+Per-step cost of the messages reducer as restored history grows.
+
+Simulates the appends a workflow2 run makes after memory is restored (one
+message per step) with add_messages and with message_log.append_messages.
+
+    python benchmarks/bench_message_reducer.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.graph import add_messages
+
+from message_log import append_messages
+
+HISTORY_SIZES = [10, 100, 1000, 10000]
+STEPS = 200
+
+def make_history(n):
+    return [
+        (HumanMessage if i % 2 else AIMessage)(content=f"message {i}", id=f"history-{i}")
+        for i in range(n)
+    ]
+
+def per_step_us(reducer, n):
+    state = reducer([], make_history(n))
+    updates = [[AIMessage(content=f"reply {i}")] for i in range(STEPS)]
+    start = time.perf_counter()
+    for update in updates:
+        state = reducer(state, update)
+    return (time.perf_counter() - start) / STEPS * 1e6
+
+def main():
+    print(f"{'history':>8} {'add_messages':>14} {'append_messages':>16}")
+    for n in HISTORY_SIZES:
+        print(f"{n:>8} {per_step_us(add_messages, n):>11.1f} us {per_step_us(append_messages, n):>13.1f} us")
+
+if __name__ == "__main__":
+    main()
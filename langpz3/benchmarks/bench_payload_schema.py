@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+Payload validation cost: compiled schema vs interpreting it, and edge rejection vs a graph run.
+
+Times, per payload:
+- presence loop: the old in-graph check (sections and field names only);
+- interpreted: walking WORKFLOW_SCHEMA and dispatching on each field's kind
+  on every call, with the same checks as the compiled validator;
+- compiled: compile_schema(WORKFLOW_SCHEMA, coerce=True, normalize=True);
+- batch: validate_batch over --payloads payloads, per payload.
+Then compares rejecting a payload with a bad email at the edge with what it
+cost before: a full workflow2 run (mock responses and sentiment, memory in a
+temporary directory) that accepts it.
+
+    python benchmarks/bench_payload_schema.py --payloads 20000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+from payload_schema import FIELD_CHECKS, WORKFLOW_SCHEMA, _Invalid, compile_schema, validate_batch
+
+def make_payload(i):
+    return {
+        "customer": {"name": f"Customer {i}", "email": f"c{i}@Example.com", "phoneNumber": "(555) 012-3456",
+                     "zipCode": f"{i % 100000:05d}"},
+        "task": {"description": "Kitchen renovation", "category": "Remodeling"},
+        "vendor": {"name": "Vendor", "email": "vendor@example.com", "phoneNumber": "555-987-6543"},
+    }
+
+def presence(payload):
+    for section, fields in WORKFLOW_SCHEMA.items():
+        if section not in payload:
+            raise ValueError(f"Missing {section} data")
+        for field in fields:
+            if field not in payload[section]:
+                raise ValueError(f"Missing {field} in {section}")
+
+def interpreted(payload):
+    errors = []
+    cleaned = dict(payload)
+    for section, fields in WORKFLOW_SCHEMA.items():
+        data = payload.get(section)
+        if data is None:
+            errors.append(f"Missing {section} data")
+            continue
+        values = dict(data)
+        for field, kind in fields.items():
+            if field not in data:
+                errors.append(f"Missing {field} in {section}")
+                continue
+            try:
+                values[field] = FIELD_CHECKS[kind](True, True)(data[field])
+            except _Invalid as e:
+                errors.append(f"Invalid {field} in {section}: {e}")
+        cleaned[section] = values
+    return cleaned, errors
+
+def per_payload_us(fn, payloads):
+    start = time.perf_counter()
+    for payload in payloads:
+        fn(payload)
+    return (time.perf_counter() - start) * 1e6 / len(payloads)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--payloads", type=int, default=20_000)
+    parser.add_argument("--runs", type=int, default=20, help="workflow2 runs for the graph comparison")
+    args = parser.parse_args()
+
+    payloads = [make_payload(i) for i in range(args.payloads)]
+    validate = compile_schema(WORKFLOW_SCHEMA, coerce=True, normalize=True)
+    assert all(interpreted(p) == validate(p) for p in payloads[:100])
+    start = time.perf_counter()
+    validate_batch(payloads, validate)
+    batch_us = (time.perf_counter() - start) * 1e6 / len(payloads)
+    for name, us in (("presence loop", per_payload_us(presence, payloads)),
+                     ("interpreted", per_payload_us(interpreted, payloads)),
+                     ("compiled", per_payload_us(validate, payloads)),
+                     ("batch", batch_us)):
+        print(f"{name:>14} {us:>8.2f} us/payload")
+
+    os.environ["MOCK_USER_RESPONSES"] = os.environ["MOCK_SENTIMENT_ANALYSIS"] = "True"
+    import workflow2
+    bad = [make_payload(i) for i in range(args.runs)]
+    for payload in bad:
+        payload["customer"]["email"] = payload["customer"]["email"].replace("@", " at ")
+    edge_us = per_payload_us(validate, bad)
+    with tempfile.TemporaryDirectory() as memory_dir:
+        workflow2.MEMORY_DIR = memory_dir
+        graph_us = per_payload_us(workflow2.app.invoke, bad)
+    print(f"bad email: rejected at the edge in {edge_us:.1f} us, "
+          f"previously a full workflow2 run of {graph_us / 1000:.1f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+"""
+Run throughput against a local LangGraph dev server.
+
+Compares the old create-then-poll-every-second loop with run_client.run_many
+(runs.wait over one pooled client). Start the server first, ideally without
+LLM calls:
+
+    MOCK_USER_RESPONSES=true MOCK_SENTIMENT_ANALYSIS=true langgraph dev
+    python benchmarks/bench_run_throughput.py --runs 200 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'tools'))
+
+from langgraph_sdk import get_client
+
+from run_client import run_many
+
+INPUT = {
+    "customer": {"name": "John Smith", "email": "john.smith@example.com", "phoneNumber": "555-123-4567", "zipCode": "94105"},
+    "task": {"description": "Kitchen renovation", "category": "Remodeling"},
+    "vendor": {"name": "Bay Area Remodelers", "email": "contact@bayarearemodelers.com", "phoneNumber": "555-987-6543"},
+}
+
+async def fixed_poll(client, assistant_id, runs):
+    """The previous approach: one run at a time, polled once a second"""
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        thread = await client.threads.create()
+        run = await client.runs.create(thread["thread_id"], assistant_id, input=INPUT)
+        while (await client.runs.get(thread["thread_id"], run["run_id"]))["status"] in ("pending", "running"):
+            await asyncio.sleep(1)
+        latencies.append(time.perf_counter() - start)
+    return latencies, 0
+
+async def multiplexed(client, assistant_id, runs, concurrency):
+    latencies, errors = [], 0
+    async for result in run_many(client, assistant_id, [INPUT] * runs, concurrency=concurrency):
+        latencies.append(result["latency"])
+        errors += result["status"] != "success"
+    return latencies, errors
+
+def report(name, latencies, errors, elapsed):
+    print(f"{name:>12}: {len(latencies)} runs in {elapsed:.2f}s = {len(latencies) / elapsed:.1f} runs/s, "
+          f"p50 {statistics.median(latencies) * 1000:.0f} ms, errors {errors}")
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:2024")
+    parser.add_argument("--assistant", default="workflow2")
+    parser.add_argument("--runs", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--poll-runs", type=int, default=5, help="runs for the fixed-poll baseline (0 to skip)")
+    args = parser.parse_args()
+
+    client = get_client(url=args.url)
+    if args.poll_runs:
+        start = time.perf_counter()
+        latencies, errors = await fixed_poll(client, args.assistant, args.poll_runs)
+        report("fixed poll", latencies, errors, time.perf_counter() - start)
+
+    start = time.perf_counter()
+    latencies, errors = await multiplexed(client, args.assistant, args.runs, args.concurrency)
+    report("run_many", latencies, errors, time.perf_counter() - start)
+
+if __name__ == "__main__":
+    asyncio.run(main())
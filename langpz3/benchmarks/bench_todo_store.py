@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Todo adds and listings for users with many todos.
+
+For each size, adds that many todos to a fresh store (one JSONL append
+each), then compares the old full listing built with string += against one
+view_todos page from the store. Also times upcoming() over the due-date
+heap and reloading the store from its log.
+
+    python benchmarks/bench_todo_store.py --sizes 100 1000 10000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+from todo_store import TodoList
+
+def full_listing(todos):
+    # The old view_todos: every todo, every time
+    response = "Here's your current todo list:\n"
+    for i, todo in enumerate(todos, 1):
+        response += f"{i}. {todo['task']}\n"
+    return response
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--page-size", type=int, default=10)
+    args = parser.parse_args()
+
+    print(f"{'todos':>7} {'add us':>8} {'list ms':>8} {'list KB':>8} {'page ms':>8} {'page B':>7} "
+          f"{'upcoming ms':>12} {'reload ms':>10}")
+    for size in args.sizes:
+        path = os.path.join(tempfile.mkdtemp(), "user_todos.jsonl")
+        todos = TodoList(path)
+        start = time.perf_counter()
+        for i in range(size):
+            todos.add(f"Call vendor {i} about the kitchen remodel quote",
+                      due=f"2025-{i % 12 + 1:02d}-{i % 28 + 1:02d}" if i % 3 == 0 else None)
+        add_us = (time.perf_counter() - start) / size * 1e6
+
+        as_list = list(todos.items.values())
+        start = time.perf_counter()
+        listing = full_listing(as_list)
+        list_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        page, total = todos.page(status="open", offset=size // 2, limit=args.page_size)
+        reply = "\n".join(f"#{todo['id']} {todo['task']}" for todo in page)
+        page_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        todos.upcoming(args.page_size)
+        upcoming_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        TodoList(path)
+        reload_ms = (time.perf_counter() - start) * 1000
+        print(f"{size:>7} {add_us:>8.1f} {list_ms:>8.2f} {len(listing) / 1024:>8.1f} {page_ms:>8.3f} "
+              f"{len(reply):>7} {upcoming_ms:>12.3f} {reload_ms:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""
+Cost of counting a run's context tokens as the restored history grows.
+
+For each history size, counts the system prompt plus history once cold
+(every message tokenized) and then warm, as the next run of the same
+conversation would (only the new turn tokenized; the rest memoized).
+
+    python benchmarks/bench_token_accounting.py --sizes 100 1000 5000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+from token_accounting import count_message_tokens, count_tokens, tokenizer_name
+
+SYSTEM = SystemMessage(content="You are 007, a personal productivity agent. You help users manage their tasks, "
+                               "find information, and boost their productivity. " * 8)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    args = parser.parse_args()
+
+    count_message_tokens([SYSTEM])
+    print(f"tokenizer: {tokenizer_name()}")
+    print(f"{'history':>8} {'tokens':>9} {'cold ms':>9} {'warm ms':>9}")
+    for size in args.sizes:
+        history = [(HumanMessage if i % 2 else AIMessage)(content=f"Turn {i}: the kitchen remodel needs new cabinets, "
+                                                                   f"counters and a permit before work can start.")
+                   for i in range(size)]
+        count_tokens.cache_clear()
+        start = time.perf_counter()
+        tokens = count_message_tokens([SYSTEM] + history)
+        cold = time.perf_counter() - start
+        start = time.perf_counter()
+        count_message_tokens([SYSTEM] + history + [HumanMessage(content="Yes, I'll contact them tomorrow.")])
+        warm = time.perf_counter() - start
+        print(f"{size:>8} {tokens:>9} {cold * 1000:>9.2f} {warm * 1000:>9.2f}")
+
+if __name__ == "__main__":
+    main()
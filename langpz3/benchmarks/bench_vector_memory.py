@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Restoring a customer's history: full pickle replay vs vector recall.
+
+For histories of --sizes turns, compares what workflow2 does at the start of
+a run:
+- replay: unpickle the whole history (load_conversation_memory) and send it
+  all to the model;
+- recall: open the vector store and restore the K most relevant plus the
+  last R turns (vector_memory.VectorMemory.recall), exact search up to
+  EXACT_MAX_ROWS turns and the IVF index above.
+Reports restore time in a fresh store object (the IVF index is built
+beforehand, as it would be by an earlier run) and the restored turns and
+estimated prompt tokens.
+
+    python benchmarks/bench_vector_memory.py --sizes 100,1000,10000,100000
+"""
+
+import argparse
+import os
+import pickle
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from message_log import from_records, to_records
+from token_accounting import count_message_tokens
+from vector_memory import VectorMemory
+
+WORDS = ("sink roof window budget permit tiles paint deck plumber electrician cabinet quote invoice schedule "
+         "monday friday delay crew inspection drywall floor garage fence patio lighting outlet heater leak mold "
+         "insulation gutter contact tomorrow call price estimate start finish week").split()
+
+def make_history(n, seed=0):
+    rng = random.Random(seed)
+    history = []
+    for i in range(n):
+        text = " ".join(rng.choices(WORDS, k=rng.randint(6, 20)))
+        history.append((HumanMessage if i % 2 else AIMessage)(content=text, id=f"turn-{i}"))
+    return history
+
+def best_of(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, min(times)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="100,1000,10000,100000")
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--recent", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    query = "can the crew start the drywall on monday"
+    print(f"{'turns':>8} {'replay ms':>10} {'turns':>7} {'tokens':>8} {'recall ms':>10} {'turns':>6} {'tokens':>7}  search")
+    with tempfile.TemporaryDirectory() as directory:
+        for size in map(int, args.sizes.split(",")):
+            history = make_history(size)
+            pickle_path = os.path.join(directory, f"{size}_messages.pkl")
+            with open(pickle_path, "wb") as f:
+                pickle.dump(to_records(history), f)
+            prefix = os.path.join(directory, str(size))
+            VectorMemory(prefix).add(history)
+            VectorMemory(prefix).search(query, 1)  # builds the IVF index for large histories
+
+            def replay():
+                with open(pickle_path, "rb") as f:
+                    return from_records(pickle.load(f))
+
+            def recall():
+                return from_records(VectorMemory(prefix).recall(query, k=args.k, recent=args.recent))
+
+            replayed, replay_s = best_of(replay, args.repeat)
+            recalled, recall_s = best_of(recall, args.repeat)
+            search = "ivf" if size > VectorMemory(prefix).exact_max_rows else "exact"
+            print(f"{size:>8} {replay_s * 1000:>10.2f} {len(replayed):>7} {count_message_tokens(replayed):>8} "
+                  f"{recall_s * 1000:>10.2f} {len(recalled):>6} {count_message_tokens(recalled):>7}  {search}")
+
+if __name__ == "__main__":
+    main()
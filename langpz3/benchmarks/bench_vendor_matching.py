@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Vendor lookup cost: VendorIndex vs scanning the vendor list.
+
+Generates --vendors vendors over --categories categories and random ZIP
+codes, builds a VendorIndex and times --lookups random (category, ZIP)
+lookups:
+- scan: a Python pass over every vendor dict (filter by category, score,
+  heapq top-k), i.e. matching without an index;
+- numpy scan: the same score over the whole category as arrays;
+- index cold: first lookup for a (category, prefix), which gathers and
+  ranks the candidates;
+- index warm: a repeat lookup for a prefix already ranked.
+
+    python benchmarks/bench_vendor_matching.py --vendors 100000
+"""
+
+import argparse
+import heapq
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+import numpy as np
+
+from vendor_matching import VendorIndex, zip3_distances
+
+def make_vendors(n, categories, seed=0):
+    rng = random.Random(seed)
+    return [{"name": f"Vendor {i}", "email": f"v{i}@example.com", "phoneNumber": "555-0100",
+             "category": f"category-{rng.randrange(categories)}",
+             "zipCode": f"{rng.randint(0, 999):03d}{rng.randint(0, 99):02d}", "rating": round(rng.uniform(1, 5), 1)}
+            for i in range(n)]
+
+def per_lookup_us(fn, lookups):
+    start = time.perf_counter()
+    for category, zip_code in lookups:
+        fn(category, zip_code)
+    return (time.perf_counter() - start) * 1e6 / len(lookups)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vendors", type=int, default=100_000)
+    parser.add_argument("--categories", type=int, default=40)
+    parser.add_argument("--lookups", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    vendors = make_vendors(args.vendors, args.categories)
+    start = time.perf_counter()
+    index = VendorIndex(vendors)
+    build_s = time.perf_counter() - start
+    rng = random.Random(1)
+    lookups = [(f"category-{rng.randrange(args.categories)}", f"{rng.randint(0, 999):03d}{rng.randint(0, 99):02d}")
+               for _ in range(args.lookups)]
+    distances = zip3_distances()
+
+    def scan(category, zip_code):
+        customer = int(zip_code[:3])
+        scored = ((v["rating"] / 5 - min(distances[customer, int(v["zipCode"][:3])], 100.0) / 100, i)
+                  for i, v in enumerate(vendors) if v["category"] == category)
+        return heapq.nlargest(args.k, scored)
+
+    columns = {}
+    for v in vendors:
+        columns.setdefault(v["category"], []).append((int(v["zipCode"][:3]), v["rating"]))
+    columns = {c: (np.array([p for p, _ in rows]), np.array([r for _, r in rows])) for c, rows in columns.items()}
+
+    def numpy_scan(category, zip_code):
+        prefixes, ratings = columns[category]
+        scores = ratings / 5 - np.minimum(distances[int(zip_code[:3]), prefixes], 100.0) / 100
+        return np.argpartition(-scores, args.k)[:args.k]
+
+    print(f"{args.vendors} vendors, {args.categories} categories, index built in {build_s * 1000:.0f} ms")
+    scan_us = per_lookup_us(scan, lookups[:50])
+    numpy_us = per_lookup_us(numpy_scan, lookups)
+    cold_us = per_lookup_us(lambda c, z: index.match(c, z, k=args.k), lookups)
+    warm_us = per_lookup_us(lambda c, z: index.match(c, z, k=args.k), lookups)
+    for name, us in (("scan", scan_us), ("numpy scan", numpy_us), ("index cold", cold_us), ("index warm", warm_us)):
+        print(f"{name:>12} {us:>10.1f} us/lookup")
+
+if __name__ == "__main__":
+    main()
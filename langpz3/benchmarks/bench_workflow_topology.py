@@ -0,0 +1,103 @@
+#!/usr/bin/env python
+"""
+Critical-path latency of workflow2's serial app vs parallel_app.
+
+Each run restores a stored history (--history messages in the memory file)
+and sends the sentiment prompt to the local fake OpenAI server (--ttft ms to
+first token). In app, memory load, prompt build and the sentiment call run
+one after another. In parallel_app they are concurrent branches, so the
+critical path is the slowest branch rather than their sum.
+
+The sentiment column can differ: app classifies the latest human message
+after the history is restored (a stored one here), parallel_app the
+incoming reply.
+
+--memory-ms adds a delay to each memory load, standing in for a remote
+store; a local pickle loads in a few ms and leaves the model call as the
+whole critical path.
+
+    python benchmarks/bench_workflow_topology.py --runs 50 --ttft 200 --history 2000 --memory-ms 150
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.append(os.path.join(ROOT, 'agent'))
+sys.path.append(os.path.join(ROOT, 'tools'))
+
+import fake_openai_server
+
+def make_state(email):
+    return {
+        "customer": {"name": "John Smith", "email": email, "phoneNumber": "555-123-4567", "zipCode": "94105"},
+        "task": {"description": "Kitchen renovation", "category": "Remodeling"},
+        "vendor": {"name": "Bay Area Remodelers", "email": "contact@bayarearemodelers.com", "phoneNumber": "555-987-6543"},
+        "messages": [{"type": "human", "content": "Yes, I'll contact them tomorrow. Thanks!"}],
+    }
+
+def timed(fn, runs):
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--ttft", type=float, default=200, help="fake model time to first token (ms)")
+    parser.add_argument("--history", type=int, default=2000, help="messages in the restored history")
+    parser.add_argument("--memory-ms", type=float, default=0, help="extra delay per memory load (ms)")
+    args = parser.parse_args()
+
+    server = fake_openai_server.make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    fake_openai_server.CONFIG["ttft"] = f"fixed:{args.ttft}"
+    os.environ.update(MODEL_BASE_URL=f"http://127.0.0.1:{server.server_port}/v1", OPENAI_API_KEY="sk-local",
+                      MOCK_SENTIMENT_ANALYSIS="False", MOCK_USER_RESPONSES="False")
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    import workflow2
+
+    workflow2.MEMORY_DIR = tempfile.mkdtemp()
+    email = "bench@example.com"
+    history = [(HumanMessage if i % 2 else AIMessage)(content=f"Stored message {i} about the kitchen project", id=f"h{i}")
+               for i in range(args.history)]
+    # Memory is rewritten after every run, so reset it to the same history each time
+    reset = lambda: workflow2.save_conversation_memory(email, history)
+    if args.memory_ms:
+        load = workflow2.load_conversation_memory
+
+        def remote_load(user_id):
+            time.sleep(args.memory_ms / 1000)
+            return load(user_id)
+        workflow2.load_conversation_memory = remote_load
+
+    reset()
+    load_ms = statistics.median(timed(lambda: workflow2.load_conversation_memory(email), 10)) * 1000
+    prompt_ms = statistics.median(timed(lambda: workflow2._initial_messages(make_state(email)), 10)) * 1000
+    print(f"history {args.history} messages, model TTFT {args.ttft:.0f} ms, memory delay {args.memory_ms:.0f} ms")
+    print(f"memory load {load_ms:.1f} ms, prompt build {prompt_ms:.2f} ms")
+    print(f"{'topology':>10} {'p50 ms':>9} {'p90 ms':>9} {'max ms':>9}  sentiment")
+    for name, graph in (("serial", workflow2.app), ("parallel", workflow2.parallel_app)):
+        graph.invoke(make_state(email))
+        latencies = []
+        for _ in range(args.runs):
+            reset()
+            start = time.perf_counter()
+            result = graph.invoke(make_state(email))
+            latencies.append(time.perf_counter() - start)
+        latencies.sort()
+        print(f"{name:>10} {statistics.median(latencies) * 1000:>9.1f} "
+              f"{latencies[int(len(latencies) * 0.9) - 1] * 1000:>9.1f} {latencies[-1] * 1000:>9.1f}  {result['sentiment']}")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
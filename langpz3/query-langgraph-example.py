@@ -19,27 +19,48 @@ from langgraph_sdk import get_sync_client
 # LangGraph server endpoint
 BASE_URL = "http://127.0.0.1:2024"
 
+PAGE_SIZE = 100
+
+# For regular syncs use tools/run_exporter.py, which only fetches what changed
+def iter_threads(client):
+    offset = 0
+    while True:
+        page = client.threads.search(limit=PAGE_SIZE, offset=offset)
+        yield from page
+        if len(page) < PAGE_SIZE:
+            return
+        offset += PAGE_SIZE
+
+def iter_runs(client, thread_id):
+    offset = 0
+    while True:
+        page = client.runs.list(thread_id, limit=PAGE_SIZE, offset=offset)
+        yield from page
+        if len(page) < PAGE_SIZE:
+            return
+        offset += PAGE_SIZE
+
 def list_threads(client):
-    threads = client.threads.list()
-    print(f"Found {len(threads)} threads:")
-    for thread in threads:
-        print(f"Thread ID: {thread.get('id')}")
+    count = 0
+    for thread in iter_threads(client):
+        count += 1
+        print(f"Thread ID: {thread.get('thread_id')}")
         print(f"Created: {thread.get('created_at')}")
         print(f"Modified: {thread.get('updated_at')}")
         print("---")
+    print(f"Found {count} threads")
 
 def list_runs(client):
-    runs = client.runs.list()
-    print(f"Found {len(runs)} runs:")
-    for run in runs:
-        print(f"Run ID: {run.get('id')}")
-        print(f"Started: {run.get('start_time')}")
-        print(f"Status: {run.get('status')}")
-        print(f"Graph: {run.get('graph_id')}")
-        if 'outputs' in run:
-            print("Outputs:")
-            print(json.dumps(run.get('outputs'), indent=2))
-        print("---")
+    count = 0
+    for thread in iter_threads(client):
+        for run in iter_runs(client, thread["thread_id"]):
+            count += 1
+            print(f"Run ID: {run.get('run_id')}")
+            print(f"Started: {run.get('created_at')}")
+            print(f"Status: {run.get('status')}")
+            print(f"Assistant: {run.get('assistant_id')}")
+            print("---")
+    print(f"Found {count} runs")
 
 def main():
     # Initialize LangGraph SDK client
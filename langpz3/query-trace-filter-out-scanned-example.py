@@ -1,21 +1,29 @@
+from datetime import datetime, timedelta
+
+from langsmith import Client
+
+# For repeated scans use tools/trace_sync.py instead: it keeps the high-water
+# mark and the ids already seen locally and fetches time windows in parallel.
+#     python tools/trace_sync.py --project prizm-workflow-2 --out traces/
 
 # In your existing script
 def get_new_runs(last_id=None, last_timestamp=None):
     client = Client()
     filters = []
-    
+
     if last_id:
         filters.append(f'gt(id, "{last_id}")')
     if last_timestamp:
         filters.append(f'gt(start_time, "{last_timestamp.isoformat()}")')
-    
+
     return client.list_runs(
         project_name="your_project",
-        filter=" and ".join(filters) if filters else None
+        filter=f"and({', '.join(filters)})" if len(filters) > 1 else (filters[0] if filters else None)
     )
 
 # Usage
-new_runs = get_new_runs(
-    last_id="abc123",
-    last_timestamp=datetime.now() - timedelta(minutes=30)
-)
+if __name__ == "__main__":
+    new_runs = get_new_runs(
+        last_id="abc123",
+        last_timestamp=datetime.now() - timedelta(minutes=30)
+    )
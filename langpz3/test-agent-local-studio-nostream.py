@@ -1,7 +1,12 @@
 import asyncio
 import json
+import os
+import sys
 from langgraph_sdk import get_client
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tools'))
+from run_client import wait_for_run
+
 # 1. Define main() as async function
 async def main():
     client = get_client(url="http://localhost:2024")
@@ -41,22 +46,10 @@ async def main():
     
     print(f"Run ID: {run['run_id']}")
     
-    # 4. Poll status
-    while True:
-        # 5. Use await INSIDE async function
-        status = await client.runs.get(
-            run_id=run["run_id"],
-            thread_id=thread["thread_id"]
-        )
-        
-        print(f"Status: {status['status']}")
-        
-        if status["status"] == "completed":
-            print("Final Output:")
-            print(json.dumps(status, indent=2))
-            break
-            
-        await asyncio.sleep(1)
+    # 4. Wait for completion (the server answers as soon as the run finishes)
+    output = await wait_for_run(client, thread["thread_id"], run["run_id"])
+    print("Final Output:")
+    print(json.dumps(output, indent=2))
 
 # 6. Use asyncio.run() entry point
 if __name__ == "__main__":
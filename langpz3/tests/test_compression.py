@@ -0,0 +1,132 @@
+import gzip
+import json
+import os
+import sys
+import threading
+
+import pytest
+import requests
+from flask import Flask, Response, jsonify
+from werkzeug.serving import make_server
+
+# Add the bridges' shared modules to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'pz3', '_flask-bridge-common'))
+
+import compression
+from compression import available_encodings, install_compression, negotiate
+from customer_router import CustomerRouter
+
+OFFERED = ("zstd", "br", "gzip")
+BIG = {"messages": [{"type": "ai", "content": f"Hello, message {i} about the kitchen renovation"} for i in range(2000)]}
+BODY = json.dumps(BIG).encode()
+
+def test_negotiate_q_values_and_wildcards():
+    assert negotiate("gzip, deflate, br, zstd", OFFERED) == "zstd"
+    assert negotiate("gzip;q=1.0, zstd;q=0.5", OFFERED) == "gzip"
+    assert negotiate("GZIP", OFFERED) == "gzip"
+    assert negotiate("*", OFFERED) == "zstd"
+    assert negotiate("*;q=0.5, gzip", OFFERED) == "gzip"
+    assert negotiate("gzip;q=0, *", OFFERED) == "zstd"
+    assert negotiate("identity;q=0, gzip", OFFERED) == "gzip"
+    # Nothing acceptable is offered: the body goes out uncompressed
+    for header in ("", "identity", "identity;q=0", "*;q=0", "compress, deflate", "gzip;q=abc", "br"):
+        assert negotiate(header, ("gzip",)) is None
+
+def make_app(**options):
+    app = Flask(__name__)
+    body = json.dumps(BIG)
+    app.add_url_rule("/big", "big", lambda: Response(body, mimetype="application/json", headers={"ETag": '"v1"'}))
+    app.add_url_rule("/small", "small", lambda: jsonify({"ok": True}))
+    app.add_url_rule("/error", "error", lambda: Response(body, status=500, mimetype="application/json"))
+    app.add_url_rule("/image", "image", lambda: Response(b"\0" * 5000, mimetype="image/png"))
+    app.add_url_rule("/events", "events", lambda: Response(iter([body]), mimetype="text/event-stream"))
+    app.add_url_rule("/encoded", "encoded", lambda: Response(gzip.compress(body.encode()), mimetype="application/json",
+                                                             headers={"Content-Encoding": "gzip"}))
+    app.add_url_rule("/stream", "stream", lambda: Response((body[i:i + 1000] for i in range(0, len(body), 1000)),
+                                                           mimetype="application/json"))
+    install_compression(app, encodings=["gzip"], **options)
+    return app.test_client(), body.encode()
+
+def test_compresses_large_json_for_accepting_clients():
+    client, body = make_app()
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert int(response.headers["Content-Length"]) == len(response.data) < len(body) // 5
+    assert gzip.decompress(response.data) == body
+    # The ETag named the uncompressed bytes
+    assert response.headers["ETag"] == 'W/"v1"'
+
+    plain = client.get("/big", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in plain.headers and plain.data == body
+    # Caches must not serve the compressed copy to this client
+    assert "Accept-Encoding" in plain.headers["Vary"]
+
+def test_skips_small_encoded_errors_and_binary_bodies():
+    client, body = make_app()
+    headers = {"Accept-Encoding": "gzip"}
+    small = client.get("/small", headers=headers)
+    assert "Content-Encoding" not in small.headers and small.get_json() == {"ok": True}
+    assert "Accept-Encoding" in small.headers["Vary"]
+    encoded = client.get("/encoded", headers=headers)
+    assert gzip.decompress(encoded.data) == body
+    assert client.get("/error", headers=headers).data == body
+    assert "Content-Encoding" not in client.get("/image", headers=headers).headers
+    assert client.get("/events", headers=headers).data == body
+
+@pytest.mark.parametrize("path", ["/big", "/stream"])
+def test_streams_large_and_streamed_bodies(path):
+    client, body = make_app(stream_bytes=len(BODY) // 4)
+    response = client.get(path, headers={"Accept-Encoding": "gzip"}, buffered=False)
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    chunks = list(response.response)
+    assert len(chunks) > 1
+    assert gzip.decompress(b"".join(chunks)) == body
+
+def test_default_stream_threshold():
+    assert compression.COMPRESSION_STREAM_BYTES == 256 * 1024
+    client, body = make_app()
+    big = body * (compression.COMPRESSION_STREAM_BYTES // len(body) + 1)
+    client.application.add_url_rule("/huge", "huge", lambda: Response(big, mimetype="application/json"))
+    response = client.get("/huge", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Length" not in response.headers
+    assert gzip.decompress(response.data) == big
+
+@pytest.mark.skipif(compression.zstandard is None, reason="zstandard not installed")
+def test_zstd_round_trip():
+    codec = compression.Codec("zstd", 1)
+
+    def decompress(data):
+        return compression.zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    assert decompress(codec.compress(BODY)) == BODY
+    assert decompress(b"".join(codec.stream([BODY[:1000], BODY[1000:]]))) == BODY
+    assert "zstd" in available_encodings(["zstd", "gzip"])
+
+def test_router_passes_encoded_bodies_through_once():
+    worker = Flask("worker")
+    worker.add_url_rule("/api/agent", "agent", lambda: Response(BODY, mimetype="application/json"), methods=["POST"])
+    install_compression(worker, encodings=["gzip"])
+    servers = [make_server("127.0.0.1", 0, worker, threaded=True)]
+    # The worker compresses; the router forwards Accept-Encoding and passes the bytes through untouched
+    router = CustomerRouter([f"http://127.0.0.1:{servers[0].server_address[1]}"])
+    servers.append(make_server("127.0.0.1", 0, router, threaded=True))
+    for server in servers:
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servers[1].server_address[1]}/api/agent"
+    try:
+        response = requests.post(url, json={"customer": {"email": "a@x.com"}}, headers={"Accept-Encoding": "gzip"},
+                                 stream=True)
+        wire = response.raw.read(decode_content=False)
+        assert response.headers["Content-Encoding"] == "gzip"
+        assert int(response.headers["Content-Length"]) == len(wire)
+        assert "Accept-Encoding" in response.headers["Vary"]
+        # One layer of gzip, as the worker produced it
+        assert gzip.decompress(wire) == BODY
+
+        plain = requests.post(url, json={"customer": {"email": "a@x.com"}}, headers={"Accept-Encoding": "identity"})
+        assert "Content-Encoding" not in plain.headers and plain.content == BODY
+    finally:
+        for server in servers:
+            server.shutdown()
+            server.server_close()
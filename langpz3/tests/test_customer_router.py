@@ -0,0 +1,107 @@
+import json
+import os
+import subprocess
+import sys
+import threading
+
+import pytest
+import requests
+from flask import Flask, jsonify, request
+from werkzeug.serving import make_server
+
+# Add the bridges' shared modules to the Python path
+COMMON_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'pz3', '_flask-bridge-common')
+sys.path.append(COMMON_DIR)
+
+from customer_router import CustomerRouter, HashRing, customer_key
+
+NODES = [f"http://10.0.0.{i}:8000" for i in range(1, 5)]
+KEYS = [f"customer{i}@example.com" for i in range(2000)]
+
+def owners(ring):
+    return {key: ring.node_for(key) for key in KEYS}
+
+def test_adding_a_node_only_moves_keys_to_it():
+    ring = HashRing(NODES)
+    before = owners(ring)
+    ring.add("http://10.0.0.5:8000")
+    after = owners(ring)
+    moved = [key for key in KEYS if before[key] != after[key]]
+    assert all(after[key] == "http://10.0.0.5:8000" for key in moved)
+    # About 1/5 of the keys belong to the new node
+    assert 0.1 < len(moved) / len(KEYS) < 0.3
+
+def test_removing_a_node_only_moves_its_keys():
+    ring = HashRing(NODES)
+    before = owners(ring)
+    second = {key: list(ring.preference(key))[1] for key in KEYS}
+    ring.remove(NODES[0])
+    after = owners(ring)
+    for key in KEYS:
+        if before[key] == NODES[0]:
+            # Its customers go to the next worker on the ring
+            assert after[key] == second[key]
+        else:
+            assert after[key] == before[key]
+    ring.add(NODES[0])
+    assert owners(ring) == before
+
+def test_ring_is_the_same_in_every_process():
+    # Routers in separate processes (gunicorn workers, other nodes) must agree without sharing state
+    script = ("import json, sys; from customer_router import HashRing; "
+              "ring = HashRing(json.loads(sys.argv[1])); "
+              "print(json.dumps({key: ring.node_for(key) for key in json.loads(sys.argv[2])}))")
+    result = subprocess.run([sys.executable, "-c", script, json.dumps(NODES[::-1]), json.dumps(KEYS)],
+                            cwd=COMMON_DIR, capture_output=True, text=True, check=True,
+                            env=dict(os.environ, PYTHONHASHSEED="123"))
+    assert json.loads(result.stdout) == owners(HashRing(NODES))
+    assert customer_key(b'{"customer": {"email": " Customer1@Example.com "}}') == "Customer1@Example.com"
+    assert customer_key(b"not json") is None
+
+def serve(app):
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def make_worker(name):
+    app = Flask(name)
+
+    @app.route("/api/agent", methods=["POST"])
+    def agent():
+        body = request.get_data()
+        return jsonify({"worker": name, "bytes": len(body), "customer": customer_key(body)})
+    return app
+
+@pytest.fixture
+def router():
+    servers, backends = [], []
+    for name in ("a", "b", "c"):
+        server, url = serve(make_worker(name))
+        servers.append(server)
+        backends.append(url)
+    router = CustomerRouter(backends)
+    server, url = serve(router)
+    servers.append(server)
+    yield router, url
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+def test_proxies_chunked_and_sized_posts_to_the_customers_worker(router):
+    router, url = router
+    payload = json.dumps({"customer": {"email": "test@example.com"}, "task": {"description": "x" * 5000}}).encode()
+
+    def chunks():
+        for i in range(0, len(payload), 1000):
+            yield payload[i:i + 1000]
+
+    # A generator body is sent with Transfer-Encoding: chunked and no Content-Length
+    chunked = requests.post(url + "/api/agent", data=chunks(), headers={"Content-Type": "application/json"})
+    sized = requests.post(url + "/api/agent", data=payload, headers={"Content-Type": "application/json"})
+    for response in (chunked, sized):
+        assert response.status_code == 200
+        assert response.json()["bytes"] == len(payload)
+        assert response.json()["customer"] == "test@example.com"
+        assert response.headers["X-Routed-To"] == router.ring.node_for("test@example.com")
+    stats = requests.get(url + "/router/stats").json()
+    assert stats["requests"] == 2 and stats["keyless"] == 0 and stats["locality"] == 1.0
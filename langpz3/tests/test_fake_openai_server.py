@@ -0,0 +1,64 @@
+import json
+import os
+import sys
+import threading
+
+import httpx
+import pytest
+from langchain_openai import ChatOpenAI
+
+# Add the 'tools' directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'tools'))
+
+import fake_openai_server
+from fake_openai_server import CONFIG, make_server, reset_stats, stats
+
+SENTIMENT_PROMPT = """Analyze the customer's response and determine their sentiment and reason.
+            Response: {}
+
+            Return the analysis in JSON format"""
+
+@pytest.fixture
+def base_url():
+    server = make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    saved = dict(CONFIG)
+    reset_stats()
+    yield f"http://127.0.0.1:{server.server_port}/v1"
+    CONFIG.update(saved)
+    server.shutdown()
+
+def chat(base_url, **kwargs):
+    return ChatOpenAI(model="gpt-4o", api_key="sk-local", base_url=base_url, **kwargs)
+
+def test_sentiment_replies(base_url):
+    model = chat(base_url)
+    positive = json.loads(model.invoke(SENTIMENT_PROMPT.format("Yes, I'll contact them tomorrow. Thanks!")).content)
+    negative = json.loads(model.invoke(SENTIMENT_PROMPT.format("I'm not sure I can afford this")).content)
+    assert positive["sentiment"] == "positive"
+    assert negative["sentiment"] == "negative"
+    assert stats()["connections"] == 1
+
+def test_streaming_matches_non_streaming(base_url):
+    model = chat(base_url)
+    prompt = SENTIMENT_PROMPT.format("Sounds great")
+    chunks = list(model.stream(prompt))
+    assert len(chunks) > 2
+    assert "".join(chunk.content for chunk in chunks) == model.invoke(prompt).content
+    assert stats()["streamed"] == 1
+
+def test_scripted_reply(base_url):
+    CONFIG["script"] = [{"match": "vendor", "reply": {"vendor": "Acme"}}]
+    assert json.loads(chat(base_url).invoke("which vendor?").content) == {"vendor": "Acme"}
+
+def test_rate_limit_sets_retry_after(base_url):
+    CONFIG["rpm"] = 1
+    reset_stats()
+    body = {"model": "gpt-4o", "messages": [{"role": "user", "content": "hi"}]}
+    with httpx.Client() as client:
+        assert client.post(f"{base_url}/chat/completions", json=body).status_code == 200
+        limited = client.post(f"{base_url}/chat/completions", json=body)
+    assert limited.status_code == 429
+    assert int(limited.headers["Retry-After"]) >= 1
+    assert limited.json()["error"]["code"] == "rate_limit_exceeded"
+    assert stats()["rate_limited"] == 1
@@ -0,0 +1,97 @@
+import importlib.util
+import os
+import threading
+import time
+
+import pytest
+import requests
+
+BRIDGE_DIR = os.path.join(os.path.dirname(__file__), '..', '..', 'pz3', '_flask-graph-gcp-bridge')
+
+def load_module(name, filename):
+    spec = importlib.util.spec_from_file_location(name, os.path.join(BRIDGE_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+local_langsmith = load_module("local_langsmith", "local_langsmith.py")
+bridge = load_module("gcp_bridge_main", "main.py")
+
+PAYLOAD = {
+    "customer": {"name": "Test User", "email": "test@example.com", "phoneNumber": "555-012-3456", "zipCode": "94105"},
+    "task": {"description": "Kitchen renovation", "category": "Remodeling"},
+    "vendor": {"name": "Test Vendor", "email": "vendor@example.com", "phoneNumber": "555-987-6543"},
+}
+
+@pytest.fixture
+def langsmith(monkeypatch):
+    """local_langsmith on a free port with the bridge pointed at it"""
+    server = local_langsmith.make_server(port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    config = dict(local_langsmith.CONFIG)
+    local_langsmith.reset_stats()
+    monkeypatch.setattr(bridge, "LANGSMITH_API_URL", f"http://127.0.0.1:{server.server_address[1]}/api/v1")
+    monkeypatch.setattr(bridge, "API_KEY", "test-key")
+    yield local_langsmith.CONFIG
+    local_langsmith.CONFIG.clear()
+    local_langsmith.CONFIG.update(config)
+    server.shutdown()
+    server.server_close()
+
+def post(payload=PAYLOAD):
+    return bridge.app.test_client().post("/workflow", json=payload, headers={"x-api-key": "test-key"})
+
+def test_latency_specs():
+    assert local_langsmith.parse_latency("0")() == 0.0
+    assert local_langsmith.parse_latency("fixed:50")() == 0.05
+    assert 0.02 <= local_langsmith.parse_latency("uniform:20:200")() <= 0.2
+    with pytest.raises(ValueError):
+        local_langsmith.parse_latency("gamma:1")
+
+def test_invokes_through_the_stand_in_and_reuses_connections(langsmith):
+    for _ in range(3):
+        response = post()
+        assert response.status_code == 200
+        result = response.get_json()
+        assert result["summary"] == "Task: Kitchen renovation, Vendor: Test Vendor"
+        assert result["customer"]["phoneNumber"] == "5550123456"
+    stats = local_langsmith.stats()
+    assert stats["requests"] == 3 and stats["connections"] == 1
+
+def test_upstream_errors_and_rejected_payloads(langsmith):
+    langsmith["error_rate"] = 1.0
+    response = post()
+    assert response.status_code == 500
+    assert response.get_json()["detail"].startswith("Injected error")
+    response = post({"customer": {}, "task": {}})
+    assert response.status_code == 400
+    assert local_langsmith.stats()["requests"] == 1
+
+def test_bad_bodies_and_workflow_failures_get_http_errors(langsmith, monkeypatch):
+    def broken_workflow(data):
+        raise RuntimeError("graph exploded")
+    monkeypatch.setattr(local_langsmith, "fake_workflow", broken_workflow)
+    url = bridge.LANGSMITH_API_URL + "/projects/p/graphs/g/invoke"
+    with requests.Session() as session:
+        response = session.post(url, data=b"{not json", headers={"Content-Type": "application/json"})
+        assert response.status_code == 400
+        assert response.json()["detail"].startswith("Invalid JSON body")
+        response = session.post(url, json=PAYLOAD)
+        assert response.status_code == 500
+        assert "graph exploded" in response.json()["detail"]
+    # The bridge sees the upstream error, not a dropped connection
+    response = post()
+    assert response.status_code == 500
+    assert "graph exploded" in response.get_json()["detail"]
+
+def test_slow_response_times_out_at_the_deadline(langsmith, monkeypatch):
+    monkeypatch.setattr(bridge, "LANGSMITH_TIMEOUT", 0.6)
+    # Headers after 0.4s, then one body chunk per second: a per-read timeout alone would wait past 1s
+    langsmith.update(latency="fixed:400", slow_loris_rate=1.0, slow_loris_seconds=100)
+    start = time.monotonic()
+    response = post()
+    elapsed = time.monotonic() - start
+    assert response.status_code == 504
+    assert response.get_json()["error"] == "Workflow timed out"
+    assert elapsed < 0.9
+    assert local_langsmith.stats()["slow_loris"] == 1
@@ -0,0 +1,89 @@
+import operator
+import os
+import sys
+from typing import Annotated, List, TypedDict
+
+import pytest
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+from langgraph.graph import END, StateGraph
+
+# Add the 'agent' directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+from graph_fusion import compile_graph, find_linear_chains, fuse_linear_chains
+from message_log import MessageLogChannel
+
+class State(TypedDict):
+    messages: Annotated[List[BaseMessage], MessageLogChannel()]
+    steps: Annotated[list, operator.add]
+    count: int
+
+def make_graph(fail_at=None):
+    def node(name, increment):
+        def run(state: State):
+            if name == fail_at:
+                raise RuntimeError(name)
+            # Later nodes must see earlier writes from the same chain
+            return {
+                "messages": [AIMessage(content=f"{name} saw {len(state['messages'])}")],
+                "steps": [name],
+                "count": state["count"] + increment,
+            }
+        return run
+
+    graph = StateGraph(State)
+    for name, increment in [("a", 1), ("b", 10), ("c", 100), ("d", 1000)]:
+        graph.add_node(name, node(name, increment))
+    graph.set_entry_point("a")
+    graph.add_edge("a", "b")
+    graph.add_edge("b", "c")
+    graph.add_edge("c", "d")
+    graph.add_edge("d", END)
+    return graph
+
+def run(app):
+    return app.invoke({"messages": [HumanMessage(content="hi")], "steps": [], "count": 0})
+
+def test_finds_chains_around_barriers():
+    graph = make_graph()
+    assert find_linear_chains(graph) == [["a", "b", "c", "d"]]
+    assert find_linear_chains(graph, barriers={"c"}) == [["a", "b"]]
+    assert find_linear_chains(graph, barriers={"b", "c"}) == []
+
+def test_branches_end_chains():
+    graph = make_graph()
+    graph.edges.discard(("b", "c"))
+    graph.add_conditional_edges("b", lambda state: "c", {"c": "c"})
+    assert find_linear_chains(graph) == [["a", "b"], ["c", "d"]]
+    assert [m.content for m in run(compile_graph(graph, fuse=True))["messages"]] == [
+        m.content for m in run(graph.compile())["messages"]
+    ]
+
+@pytest.mark.parametrize("barriers", [(), {"c"}])
+def test_fused_graph_matches_unfused(barriers):
+    graph = make_graph()
+    plain = run(compile_graph(graph))
+    fused_app = compile_graph(graph, fuse=True, barriers=barriers)
+    fused = run(fused_app)
+    assert fused["count"] == plain["count"] == 1111
+    assert fused["steps"] == plain["steps"] == ["a", "b", "c", "d"]
+    assert [m.content for m in fused["messages"]] == [m.content for m in plain["messages"]]
+    assert len({m.id for m in fused["messages"]}) == 5
+    # The original graph is left as it was
+    assert set(graph.nodes) == {"a", "b", "c", "d"}
+    assert len(fused_app.builder.nodes) < 4
+
+def test_failure_inside_chain_does_not_leak_writes():
+    graph = fuse_linear_chains(make_graph(fail_at="c"))
+    history = [HumanMessage(content="hi")]
+    with pytest.raises(RuntimeError):
+        graph.compile().invoke({"messages": history, "steps": [], "count": 0})
+    assert len(history) == 1
+
+def test_workflow2_chains():
+    import workflow2
+
+    assert find_linear_chains(workflow2.workflow, workflow2.FUSION_BARRIERS) == [
+        ["validate", "initialize_state", "generate_initial_prompt"],
+        ["process_sentiment", "process", "format"],
+    ]
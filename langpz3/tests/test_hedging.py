@@ -0,0 +1,85 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+
+from langchain_core.messages import AIMessage
+
+# Add the 'agent' directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+from hedging import HedgePolicy, hedged_model
+
+class ScriptedModel:
+    """Answers with its call number after the scripted delay for that call"""
+
+    def __init__(self, delays):
+        self.delays = list(delays)
+        self.calls = 0
+        self.cancelled = 0
+        self._lock = threading.Lock()
+
+    def _next(self):
+        with self._lock:
+            self.calls += 1
+            return self.calls, self.delays[(self.calls - 1) % len(self.delays)]
+
+    def invoke(self, messages, stop=None, **kwargs):
+        call, delay = self._next()
+        time.sleep(delay)
+        return AIMessage(content=f"call {call}")
+
+    async def ainvoke(self, messages, stop=None, **kwargs):
+        call, delay = self._next()
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return AIMessage(content=f"call {call}")
+
+def warmed_policy(budget=1.0, latency=0.01, samples=5):
+    policy = HedgePolicy(percentile=95, budget=budget, min_samples=5, burst=5)
+    for _ in range(samples):
+        policy.record(latency)
+    return policy
+
+def test_slow_call_is_hedged_and_hedge_wins():
+    inner = ScriptedModel([0.5, 0.01])
+    policy = warmed_policy()
+    start = time.perf_counter()
+    reply = hedged_model(inner, policy).invoke("hi")
+    assert time.perf_counter() - start < 0.3
+    assert reply.content == "call 2"
+    assert policy.stats["hedged"] == 1 and policy.stats["hedge_won"] == 1
+
+def test_no_hedge_before_min_samples_or_without_budget():
+    inner = ScriptedModel([0.05])
+    cold = HedgePolicy(min_samples=5, budget=1.0)
+    hedged_model(inner, cold).invoke("hi")
+    assert inner.calls == 1 and cold.stats["hedged"] == 0
+
+    broke = warmed_policy(budget=0.0)
+    hedged_model(inner, broke).invoke("hi")
+    assert inner.calls == 2
+    assert broke.stats["budget_denied"] == 1 and broke.stats["hedged"] == 0
+
+def test_budget_caps_hedge_rate():
+    inner = ScriptedModel([0.03])
+    # Enough fast history that p95 stays below every call made here
+    policy = warmed_policy(budget=0.1, latency=0.001, samples=1000)
+    model = hedged_model(inner, policy)
+    for _ in range(40):
+        model.invoke("hi")
+    # 0.1 tokens per call: 40 calls earn 4 hedges
+    assert policy.stats["budget_denied"] == 36
+    assert policy.stats["hedged"] == 4
+    assert inner.calls == 44
+
+def test_async_hedge_cancels_the_loser():
+    inner = ScriptedModel([0.5, 0.01])
+    policy = warmed_policy()
+    reply = asyncio.run(hedged_model(inner, policy).ainvoke("hi"))
+    assert reply.content == "call 2"
+    assert inner.cancelled == 1
@@ -0,0 +1,40 @@
+import os
+import sys
+
+# Add the 'agent' directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+from intent_router import (BOND7_ROUTER, NUMBER, SMALL_TALK_ROUTER, WORKFLOW_FIXED_ROUTER, IntentMatch,
+                           IntentRouter, IntentRule)
+
+def test_bond7_intents_and_rules():
+    assert BOND7_ROUTER.classify("Add task: call the plumber") == IntentMatch("add_todo", "add_todo")
+    assert BOND7_ROUTER.classify("please LIST my todos") == IntentMatch("view_todos", "show_todos")
+    assert BOND7_ROUTER.classify("Next page!") == IntentMatch("view_todos", "next_page")
+    assert BOND7_ROUTER.classify("what's next for the page layout").rule is None
+    assert BOND7_ROUTER.classify("done with 3") == IntentMatch("complete_todo", "complete_todo")
+    assert BOND7_ROUTER.classify("ok bye") == IntentMatch("end_conversation", "goodbye")
+    # Whole words only: "address" is not "add", "maybe" is not "bye"
+    assert BOND7_ROUTER.classify("update the address on my task") == IntentMatch("general_question", None)
+    assert BOND7_ROUTER.classify("maybe later") == IntentMatch("general_question", None)
+
+def test_priorities_phrases_and_prefixes():
+    assert SMALL_TALK_ROUTER.classify("Hi, how are you?").intent == "greeting"
+    assert SMALL_TALK_ROUTER.classify("how   are you today").intent == "how_are_you"
+    assert SMALL_TALK_ROUTER.classify("Thanks a lot").intent == "thanks"
+    assert SMALL_TALK_ROUTER.classify("what are your capabilities").intent == "capabilities"
+    assert SMALL_TALK_ROUTER.classify("this is fine").intent == "default"
+
+    assert WORKFLOW_FIXED_ROUTER.classify("Bye.").intent == "end_conversation"
+    assert WORKFLOW_FIXED_ROUTER.classify("bye for now?").intent == "process_additional"
+    assert WORKFLOW_FIXED_ROUTER.classify("Can we reschedule?").intent == "reschedule"
+    assert WORKFLOW_FIXED_ROUTER.classify("sounds good").intent is None
+
+def test_batch_matches_single():
+    router = IntentRouter([
+        IntentRule("low", "low", 1, any_of=("order",)),
+        IntentRule("high", "high", 9, all_of=[("cancel*",), ("order", NUMBER)]),
+    ], default="none")
+    messages = ["cancel order", "Cancelled 42", "order", "cancel", "order"] * 3
+    assert router.classify_batch(messages) == [router.classify(m) for m in messages]
+    assert [m.rule for m in router.classify_batch(messages[:4])] == ["high", "high", "low", None]
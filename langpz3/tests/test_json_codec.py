@@ -0,0 +1,40 @@
+import datetime
+import os
+import sys
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, convert_to_messages
+
+# Add the 'agent' directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+import json_codec
+from message_log import append_messages
+
+@pytest.fixture(params=["orjson", "json"])
+def backend(request, monkeypatch):
+    if request.param == "orjson" and json_codec.orjson is None:
+        pytest.skip("orjson not installed")
+    monkeypatch.setattr(json_codec, "BACKEND", request.param)
+    return request.param
+
+def test_compact_output_round_trips(backend):
+    value = {"a": [1, 2.5, None, True], "b": {"é": "ü"}}
+    encoded = json_codec.dumpb(value)
+    assert b" " not in encoded
+    assert json_codec.loads(encoded) == value
+    assert json_codec.loads(json_codec.dumps(value)) == value
+
+def test_messages_encode_and_convert_back(backend):
+    log = append_messages([], [HumanMessage(content="hi", id="1"), AIMessage(content="a", name="bot", id="2")])
+    decoded = json_codec.loads(json_codec.dumps({"messages": log}))
+    assert decoded["messages"][0] == {"type": "human", "content": "hi", "id": "1"}
+    assert decoded["messages"][1]["name"] == "bot"
+    assert convert_to_messages(decoded["messages"]) == list(log)
+
+def test_extra_types_and_default(backend):
+    assert json_codec.loads(json_codec.dumps({"when": datetime.date(2025, 1, 2), "tags": {"x"}})) == {
+        "when": "2025-01-02", "tags": ["x"]}
+    with pytest.raises(TypeError):
+        json_codec.dumps(object())
+    assert json_codec.loads(json_codec.dumps(object, default=lambda o: "obj")) == "obj"
@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+
+import pytest
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import HumanMessage
+
+# Add the 'agent' directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+import llm_cassette
+import model_registry
+from llm_cassette import CassetteMiss, cassette_model, get_store, prompt_key
+
+PROMPT = """Analyze the customer's response.
+            Response: yes
+            Return JSON"""
+
+def test_record_then_replay_without_a_model(tmp_path):
+    path = str(tmp_path / "llm.jsonl")
+    inner = FakeListChatModel(responses=['{"sentiment": "positive"}'])
+    recorder = cassette_model(inner, "gpt-4o", mode="record", path=path)
+    assert recorder.invoke(PROMPT).content == '{"sentiment": "positive"}'
+
+    # A fresh process would reload the file; reindented prompts share the key
+    llm_cassette._stores.clear()
+    player = cassette_model(None, "gpt-4o", mode="replay", path=path, latency="none")
+    assert player.invoke("Analyze the customer's response. Response: yes\nReturn JSON").content == '{"sentiment": "positive"}'
+    with pytest.raises(CassetteMiss):
+        player.invoke("something else")
+
+def test_key_depends_on_model_temperature_stop_and_params():
+    messages = [HumanMessage(content="hi")]
+    assert prompt_key("gpt-4o", 0, messages) != prompt_key("gpt-4o", 0.7, messages)
+    assert prompt_key("gpt-4o", 0, messages) != prompt_key("gpt-4", 0, messages)
+    assert prompt_key("gpt-4o", 0, messages) != prompt_key("gpt-4o", 0, messages, stop=["\n"])
+    assert prompt_key("gpt-4o", 0, messages, params={"max_tokens": 10}) != prompt_key(
+        "gpt-4o", 0, messages, params={"max_tokens": 20})
+    assert prompt_key("gpt-4o", 0, messages, params={}) == prompt_key("gpt-4o", 0, messages)
+
+def get_weather(city: str) -> str:
+    """Look up the weather in a city"""
+    return "sunny"
+
+def test_stop_kwargs_and_bound_tools_get_their_own_recordings(tmp_path):
+    path = str(tmp_path / "llm.jsonl")
+    inner = FakeListChatModel(responses=["plain", "stopped", "with tools", "short"])
+    recorder = cassette_model(inner, "gpt-4o", mode="record", path=path)
+    recorder.invoke("hi")
+    recorder.invoke("hi", stop=["\n"])
+    recorder.bind_tools([get_weather]).invoke("hi")
+    cassette_model(inner, "gpt-4o", mode="record", path=path, model_kwargs={"max_tokens": 5}).invoke("hi")
+    assert len(get_store(path).entries) == 4
+
+    player = cassette_model(None, "gpt-4o", mode="replay", path=path, latency="none")
+    assert player.invoke("hi").content == "plain"
+    assert player.invoke("hi", stop=["\n"]).content == "stopped"
+    assert player.bind_tools([get_weather]).invoke("hi").content == "with tools"
+    short = cassette_model(None, "gpt-4o", mode="replay", path=path, latency="none", model_kwargs={"max_tokens": 5})
+    assert short.invoke("hi").content == "short"
+    with pytest.raises(CassetteMiss):
+        player.bind_tools([get_weather], tool_choice="get_weather").invoke("hi")
+
+def test_auto_records_once_and_replays_with_scaled_latency(tmp_path):
+    path = str(tmp_path / "llm.jsonl")
+    inner = FakeListChatModel(responses=["first", "second"])
+    model = cassette_model(inner, "gpt-4o", mode="auto", path=path, latency="x0")
+    assert model.invoke("hi").content == "first"
+    assert model.invoke("hi").content == "first"
+    assert inner.i == 1
+    entry = next(iter(get_store(path).entries.values()))
+    assert entry["latency_ms"] >= 0 and entry["content"] == "first"
+    assert llm_cassette.replay_delay("x0.5", 200) == 0.1
+    assert llm_cassette.replay_delay("50", 200) == 0.05
+
+def test_registry_replays_without_api_key(tmp_path, monkeypatch):
+    path = str(tmp_path / "llm.jsonl")
+    cassette_model(FakeListChatModel(responses=["recorded"]), "gpt-4o", mode="record", path=path).invoke("hi")
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.setattr(model_registry, "LLM_CASSETTE_MODE", "replay")
+    monkeypatch.setattr(llm_cassette, "LLM_CASSETTE_PATH", path)
+    monkeypatch.setattr(llm_cassette, "LLM_CASSETTE_LATENCY", "none")
+    model_registry.close_models()
+    try:
+        assert model_registry.get_chat_model("openai").invoke("hi").content == "recorded"
+    finally:
+        model_registry.close_models()
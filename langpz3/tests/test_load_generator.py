@@ -0,0 +1,73 @@
+import asyncio
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+# Add the 'tools' directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'tools'))
+
+from load_generator import LogHistogram, load_memory_corpus, ramp
+
+class SlowHandler(BaseHTTPRequestHandler):
+    """Answers after 50ms; every 10th request gets a 503"""
+    protocol_version = "HTTP/1.1"
+    count = 0
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        assert payload["messages"][0]["type"] == "human"
+        with SlowHandler.lock:
+            SlowHandler.count += 1
+            status = 503 if SlowHandler.count % 10 == 0 else 200
+        time.sleep(0.05)
+        self.send_response(status)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"{}")
+
+def test_histogram_percentiles_within_precision():
+    histogram = LogHistogram()
+    for ms in range(1, 1001):
+        histogram.record(ms / 1000)
+    assert abs(histogram.percentile(50) - 0.5) / 0.5 < 0.02
+    assert abs(histogram.percentile(99) - 0.99) / 0.99 < 0.02
+    assert histogram.percentile(100) == histogram.max == 1.0
+
+def test_hgrm_output(tmp_path):
+    histogram = LogHistogram()
+    for value in (0.01, 0.02, 0.03):
+        histogram.record(value)
+    histogram.write_hgrm(str(tmp_path / "out.hgrm"))
+    lines = (tmp_path / "out.hgrm").read_text().splitlines()
+    assert lines[0].split()[0] == "Value"
+    assert lines[-1].startswith("#[Max")
+
+def test_memory_corpus(tmp_path):
+    with open(tmp_path / "a@example.com_messages.pkl", "wb") as f:
+        pickle.dump([AIMessage(content="Hi"), HumanMessage(content="Sounds great")], f)
+    assert load_memory_corpus(str(tmp_path)) == ["Sounds great"]
+
+def test_open_loop_keeps_rate_and_breaks_down_errors():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SlowHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/api/agent"
+    try:
+        rows = asyncio.run(ramp(url, [40], 1.0, ["Yes, sounds good"]))
+    finally:
+        server.shutdown()
+    row = rows[0]
+    # 40 req/s for 1s against a 50ms server: sends are not held back by responses
+    assert row["sent"] == 40
+    assert row["errors"] == {"http_503": 4}
+    assert 50 <= row["p50_ms"] < 500
@@ -0,0 +1,108 @@
+import os
+import pickle
+import sys
+
+import numpy as np
+import pytest
+
+# Add the 'agent' directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+from local_sentiment import (
+    LABELS,
+    N_FEATURES,
+    LocalSentimentModel,
+    extract_features,
+    load_labelled_utterances,
+    train
+)
+
+SAMPLES = [
+    ("Yes, I'll contact them tomorrow. Thanks!", "positive"),
+    ("Sounds great, I'll reach out right away.", "positive"),
+    ("Perfect, yes let's do it", "positive"),
+    ("I'm concerned about the budget.", "negative"),
+    ("No, I can't afford this right now.", "negative"),
+    ("I won't be able to, the cost is too high", "negative"),
+    ("What does the vendor do exactly?", "unknown"),
+    ("Let me check something first", "unknown"),
+]
+
+@pytest.fixture(scope="module")
+def model():
+    return train(SAMPLES, epochs=200)
+
+def test_features_include_bias_and_are_bounded():
+    features = extract_features("Yes, thanks a lot")
+    assert features[-1] == N_FEATURES
+    assert all(0 <= f <= N_FEATURES for f in features)
+    assert extract_features("") == [N_FEATURES]
+
+def test_fits_training_data(model):
+    predictions = model.predict([text for text, _ in SAMPLES])
+    assert [label for label, _ in predictions] == [label for _, label in SAMPLES]
+    assert all(0.0 < confidence <= 1.0 for _, confidence in predictions)
+
+def test_batch_matches_single(model):
+    texts = [text for text, _ in SAMPLES]
+    batch = model.predict_proba(texts)
+    assert batch.shape == (len(texts), len(LABELS))
+    for row, text in enumerate(texts):
+        single = model.predict_proba([text])[0]
+        assert np.allclose(batch[row], single, atol=1e-6)
+
+def test_save_and_mmap_load(model, tmp_path):
+    path = str(tmp_path / "sentiment.npy")
+    model.save(path)
+    loaded = LocalSentimentModel.load(path)
+    assert isinstance(loaded.weights, np.memmap)
+    assert loaded.predict(["No, too expensive"]) == model.predict(["No, too expensive"])
+
+def test_labels_recovered_from_memory_replies(tmp_path):
+    history = [
+        {"type": "ai", "content": "Can you reach out to them today?"},
+        {"type": "human", "content": "yes"},
+        {"type": "ai", "content": "Wonderful, talk to you soon."},
+        {"type": "human", "content": "no"},
+        {"type": "ai", "content": "Something unrelated"},
+    ]
+    with open(tmp_path / "someone@example.com_messages.pkl", "wb") as f:
+        pickle.dump(history, f)
+    samples = list(load_labelled_utterances(str(tmp_path), {"Wonderful, talk to you soon.": "positive"}))
+    assert samples == [("yes", "positive")]
+
+def test_train_requires_samples():
+    with pytest.raises(ValueError):
+        train([("hello", "not-a-label")])
+
+def test_labels_from_workflow2_histories(tmp_path, monkeypatch):
+    import workflow2
+    from langchain_core.messages import HumanMessage
+    monkeypatch.setattr(workflow2, "MEMORY_DIR", str(tmp_path))
+    monkeypatch.setattr(workflow2, "MOCK_USER_RESPONSES", True)
+    monkeypatch.setattr(workflow2, "MOCK_SENTIMENT_ANALYSIS", True)
+    # A fixed mock reply: the keyword rules call some of them unknown, which drops the turn
+    monkeypatch.setattr(workflow2.random, "choice", lambda options: options[0])
+    state = {
+        "task": {"description": "Leaking pipe", "category": "Plumbing"},
+        "vendor": {"name": "Test Vendor", "email": "vendor@example.com", "phoneNumber": "555-0100"},
+    }
+    def customer(email):
+        return {"name": "Test User", "email": email, "phoneNumber": "555-0123", "zipCode": "94105"}
+    # Human turn sent with the request: human, system prompt, greeting, then the reply
+    workflow2.app.invoke(dict(state, customer=customer("a@example.com"),
+                              messages=[HumanMessage(content="No, I can't afford this right now.")]))
+    # Mock user response: system prompt, greeting, human, reply
+    workflow2.app.invoke(dict(state, customer=customer("b@example.com")))
+    # Fallback reply, as after a failed analysis
+    with open(tmp_path / "c@example.com_messages.pkl", "wb") as f:
+        pickle.dump([("ai", "Hello", "1"), ("human", "I have some concerns about the timeline.", "2"),
+                     ("ai", workflow2.SENTIMENT_REPLIES["unknown"], "3")], f)
+
+    reply_labels = {workflow2.SENTIMENT_REPLIES[label]: label for label in ("positive", "negative")}
+    skip_replies = {workflow2.SENTIMENT_REPLIES["unknown"]}
+    samples = list(load_labelled_utterances(str(tmp_path), reply_labels, skip_replies))
+    with open(tmp_path / "b@example.com_messages.pkl", "rb") as f:
+        mocked = [record[1] for record in pickle.load(f) if record[0] == "human"]
+    assert samples[0] == ("No, I can't afford this right now.", "negative")
+    assert [text for text, _ in samples] == ["No, I can't afford this right now."] + mocked
@@ -0,0 +1,155 @@
+import os
+import pickle
+import sys
+import time
+from typing import Annotated, List, TypedDict
+
+import pytest
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, RemoveMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, StateGraph
+
+# Add the 'agent' directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+from message_log import (
+    CompactMessage, MessageLog, MessageLogChannel, append_messages, from_records, last_message, to_records,
+)
+
+def test_first_update_copies_the_input():
+    original = [HumanMessage(content="hi")]
+    log = append_messages([], original)
+    assert isinstance(log, MessageLog)
+    assert log is not original
+    assert log[0].id is not None
+
+def test_appends_to_a_copy():
+    log = append_messages([], [HumanMessage(content="hi")])
+    updated = append_messages(log, AIMessage(content="hello"))
+    assert updated is not log
+    assert [m.content for m in updated] == ["hi", "hello"]
+    assert [m.content for m in log] == ["hi"]
+
+def test_dedups_by_id():
+    log = append_messages([], [HumanMessage(content="hi", id="1"), AIMessage(content="a", id="2")])
+    log = append_messages(log, [AIMessage(content="b", id="2"), HumanMessage(content="c", id="3")])
+    assert [m.content for m in log] == ["hi", "b", "c"]
+
+def test_converts_stored_dict_messages():
+    log = append_messages([], [{"type": "human", "content": "from memory"}, {"type": "ai", "content": "ok"}])
+    assert isinstance(log[0], HumanMessage)
+    assert isinstance(log[1], AIMessage)
+
+def test_remove_message():
+    original = append_messages([], [HumanMessage(content="a", id="1"), HumanMessage(content="b", id="2")])
+    log = append_messages(original, [RemoveMessage(id="1"), HumanMessage(content="c", id="3")])
+    assert [m.id for m in log] == ["2", "3"]
+    assert [m.id for m in original] == ["1", "2"]
+    log = append_messages(log, [AIMessage(content="d", id="2")])
+    assert [m.content for m in log] == ["d", "c"]
+    with pytest.raises(ValueError):
+        append_messages(log, [RemoveMessage(id="missing")])
+
+def test_log_holds_compact_records_and_converts_lazily():
+    call = AIMessage(content="", tool_calls=[{"name": "lookup", "args": {}, "id": "call-1"}])
+    log = append_messages([], [("human", "hi", "1"), HumanMessage(content="there", id="2"), call])
+    records = list(log.records())
+    assert [type(r) for r in records] == [CompactMessage, CompactMessage, AIMessage]
+    assert all(r._message is None for r in records[:2])
+    # Converted on first access, then cached
+    assert log[1] is log[1] and isinstance(log[1], HumanMessage)
+    assert last_message(log, "human").content == "there"
+    assert records[0]._message is None
+    assert log[2] is call
+    assert log == [HumanMessage(content="hi", id="1"), HumanMessage(content="there", id="2"), call]
+
+def test_snapshots_share_the_backing_until_they_diverge():
+    base = append_messages([], [HumanMessage(content="a", id="1")])
+    grown = append_messages(base, [AIMessage(content="b", id="2")])
+    assert grown._backing is base._backing
+    # Appending to an older snapshot forks it; the newer one is unchanged
+    fork = append_messages(base, [AIMessage(content="c", id="3")])
+    assert fork._backing is not base._backing
+    assert [m.content for m in fork] == ["a", "c"]
+    assert [m.content for m in grown] == ["a", "b"]
+    # A replacement by id forks too
+    replaced = append_messages(grown, [AIMessage(content="B", id="2")])
+    assert [m.content for m in replaced] == ["a", "B"]
+    assert [m.content for m in grown] == ["a", "b"]
+
+def test_per_step_cost_does_not_grow_with_history():
+    def per_step(size):
+        channel = MessageLogChannel()
+        channel.update([[("human", f"turn {i}", f"m{i}") for i in range(size)]])
+        best = float("inf")
+        for repeat in range(5):
+            start = time.perf_counter()
+            for step in range(200):
+                channel.update([[AIMessage(content="reply", id=f"r{repeat}-{step}")]])
+                channel.checkpoint()
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    small, large = per_step(1_000), per_step(100_000)
+    # Copying the history each step would make this about 100x
+    assert large < 3 * small
+
+def test_channel_checkpoint_round_trip():
+    channel = MessageLogChannel()
+    call = AIMessage(content="", tool_calls=[{"name": "lookup", "args": {}, "id": "call-1"}])
+    channel.update([[("human", f"turn {i}", str(i)) for i in range(600)] + [call]])
+    checkpoint = channel.checkpoint()
+    restored = channel.from_checkpoint(pickle.loads(pickle.dumps(checkpoint)))
+    assert restored.get() == channel.get()
+    assert type(list(restored.get().records())[0]) is CompactMessage
+    # Checkpoints written with the plain reducer still load
+    legacy = channel.from_checkpoint([HumanMessage(content="old", id="1")])
+    assert [m.content for m in legacy.get()] == ["old"]
+
+def test_records_round_trip():
+    log = append_messages([], [HumanMessage(content="hi", id="1"), AIMessage(content="a", name="bot", id="2")])
+    records = pickle.loads(pickle.dumps(to_records(log)))
+    assert records[0] == ("human", "hi", "1")
+    assert isinstance(records[1], AIMessage)
+    restored = append_messages([], from_records(records))
+    assert restored == log
+    assert restored[1].name == "bot"
+
+def test_snapshots_and_checkpoints_keep_their_history():
+    class State(TypedDict):
+        messages: Annotated[List[BaseMessage], MessageLogChannel()]
+
+    graph = StateGraph(State)
+    for name in ("a", "b"):
+        graph.add_node(name, lambda state, name=name: {"messages": [AIMessage(content=name)]})
+    graph.set_entry_point("a")
+    graph.add_edge("a", "b")
+    graph.add_edge("b", END)
+    app = graph.compile(checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "1"}}
+
+    snapshots = list(app.stream({"messages": [HumanMessage(content="hi")]}, config, stream_mode="values"))
+    assert [len(snapshot["messages"]) for snapshot in snapshots] == [1, 2, 3]
+    history = [len(checkpoint.values.get("messages", [])) for checkpoint in app.get_state_history(config)]
+    assert history == [3, 2, 1, 0]
+
+def test_checkpoint_round_trip(caplog):
+    class State(TypedDict):
+        messages: Annotated[List[BaseMessage], MessageLogChannel()]
+
+    graph = StateGraph(State)
+    graph.add_node("reply", lambda state: {"messages": [AIMessage(content=f"seen {len(state['messages'])}")]})
+    graph.set_entry_point("reply")
+    graph.add_edge("reply", END)
+    app = graph.compile(checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "1"}}
+
+    app.invoke({"messages": from_records([("human", "hi", "1")])}, config)
+    # A resumed thread starts from the checkpointed messages
+    result = app.invoke({"messages": [HumanMessage(content="again", id="3")]}, config)
+    assert [m.content for m in result["messages"]] == ["hi", "seen 1", "again", "seen 3"]
+    saved = app.get_state(config).values["messages"]
+    assert all(type(r) is CompactMessage for r in saved.records())
+    assert all(isinstance(m, BaseMessage) for m in saved)
+    assert saved == result["messages"]
+    assert "Could not reconstruct" not in caplog.text and "unregistered type" not in caplog.text
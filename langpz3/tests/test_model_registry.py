@@ -0,0 +1,42 @@
+import os
+import sys
+
+import pytest
+from langchain_core.messages import HumanMessage, SystemMessage
+
+# Add the 'agent' directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+import model_registry
+from model_registry import close_models, get_chat_model, with_system_prompt
+
+@pytest.fixture(autouse=True)
+def fresh_registry(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+    close_models()
+    yield
+    close_models()
+
+def test_same_config_returns_same_client():
+    assert get_chat_model("openai") is get_chat_model("openai")
+    assert get_chat_model("openai") is get_chat_model("gpt-4o", temperature=0)
+
+def test_config_changes_get_their_own_client():
+    assert get_chat_model("openai") is not get_chat_model("openai", temperature=0.7)
+    assert get_chat_model("gpt-4") is not get_chat_model("gpt-4o")
+
+def test_models_share_connection_pool():
+    first = get_chat_model("openai")
+    second = get_chat_model("gpt-4", temperature=0.7)
+    http_client, http_async_client = model_registry._http_clients
+    assert first.http_client is http_client is second.http_client
+    assert first.http_async_client is http_async_client is second.http_async_client
+
+def test_system_prompt_is_applied_per_call():
+    messages = with_system_prompt("hello", "be brief")
+    assert isinstance(messages[0], SystemMessage) and messages[0].content == "be brief"
+    assert isinstance(messages[1], HumanMessage) and messages[1].content == "hello"
+
+    history = [HumanMessage(content="hi")]
+    assert with_system_prompt(history) == history
+    assert with_system_prompt(history, "x")[1:] == history
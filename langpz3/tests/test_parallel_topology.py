@@ -0,0 +1,69 @@
+import os
+import sys
+import threading
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+
+# Add the 'agent' directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+import workflow2
+
+def make_state(reply="Sounds great, I'll call them tomorrow"):
+    return {
+        "customer": {"name": "Test User", "email": "parallel@example.com", "phoneNumber": "555-0123", "zipCode": "12345"},
+        "task": {"description": "Kitchen renovation", "category": "Home Improvement"},
+        "vendor": {"name": "Dave's Plumbing", "email": "dave@plumbing.com", "phoneNumber": "555-9876"},
+        "messages": [HumanMessage(content=reply)] if reply else [],
+    }
+
+def outcome(result):
+    return result["sentiment"], result["summary"], [(m.type, m.content) for m in result["messages"]]
+
+@pytest.fixture
+def memory_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(workflow2, "MEMORY_DIR", str(tmp_path))
+    monkeypatch.setattr(workflow2, "MOCK_USER_RESPONSES", False)
+    return tmp_path
+
+def test_parallel_matches_serial(memory_dir, monkeypatch):
+    monkeypatch.setattr(workflow2, "MOCK_SENTIMENT_ANALYSIS", True)
+    serial = [outcome(workflow2.app.invoke(make_state())) for _ in range(2)]
+    for path in memory_dir.iterdir():
+        path.unlink()
+    parallel = [outcome(workflow2.parallel_app.invoke(make_state())) for _ in range(2)]
+    # The second run of each restores the first run's history
+    assert parallel == serial
+    assert serial[0][0] == "positive"
+
+def test_mock_reply_keeps_the_serial_history_order(memory_dir, monkeypatch):
+    # Requests without a reply get a mock one, appended after the greeting
+    monkeypatch.setattr(workflow2, "MOCK_USER_RESPONSES", True)
+    monkeypatch.setattr(workflow2, "MOCK_SENTIMENT_ANALYSIS", True)
+    monkeypatch.setattr(workflow2.random, "choice", lambda options: options[0])
+    serial = [outcome(workflow2.app.invoke(make_state(reply=None))) for _ in range(2)]
+    for path in memory_dir.iterdir():
+        path.unlink()
+    parallel = [outcome(workflow2.parallel_app.invoke(make_state(reply=None))) for _ in range(2)]
+    assert parallel == serial
+    assert [kind for kind, _ in serial[0][2]] == ["system", "ai", "human", "ai"]
+
+def test_branches_overlap(memory_dir, monkeypatch):
+    # The memory load and the model call each wait for the other: they only
+    # both get through if they run at the same time
+    rendezvous = threading.Barrier(2, timeout=10)
+    def memory(user_id):
+        rendezvous.wait()
+        return []
+    def model(prompt):
+        rendezvous.wait()
+        return AIMessage(content='{"sentiment": "positive", "reason": "agreed"}')
+    monkeypatch.setattr(workflow2, "MOCK_SENTIMENT_ANALYSIS", False)
+    monkeypatch.setattr(workflow2, "load_conversation_memory", memory)
+    monkeypatch.setattr(workflow2, "_get_model", lambda name: RunnableLambda(model))
+    monkeypatch.setattr(workflow2, "_classify_locally", lambda text: None)
+
+    assert workflow2.parallel_app.invoke(make_state())["sentiment"] == "positive"
+    assert not rendezvous.broken
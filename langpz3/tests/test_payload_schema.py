@@ -0,0 +1,76 @@
+import os
+import sys
+
+import pytest
+
+# Add the 'agent' directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+import payload_schema
+from payload_schema import WORKFLOW_SCHEMA, SchemaError, compile_schema, require_fields, validate_batch
+
+def make_payload():
+    return {
+        "customer": {"name": " Test User ", "email": "test@Example.COM", "phoneNumber": "(555) 012-3456", "zipCode": 2139},
+        "task": {"description": "Kitchen renovation", "category": "Remodeling"},
+        "vendor": {"name": "Test Vendor", "email": "vendor@example.com", "phoneNumber": "+1 555.987.6543"},
+        "messages": [],
+    }
+
+def test_coerces_and_normalizes_a_copy():
+    payload = make_payload()
+    cleaned, errors = compile_schema(WORKFLOW_SCHEMA, coerce=True, normalize=True)(payload)
+    assert errors == []
+    # The email is the memory key: only trimmed, never re-cased
+    assert cleaned["customer"] == {"name": "Test User", "email": "test@Example.COM",
+                                   "phoneNumber": "5550123456", "zipCode": "02139"}
+    assert cleaned["vendor"]["phoneNumber"] == "+15559876543"
+    assert cleaned["messages"] is payload["messages"]
+    # The input is left as it was
+    assert payload["customer"]["zipCode"] == 2139
+    # Without coercion the integer ZIP is an error; without normalising values pass through
+    cleaned, errors = compile_schema(WORKFLOW_SCHEMA)(payload)
+    assert errors == ["Invalid zipCode in customer: must be a string"]
+    payload["customer"]["zipCode"] = "94105-1234"
+    assert compile_schema(WORKFLOW_SCHEMA)(payload)[0]["customer"] == payload["customer"]
+
+def test_reports_every_problem_and_batches():
+    validate = compile_schema(WORKFLOW_SCHEMA, coerce=True, normalize=True)
+    bad = make_payload()
+    del bad["vendor"]
+    del bad["task"]["category"]
+    bad["customer"].update(email="not-an-email", phoneNumber="555", zipCode="9410")
+    _, errors = validate(bad)
+    assert errors == [
+        "Invalid email in customer: not an email address: 'not-an-email'",
+        "Invalid phoneNumber in customer: not a phone number: '555'",
+        "Invalid zipCode in customer: not a ZIP code: '9410'",
+        "Missing category in task",
+        "Missing vendor data",
+    ]
+    # A vendor directory makes the vendor optional, but a given vendor is still checked
+    matched = compile_schema(WORKFLOW_SCHEMA, optional_sections=("vendor",))
+    no_vendor = make_payload()
+    no_vendor["customer"]["zipCode"] = "02139"
+    no_vendor["vendor"] = {}
+    assert matched(no_vendor)[1] == []
+    no_vendor["vendor"] = {"name": "V"}
+    assert matched(no_vendor)[1] == ["Missing email in vendor", "Missing phoneNumber in vendor"]
+
+    valid, rejected = validate_batch([make_payload(), bad, "text", make_payload()], validate)
+    assert [position for position, _ in valid] == [0, 3]
+    assert valid[0][1]["customer"]["zipCode"] == "02139"
+    assert rejected == {1: errors, 2: ["Payload must be a JSON object"]}
+
+def test_require_fields(monkeypatch):
+    state = make_payload()
+    require_fields(state)
+    monkeypatch.setattr(payload_schema, "PAYLOAD_DEBUG", True)
+    with pytest.raises(SchemaError, match="Invalid zipCode in customer") as raised:
+        require_fields(state)
+    assert isinstance(raised.value, ValueError) and len(raised.value.errors) == 1
+    state["customer"]["zipCode"] = "02139"
+    require_fields(state)
+    del state["task"]["description"]
+    with pytest.raises(ValueError, match="Missing description in task"):
+        require_fields(state)
@@ -0,0 +1,77 @@
+import os
+import sys
+import time
+
+import pytest
+from flask import Flask
+
+# Add the bridges' shared modules to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'pz3', '_flask-bridge-common'))
+
+import request_profiler
+from request_profiler import install_profiler, sign_request, verify_signature
+
+SECRET = "test-secret"
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(request_profiler, "PROFILE_SECRET", SECRET)
+    monkeypatch.setattr(request_profiler, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(request_profiler, "PROFILE_SAMPLE_RATE", 0.0)
+    app = Flask(__name__)
+    app.add_url_rule("/api/agent", "agent", lambda: {"ok": True}, methods=["POST"])
+    install_profiler(app)
+    return app.test_client()
+
+def test_signature_verification():
+    now = time.time()
+    header = sign_request(SECRET, "POST", "/api/agent", now)
+    assert verify_signature(header, "POST", "/api/agent", SECRET, now=now)
+    assert not verify_signature(header, "POST", "/api/agent", "other-secret", now=now)
+    assert not verify_signature(header, "GET", "/api/agent", SECRET, now=now)
+    tampered = header[:-1] + ("1" if header.endswith("0") else "0")
+    assert not verify_signature(tampered, "POST", "/api/agent", SECRET, now=now)
+    assert not verify_signature(header, "POST", "/api/agent", SECRET, now=now + request_profiler.SIGNATURE_MAX_AGE + 1)
+    assert not verify_signature(None, "POST", "/api/agent", SECRET, now=now)
+    assert not verify_signature("garbage", "POST", "/api/agent", SECRET, now=now)
+    # Without a configured secret nothing verifies
+    assert not verify_signature(header, "POST", "/api/agent", "", now=now)
+    # The query string is signed too
+    header = sign_request(SECRET, "GET", "/debug/profile?seconds=1", now)
+    assert verify_signature(header, "GET", "/debug/profile?seconds=1", SECRET, now=now)
+    assert not verify_signature(header, "GET", "/debug/profile?seconds=60", SECRET, now=now)
+    assert not verify_signature(header, "GET", "/debug/profile", SECRET, now=now)
+
+def test_signed_and_sampled_requests_are_profiled(client, tmp_path, monkeypatch):
+    assert "X-Profile-Id" not in client.post("/api/agent").headers
+    response = client.post("/api/agent", headers={"X-Profile-Request": "1:bad"})
+    assert "X-Profile-Id" not in response.headers
+
+    response = client.post("/api/agent", headers={"X-Profile-Request": sign_request(SECRET, "POST", "/api/agent")})
+    profile_id = response.headers["X-Profile-Id"]
+    assert os.path.exists(tmp_path / f"{profile_id}.prof")
+
+    monkeypatch.setattr(request_profiler, "PROFILE_SAMPLE_RATE", 1.0)
+    assert all("X-Profile-Id" in client.post("/api/agent").headers for _ in range(3))
+    assert len(list(tmp_path.glob("*.prof"))) == 4
+
+def get_signed(client, url):
+    return client.get(url, headers={"X-Profile-Request": sign_request(SECRET, "GET", url)})
+
+def test_debug_profile_endpoint(client, tmp_path):
+    assert client.get("/debug/profile?seconds=0").status_code == 403
+    # A signed URL cannot be replayed with another duration
+    signed = {"X-Profile-Request": sign_request(SECRET, "GET", "/debug/profile?seconds=0")}
+    assert client.get("/debug/profile?seconds=60", headers=signed).status_code == 403
+    for bad in ("abc", "nan", "inf"):
+        response = get_signed(client, f"/debug/profile?seconds={bad}")
+        assert response.status_code == 400
+        assert response.get_json()["error"] == "seconds must be a number"
+    start = time.monotonic()
+    response = get_signed(client, "/debug/profile?seconds=-5")
+    assert response.status_code == 200 and time.monotonic() - start < 1
+    response = get_signed(client, "/debug/profile?seconds=0.05")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    with open(tmp_path / f"{response.headers['X-Profile-Id']}.folded") as f:
+        assert f.read() == response.get_data(as_text=True)
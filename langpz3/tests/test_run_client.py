@@ -0,0 +1,98 @@
+import asyncio
+import os
+import sys
+
+import httpx
+import pytest
+
+# Add the 'tools' directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'tools'))
+
+from run_client import poll_run, run_many, wait_for_run
+
+class FakeRuns:
+    """Stands in for client.runs; a run waits `input` seconds and fails if input < 0"""
+
+    def __init__(self, statuses=(), join_status=None, join_error=None):
+        self.statuses = list(statuses)
+        self.join_status = join_status
+        self.join_error = join_error
+        self.gets = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def join(self, thread_id, run_id):
+        if self.join_error:
+            raise self.join_error
+        if self.join_status:
+            request = httpx.Request("GET", "http://test")
+            raise httpx.HTTPStatusError("nope", request=request, response=httpx.Response(self.join_status, request=request))
+        return {"joined": run_id}
+
+    async def get(self, thread_id, run_id):
+        self.gets += 1
+        return {"status": self.statuses.pop(0)}
+
+    async def wait(self, thread_id, assistant_id, input):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(input)
+        self.in_flight -= 1
+        if input < 0:
+            raise RuntimeError("boom")
+        return {"slept": input}
+
+class FakeThreads:
+    async def get(self, thread_id):
+        return {"values": {"thread": thread_id}}
+
+class FakeClient:
+    def __init__(self, runs):
+        self.runs = runs
+        self.threads = FakeThreads()
+
+def test_wait_uses_join():
+    client = FakeClient(FakeRuns(statuses=["success"]))
+    assert asyncio.run(wait_for_run(client, "t", "r")) == {"joined": "r"}
+    assert client.runs.gets == 1
+
+def test_wait_raises_when_joined_run_failed():
+    for status in ("error", "interrupted"):
+        with pytest.raises(RuntimeError, match=f"finished with status {status}"):
+            asyncio.run(wait_for_run(FakeClient(FakeRuns(statuses=[status])), "t", "r"))
+
+def test_wait_reraises_errors_without_a_response():
+    error = httpx.HTTPStatusError("no response", request=httpx.Request("GET", "http://test"), response=None)
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(wait_for_run(FakeClient(FakeRuns(join_error=error)), "t", "r"))
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(wait_for_run(FakeClient(FakeRuns(join_error=httpx.ConnectError("refused"))), "t", "r"))
+
+def test_wait_falls_back_to_backoff_polling():
+    client = FakeClient(FakeRuns(statuses=["pending", "running", "success"], join_status=404))
+    assert asyncio.run(wait_for_run(client, "t", "r")) == {"thread": "t"}
+    assert client.runs.gets == 3
+
+def test_poll_times_out():
+    runs = FakeRuns(statuses=["running"] * 100)
+    with pytest.raises(TimeoutError):
+        asyncio.run(poll_run(FakeClient(runs), "t", "r", timeout=0.01))
+
+def test_run_many_yields_in_completion_order_with_cap():
+    runs = FakeRuns()
+
+    async def collect():
+        return [r async for r in run_many(FakeClient(runs), "a", [0.05, 0.0, 0.02, 0.01], concurrency=2)]
+
+    results = asyncio.run(collect())
+    assert [r["index"] for r in results] == [1, 2, 3, 0]
+    assert all(r["status"] == "success" for r in results)
+    assert runs.max_in_flight == 2
+
+def test_run_many_reports_errors():
+    async def collect():
+        return [r async for r in run_many(FakeClient(FakeRuns()), "a", [0.0, -1])]
+
+    results = sorted(asyncio.run(collect()), key=lambda r: r["index"])
+    assert results[0]["status"] == "success"
+    assert results[1]["status"] == "error" and results[1]["error"] == "boom"
@@ -0,0 +1,89 @@
+import asyncio
+import json
+import os
+import sys
+
+import pytest
+
+# Add the 'tools' directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'tools'))
+
+import local_store
+from local_store import PartitionedWriter, Watermark
+from run_exporter import export
+
+class FakeClient:
+    """In-memory threads.search / runs.list with the server's paging semantics"""
+
+    def __init__(self):
+        self.threads = self
+        self.runs = self
+        self.thread_rows = []
+        self.run_rows = {}
+        self.searches = 0
+
+    def add_thread(self, thread_id, updated_at, runs):
+        self.thread_rows.append({"thread_id": thread_id, "updated_at": updated_at})
+        self.run_rows[thread_id] = [
+            {"run_id": f"{thread_id}-{i}", "thread_id": thread_id, "created_at": ts, "updated_at": ts}
+            for i, ts in enumerate(runs)
+        ]
+
+    async def search(self, limit, offset, sort_by, sort_order):
+        self.searches += 1
+        rows = sorted(self.thread_rows, key=lambda t: t[sort_by], reverse=sort_order == "desc")
+        return rows[offset:offset + limit]
+
+    async def list(self, thread_id, limit, offset):
+        return self.run_rows[thread_id][offset:offset + limit]
+
+def read_dataset(root, dataset):
+    records = []
+    for dirpath, _, files in os.walk(os.path.join(root, dataset)):
+        for name in files:
+            with open(os.path.join(dirpath, name)) as f:
+                records.extend(json.loads(line) for line in f)
+    return records
+
+def test_watermark_round_trip(tmp_path):
+    path = tmp_path / "state" / "wm.json"
+    Watermark(str(path)).update(updated_at="2025-01-01T00:00:00+00:00")
+    assert Watermark(str(path)).get("updated_at") == "2025-01-01T00:00:00+00:00"
+    assert Watermark(str(tmp_path / "missing.json")).get("updated_at") is None
+
+def test_writer_partitions_by_day(tmp_path):
+    with PartitionedWriter(str(tmp_path), "runs", "created_at", flush_every=2) as writer:
+        writer.write_many([
+            {"id": 1, "created_at": "2025-04-09T19:17:55Z"},
+            {"id": 2, "created_at": "2025-04-10T01:00:00Z"},
+            {"id": 3, "created_at": "2025-04-09T23:59:59Z"},
+        ])
+    assert sorted(os.listdir(tmp_path / "runs")) == ["date=2025-04-09", "date=2025-04-10"]
+    assert sorted(r["id"] for r in read_dataset(str(tmp_path), "runs")) == [1, 2, 3]
+
+def test_parquet_requires_pyarrow(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_store, "pyarrow", None)
+    with pytest.raises(RuntimeError):
+        PartitionedWriter(str(tmp_path), "runs", "created_at", format="parquet")
+
+def test_export_is_incremental(tmp_path):
+    client = FakeClient()
+    for i in range(5):
+        day = f"2025-04-0{i + 1}T12:00:00+00:00"
+        client.add_thread(f"t{i}", day, [day, day])
+
+    first = asyncio.run(export(client, str(tmp_path), page_size=2))
+    assert (first["threads"], first["runs"]) == (5, 10)
+
+    # Only the thread updated since the last export (and its new run) is transferred
+    client.thread_rows[0]["updated_at"] = "2025-04-08T00:00:00+00:00"
+    client.run_rows["t0"].append({"run_id": "t0-new", "thread_id": "t0",
+                                  "created_at": "2025-04-08T00:00:00+00:00",
+                                  "updated_at": "2025-04-08T00:00:00+00:00"})
+    client.searches = 0
+    second = asyncio.run(export(client, str(tmp_path), page_size=2))
+    assert (second["threads"], second["runs"]) == (1, 1)
+    assert client.searches == 1
+
+    assert asyncio.run(export(client, str(tmp_path)))["threads"] == 0
+    assert len(read_dataset(str(tmp_path), "runs")) == 11
@@ -0,0 +1,64 @@
+import os
+import sys
+
+# Add the 'agent' directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+from todo_store import TodoList, get_todo_list
+
+def test_pages_follow_status_index(tmp_path):
+    todos = TodoList(str(tmp_path / "ana_todos.jsonl"))
+    for i in range(25):
+        todos.add(f"task {i}")
+    todos.complete(2)
+    todos.remove(3)
+
+    page, total = todos.page(status="open", offset=0, limit=10)
+    assert total == 23
+    assert [todo["id"] for todo in page] == [1] + list(range(4, 13))
+    page, _ = todos.page(status="open", offset=20, limit=10)
+    assert len(page) == 3
+    assert todos.count("done") == 1 and todos.count() == 24
+
+def test_upcoming_and_reminders_skip_closed_todos(tmp_path):
+    todos = TodoList(str(tmp_path / "ana_todos.jsonl"))
+    june = todos.add("june", due="2025-06-01")
+    todos.add("no date")
+    march = todos.add("march", due="2025-03-01")
+    april = todos.add("april", due="2025-04-01")
+    todos.complete(march["id"])
+    assert [t["task"] for t in todos.upcoming(5)] == ["april", "june"]
+
+    # Rescheduling moves it in the heap; reopening brings it back once
+    todos.update(june["id"], due="2025-01-15")
+    todos.update(march["id"], status="open")
+    assert [t["task"] for t in todos.upcoming(5)] == ["june", "march", "april"]
+
+    assert [t["task"] for t in todos.pop_due(now="2025-03-31")] == ["june", "march"]
+    assert todos.pop_due(now="2025-03-31") == []
+    assert [t["task"] for t in todos.upcoming(5)] == ["april"]
+
+def test_log_replays_and_compacts(tmp_path):
+    path = str(tmp_path / "ana_todos.jsonl")
+    todos = TodoList(path)
+    for i in range(60):
+        todo = todos.add(f"task {i}", due=f"2025-01-{i % 28 + 1:02d}")
+        todos.update(todo["id"], task=f"task {i} (edited)")
+    for i in range(1, 41):
+        todos.remove(i)
+    todos.complete(41)
+    todos.pop_due(now="2025-01-03")
+
+    with open(path) as f:
+        assert sum(1 for _ in f) < 160
+    reloaded = TodoList(path)
+    assert reloaded.items == todos.items
+    assert reloaded.page(status="open", limit=50) == todos.page(status="open", limit=50)
+    assert reloaded.upcoming(30) == todos.upcoming(30)
+    assert reloaded.add("new")["id"] == 61
+
+def test_one_list_per_user(tmp_path):
+    a = get_todo_list("ana@example.com", store_dir=str(tmp_path))
+    assert get_todo_list("ana@example.com", store_dir=str(tmp_path)) is a
+    assert get_todo_list("bo@example.com", store_dir=str(tmp_path)) is not a
+    assert os.path.basename(a.path) == "ana@example.com_todos.jsonl"
@@ -0,0 +1,82 @@
+import os
+import sys
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+
+# Add the 'agent' directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+from token_accounting import UsageLedger, add_usage, call_usage, count_message_tokens, count_tokens
+
+def test_reported_usage_wins_over_local_counts():
+    reply = AIMessage(content="ok", usage_metadata={"input_tokens": 1000, "output_tokens": 20, "total_tokens": 1020},
+                      response_metadata={"model_name": "gpt-4o-mini"})
+    usage = call_usage("gpt-4o", "prompt", reply, 0.25)
+    assert usage["prompt_tokens"] == 1000 and usage["completion_tokens"] == 20
+    assert usage["estimated_calls"] == 0 and usage["latency_ms"] == 250.0
+    # Priced as the model that answered
+    assert usage["cost_usd"] == (1000 * 0.15 + 20 * 0.60) / 1_000_000
+
+def test_local_counts_are_memoized_per_message():
+    count_tokens.cache_clear()
+    system = SystemMessage(content="You are 007, a personal productivity agent. " * 20)
+    history = [HumanMessage(content=f"message {i}") for i in range(50)]
+    first = count_message_tokens([system] + history)
+    hits = count_tokens.cache_info().hits
+    assert count_message_tokens([system] + history + [HumanMessage(content="new")]) > first
+    # Only the new message was tokenized on the second call
+    assert count_tokens.cache_info().hits - hits == 51
+
+    reply = FakeListChatModel(responses=["positive"]).invoke("hi")
+    usage = call_usage("gpt-4o", [system], reply, 0.1)
+    assert usage["estimated_calls"] == 1
+    assert usage["prompt_tokens"] == count_message_tokens([system])
+
+def test_reducer_and_ledger_aggregate_by_customer_and_vendor(tmp_path):
+    run = add_usage(None, {"calls": 1, "total_tokens": 100, "cost_usd": 0.01})
+    run = add_usage(run, {"calls": 1, "total_tokens": 50, "cost_usd": 0.005})
+    assert run == {"calls": 2, "total_tokens": 150, "cost_usd": 0.015}
+
+    log = str(tmp_path / "usage.jsonl")
+    ledger = UsageLedger(log_path=log)
+    ledger.record(run, customer="a@x.com", vendor="v1@x.com")
+    ledger.record({"calls": 1, "total_tokens": 10, "cost_usd": 0.001}, customer="b@x.com", vendor="v1@x.com")
+    snapshot = ledger.snapshot(top=1)
+    assert snapshot["runs"] == 2 and snapshot["totals"]["total_tokens"] == 160
+    assert snapshot["by_customer"] == [{"id": "a@x.com", "calls": 2, "total_tokens": 150, "cost_usd": 0.015, "runs": 1}]
+    assert snapshot["by_vendor"][0]["runs"] == 2
+
+    # Another process can rebuild the same totals from the log
+    merged = UsageLedger(log_path="")
+    merged.load(log)
+    assert merged.snapshot()["totals"] == snapshot["totals"]
+
+def test_workflow_records_each_runs_own_usage(tmp_path, monkeypatch):
+    import workflow2
+    from langgraph.checkpoint.memory import MemorySaver
+    monkeypatch.setattr(workflow2, "MEMORY_DIR", str(tmp_path))
+    monkeypatch.setattr(workflow2, "MOCK_SENTIMENT_ANALYSIS", False)
+    monkeypatch.setattr(workflow2, "LOCAL_SENTIMENT_MODEL", "")
+    reply = '{"sentiment": "positive", "reason": "customer agreed to proceed"}'
+    monkeypatch.setattr(workflow2, "_get_model", lambda name: FakeListChatModel(responses=[reply] * 2))
+    ledger = UsageLedger(log_path="")
+    monkeypatch.setattr(workflow2, "ledger", ledger)
+
+    app = workflow2.workflow.compile(checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "usage"}}
+    state = {
+        "customer": {"name": "Test User", "email": "test@example.com", "phoneNumber": "555-0123", "zipCode": "94105"},
+        "task": {"description": "Leaking pipe", "category": "Plumbing"},
+        "vendor": {"name": "Test Vendor", "email": "vendor@example.com", "phoneNumber": "555-0100"},
+    }
+    first = app.invoke(dict(state, messages=[HumanMessage(content="Yes, sure.")]), config)
+    second = app.invoke(dict(state, messages=[HumanMessage(content="Okay, tomorrow works.")]), config)
+
+    # The thread's usage channel sums both runs; the ledger holds each run once
+    assert first["usage"]["calls"] == 1 and second["usage"]["calls"] == 2
+    snapshot = ledger.snapshot()
+    assert snapshot["runs"] == 2 and snapshot["totals"]["calls"] == 2
+    assert snapshot["totals"]["total_tokens"] == second["usage"]["total_tokens"]
+    assert snapshot["totals"]["context_tokens"] == first["context_tokens"] + second["context_tokens"]
+    assert second["context_tokens"] > first["context_tokens"]
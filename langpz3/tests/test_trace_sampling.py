@@ -0,0 +1,70 @@
+import os
+import sys
+import time
+import uuid
+
+import langsmith
+import pytest
+from langsmith import Client
+
+# Add the 'agent' directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+from trace_sampling import SamplingClient, head_sampled, traceable
+
+@pytest.fixture
+def exported(monkeypatch):
+    """Runs that reach the real client, by name, instead of being sent"""
+    calls = []
+    monkeypatch.setattr(Client, "create_run", lambda self, name, inputs, run_type, **kw: calls.append(("create", name)))
+    monkeypatch.setattr(Client, "update_run", lambda self, run_id, **kw: calls.append(("update", kw.get("name"))))
+    return calls
+
+def make_client(sample_rate, slow_ms=1000):
+    return SamplingClient(sample_rate=sample_rate, slow_ms=slow_ms, api_key="test", api_url="http://127.0.0.1:9",
+                          auto_batch_tracing=False)
+
+@traceable(name="child")
+def child(fail=False, delay=0):
+    time.sleep(delay)
+    if fail:
+        raise ValueError("boom")
+    return "ok"
+
+@traceable(name="root")
+def root(fail=False, delay=0):
+    return child(fail, delay)
+
+def run_traced(client, **kwargs):
+    with langsmith.tracing_context(enabled=True, client=client):
+        try:
+            root(**kwargs)
+        except ValueError:
+            pass
+
+def test_unsampled_fast_trace_is_dropped(exported):
+    client = make_client(0)
+    run_traced(client)
+    assert exported == []
+    assert client.sampling_stats["dropped"] == 1
+    assert not client._held
+
+def test_failed_and_slow_traces_are_exported_whole(exported):
+    client = make_client(0, slow_ms=50)
+    run_traced(client, fail=True)
+    assert exported == [("create", "root"), ("create", "child"), ("update", "child"), ("update", "root")]
+    exported.clear()
+    run_traced(client, delay=0.06)
+    assert len(exported) == 4
+    assert client.sampling_stats["exported_error"] == client.sampling_stats["exported_slow"] == 1
+
+def test_sampled_traces_stream_through(exported):
+    client = make_client(1)
+    run_traced(client)
+    assert len(exported) == 4
+    assert client.sampling_stats["exported_sampled"] == 1
+
+def test_head_sampling_rate():
+    ids = [uuid.uuid4() for _ in range(5000)]
+    assert head_sampled(ids[0], 0.3) == head_sampled(str(ids[0]), 0.3)
+    assert 0.25 < sum(head_sampled(i, 0.3) for i in ids) / len(ids) < 0.35
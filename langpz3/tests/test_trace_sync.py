@@ -0,0 +1,64 @@
+import os
+import re
+import sys
+from datetime import datetime, timedelta, timezone
+
+# Add the 'tools' directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'tools'))
+
+from trace_sync import BloomFilter, SeenIndex, sync, time_windows
+
+NOW = datetime(2025, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+class FakeRun:
+    def __init__(self, run_id, start_time):
+        self.data = {"id": run_id, "name": "analyze_sentiment", "start_time": start_time}
+
+    def model_dump(self):
+        return dict(self.data)
+
+class FakeClient:
+    """list_runs that honours the gte/lt start_time window filter"""
+
+    def __init__(self, runs):
+        self.runs = runs
+        self.calls = 0
+
+    def list_runs(self, project_name, filter, select=None):
+        self.calls += 1
+        start, end = (datetime.fromisoformat(t) for t in re.findall(r'"([^"]+)"', filter))
+        return [run for run in self.runs if start <= run.data["start_time"] < end]
+
+def test_bloom_has_no_false_negatives(tmp_path):
+    bloom = BloomFilter(capacity=1000, path=str(tmp_path / "b.bloom"))
+    for i in range(1000):
+        bloom.add(f"run-{i}")
+    bloom.save()
+    reloaded = BloomFilter(capacity=1000, path=str(tmp_path / "b.bloom"))
+    assert all(f"run-{i}" in reloaded for i in range(1000))
+    assert sum(f"other-{i}" in reloaded for i in range(1000)) < 50
+
+def test_seen_index_persists(tmp_path):
+    index = SeenIndex(str(tmp_path))
+    assert index.add_new(["a", "b", "a"]) == ["a", "b"]
+    index.close()
+    assert SeenIndex(str(tmp_path)).add_new(["b", "c"]) == ["c"]
+
+def test_windows_cover_range():
+    windows = time_windows(NOW - timedelta(hours=1), NOW, 4)
+    assert windows[0][0] == NOW - timedelta(hours=1) and windows[-1][1] == NOW
+    assert all(a[1] == b[0] for a, b in zip(windows, windows[1:]))
+
+def test_sync_fetches_only_new_runs(tmp_path):
+    runs = [FakeRun(f"r{i}", NOW - timedelta(minutes=60 - i)) for i in range(50)]
+    client = FakeClient(runs)
+    first = sync(client, "proj", str(tmp_path), windows=4, now=NOW, initial_lookback=timedelta(hours=2))
+    assert first["new"] == 50 and client.calls == 4
+
+    # The overlap re-fetches recent runs, but only the two new ones are written
+    runs.append(FakeRun("late", NOW + timedelta(minutes=1)))
+    runs.append(FakeRun("later", NOW + timedelta(minutes=2)))
+    second = sync(client, "proj", str(tmp_path), windows=4, now=NOW + timedelta(minutes=3))
+    assert second["new"] == 2
+    assert second["fetched"] < 50
+    assert second["since"] == runs[49].data["start_time"] - timedelta(minutes=5)
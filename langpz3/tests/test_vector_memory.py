@@ -0,0 +1,109 @@
+import os
+import random
+import sys
+
+import numpy as np
+from langchain_core.messages import HumanMessage, SystemMessage
+
+# Add the 'agent' directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+import workflow2
+from vector_memory import IVFIndex, VectorMemory, embed, get_vector_memory
+
+TOPICS = ["sink", "roof", "window", "budget", "permit", "tiles", "paint", "deck"]
+WORDS = TOPICS + ("plumber electrician cabinet quote invoice schedule monday friday delay crew inspection "
+                  "drywall floor garage fence patio lighting outlet heater leak mold insulation gutter").split()
+
+def make_turns(n, start=0):
+    return [HumanMessage(content=f"question about the {TOPICS[i % 8]} for room{i % 97}", id=f"turn-{i}")
+            for i in range(start, start + n)]
+
+def make_notes(n, start=0, seed=0):
+    rng = random.Random(seed)
+    return [HumanMessage(content=" ".join(rng.choices(WORDS, k=rng.randint(4, 12))), id=f"note-{i}")
+            for i in range(start, start + n)]
+
+def test_exact_search_and_recall(tmp_path):
+    memory = VectorMemory(str(tmp_path / "ana"))
+    turns = [SystemMessage(content="system prompt", id="s")] + make_turns(200)
+    assert memory.add(turns) == 200  # system prompts are not stored
+    assert memory.add(turns[:10]) == 0
+
+    rows = memory.search("the deck for room7", 3)
+    assert rows[0] == 7
+    assert all("deck" in content for _, content, _ in memory.turns(rows))
+    assert memory.search("?!", 3) == []
+
+    # Relevant turns and the last three, in conversation order
+    records = memory.recall("the deck for room7", k=2, recent=3)
+    assert [record[2] for record in records][::len(records) - 1] == ["turn-7", "turn-199"]
+    assert len(records) == 5 and "deck" in records[1][1]
+    assert [record[2] for record in records[2:]] == ["turn-197", "turn-198", "turn-199"]
+
+    reopened = VectorMemory(str(tmp_path / "ana"))
+    assert len(reopened) == 200 and reopened.search("the deck for room7", 1) == [7]
+
+def test_ivf_agrees_with_exact_search(tmp_path):
+    exact = VectorMemory(str(tmp_path / "exact"), exact_max_rows=10 ** 9)
+    ivf = VectorMemory(str(tmp_path / "ivf"), exact_max_rows=500)
+    notes = make_notes(5000)
+    for memory in (exact, ivf):
+        memory.add(notes)
+    vectors = np.asarray(exact.vectors())
+    rng = random.Random(1)
+    found = 0
+    for _ in range(50):
+        query = " ".join(rng.choices(WORDS, k=4))
+        q = embed([query])[0]
+        # Ties are common, so a hit is any row scoring at least the exact k-th best
+        kth = (vectors[exact.search(query, 5)] @ q).min()
+        found += int(((vectors[ivf.search(query, 5)] @ q) >= kth - 1e-6).sum())
+    assert found / (5 * 50) > 0.85
+    assert os.path.exists(ivf.index_path) and not os.path.exists(exact.index_path)
+
+    # Turns added after the index was built are still found, and the index
+    # is rebuilt once they outnumber the indexed turns
+    ivf.add([HumanMessage(content="the jacuzzi quote", id="late")])
+    assert ivf.turns(ivf.search("jacuzzi", 1))[0][2] == "late"
+    ivf.add(make_notes(5100, start=5000))
+    ivf.search("jacuzzi", 1)
+    assert ivf._index.rows == len(ivf) == 10101
+
+def test_corrupt_index_is_rebuilt(tmp_path, capsys):
+    memory = VectorMemory(str(tmp_path / "ana"), exact_max_rows=50)
+    memory.add(make_notes(200))
+    expected = memory.search("the deck for room7", 1)
+    with open(memory.index_path, "wb") as f:
+        f.write(b"not an index")
+
+    reopened = VectorMemory(str(tmp_path / "ana"), exact_max_rows=50)
+    assert reopened.search("the deck for room7", 1) == expected
+    assert "rebuilding it" in capsys.readouterr().out
+    assert reopened._index.rows == 200
+    assert IVFIndex.load(memory.index_path).rows == 200
+
+def test_workflow2_restores_bounded_history(tmp_path, monkeypatch):
+    monkeypatch.setattr(workflow2, "MEMORY_DIR", str(tmp_path))
+    monkeypatch.setattr(workflow2, "MOCK_USER_RESPONSES", False)
+    monkeypatch.setattr(workflow2, "MOCK_SENTIMENT_ANALYSIS", True)
+    monkeypatch.setattr(workflow2, "VECTOR_MEMORY", True)
+    monkeypatch.setattr(workflow2, "MEMORY_TOP_K", 2)
+    monkeypatch.setattr(workflow2, "MEMORY_RECENT", 3)
+    state = {
+        "customer": {"name": "Test User", "email": "vector@example.com", "phoneNumber": "555-0123", "zipCode": "12345"},
+        "task": {"description": "Kitchen renovation", "category": "Home Improvement"},
+        "vendor": {"name": "Dave's Plumbing", "email": "dave@plumbing.com", "phoneNumber": "555-9876"},
+    }
+    # A history pickled before the vector store is indexed on first use
+    workflow2.save_conversation_memory("vector@example.com", make_turns(50))
+    replies = ["Yes, the budget works", "Sure, I'll call them tomorrow", "Thanks, great"]
+    for reply in replies:
+        result = workflow2.app.invoke({**state, "messages": [HumanMessage(content=reply)]})
+        # input + at most 2 relevant and 3 recent turns + system prompt, greeting and reply
+        assert len(result["messages"]) <= 1 + 2 + 3 + 3
+        assert result["messages"][0].content == reply
+    memory = get_vector_memory("vector@example.com", str(tmp_path))
+    # Each run stores its reply, greeting and answer once
+    assert len(memory) == 50 + 3 * len(replies)
+    assert [record[1] for record in memory.turns([len(memory) - 3])] == [replies[-1]]
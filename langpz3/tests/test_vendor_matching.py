@@ -0,0 +1,69 @@
+import os
+import random
+import sys
+
+import pytest
+
+# Add the 'agent' directory to the Python path
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'agent'))
+
+import workflow2
+from vendor_matching import VendorIndex, zip3_distances
+
+def make_vendors(n, seed=0):
+    rng = random.Random(seed)
+    return [{"name": f"Vendor {i}", "email": f"v{i}@example.com", "phoneNumber": "555-0100",
+             "category": rng.choice(["Plumbing", "Roofing", "Electrical"]),
+             "zipCode": f"{rng.randint(0, 999):03d}{rng.randint(0, 99):02d}", "rating": round(rng.uniform(1, 5), 1)}
+            for i in range(n)]
+
+def test_matches_a_full_scan():
+    vendors = make_vendors(3000)
+    index = VendorIndex(vendors, candidates=10 ** 6)
+    distances = zip3_distances()
+    for zip_code in ["94105", "00501", "10001", "60614"]:
+        customer = int(zip_code[:3])
+        expected = sorted((v["rating"] / 5 - min(distances[customer, int(v["zipCode"][:3])], 100) / 100
+                           for v in vendors if v["category"] == "Roofing"), reverse=True)[:5]
+        matches = index.match("roofing ", zip_code, k=5)
+        assert [m["score"] for m in matches] == pytest.approx(expected, abs=1e-4)
+        assert all(m["vendor"]["category"] == "Roofing" for m in matches)
+    # A second lookup for the same prefix reuses the ranked candidates
+    assert index.match("Roofing", "94199", k=5) == index.match("Roofing", "94105", k=5)
+
+def test_candidates_come_from_the_nearest_prefixes(tmp_path):
+    centroids = tmp_path / "zip3.csv"
+    centroids.write_text("941,37.77,-122.42\n900,34.05,-118.24\n100,40.71,-74.01\n")
+    vendors = [
+        {"name": "SF", "email": "sf@x.com", "phoneNumber": "1", "categories": ["Plumbing", "Heating"], "zipCode": "94107", "rating": 3},
+        {"name": "LA", "email": "la@x.com", "phoneNumber": "2", "category": "Plumbing", "zipCode": "90012", "rating": 5},
+        {"name": "NY", "email": "ny@x.com", "phoneNumber": "3", "category": "Plumbing", "zipCode": "10001", "rating": 5},
+        {"name": "Off", "email": "off@x.com", "phoneNumber": "4", "category": "Plumbing", "zipCode": "94107", "active": False},
+        {"name": "No zip", "email": "nz@x.com", "phoneNumber": "5", "category": "Plumbing"},
+    ]
+    index = VendorIndex(vendors, distances=zip3_distances(str(centroids)), candidates=2)
+    matches = index.match("plumbing", "94110", k=3)
+    assert [m["vendor"]["name"] for m in matches] == ["SF", "LA"]
+    assert matches[1]["distance"] == pytest.approx(347, abs=5)
+    assert index.match("heating", "10001", k=3)[0]["vendor"]["name"] == "SF"
+    assert index.match("roofing", "94110") == [] and index.match("plumbing", "n/a") == []
+
+def test_workflow2_fills_missing_vendor(tmp_path, monkeypatch):
+    index = VendorIndex(make_vendors(500))
+    monkeypatch.setattr(workflow2, "get_vendor_index", lambda: index)
+    monkeypatch.setattr(workflow2, "MEMORY_DIR", str(tmp_path))
+    monkeypatch.setattr(workflow2, "MOCK_USER_RESPONSES", True)
+    monkeypatch.setattr(workflow2, "MOCK_SENTIMENT_ANALYSIS", True)
+    state = {
+        "customer": {"name": "Test User", "email": "match@example.com", "phoneNumber": "555-0123", "zipCode": "94105"},
+        "task": {"description": "Leaking pipe", "category": "Plumbing"},
+    }
+    best = index.match("Plumbing", "94105")[0]["vendor"]
+    for app in (workflow2.app, workflow2.parallel_app):
+        result = app.invoke(dict(state))
+        assert result["vendor"] == best
+        assert result["summary"].endswith(f"assigned to {best['name']} (Customer sentiment: {result['sentiment']})")
+        assert best["name"] in result["messages"][1].content
+    monkeypatch.setattr(workflow2, "get_vendor_index", lambda: None)
+    with pytest.raises(ValueError, match="Missing vendor data"):
+        workflow2.app.invoke(dict(state))
@@ -0,0 +1,252 @@
+#!/usr/bin/env python
+"""
+Local OpenAI-compatible chat server for offline performance testing.
+
+Serves POST /v1/chat/completions (streaming and non-streaming) and
+GET /v1/models over real HTTP/1.1, so the full client stack is exercised:
+connection pooling, SSE streaming, retries and rate limiting. Point the
+workflows at it through the model registry:
+
+    python tools/fake_openai_server.py --port 8900 --ttft lognormal:300:0.4 --tokens-per-second 60
+    MODEL_BASE_URL=http://localhost:8900/v1 OPENAI_API_KEY=sk-local langgraph dev
+
+Replies:
+- workflow2's sentiment prompt gets a JSON {"sentiment", "reason"} reply,
+  decided by the same keyword rules the prompt describes;
+- --script FILE (JSON list of {"match": regex, "reply": str or object}) adds
+  scripted replies, checked first against the last user message;
+- anything else gets a short generic reply.
+
+--markdown-rate wraps that fraction of JSON replies in ```json fences.
+--rpm enforces a requests-per-minute token bucket and --rate-limit-rate
+rejects a random fraction of requests. Both answer 429 with Retry-After /
+retry-after-ms headers, which the OpenAI client honours when retrying.
+Latency specs are in milliseconds: "0", "fixed:50", "uniform:20:200",
+"lognormal:<median>:<sigma>", "exp:<mean>".
+"""
+
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import uuid
+
+import fake_server
+from fake_server import QuietHandler, parse_latency
+
+CONFIG = {
+    "ttft": "0",
+    "tokens_per_second": 0.0,
+    "rpm": 0,
+    "rate_limit_rate": 0.0,
+    "markdown_rate": 0.0,
+    "script": [],
+}
+
+POSITIVE_WORDS = ("yes", "sure", "okay", "ok", "thanks", "great", "perfect", "will do", "tomorrow", "sounds good")
+NEGATIVE_WORDS = ("no", "can't", "cannot", "won't", "not sure", "concern", "worried", "budget", "afford", "expensive")
+SENTIMENT_PROMPT = re.compile(r"determine their sentiment.*?Response:\s*(.*?)\n", re.DOTALL)
+
+_stats_lock = threading.Lock()
+_stats = {"requests": 0, "streamed": 0, "rate_limited": 0}
+_connections = set()
+_bucket = {"tokens": 0.0, "updated": time.monotonic()}
+
+
+def stats():
+    with _stats_lock:
+        return dict(_stats, connections=len(_connections))
+
+
+def reset_stats():
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
+        _connections.clear()
+        _bucket.update(tokens=float(CONFIG["rpm"]), updated=time.monotonic())
+
+
+def _contains_word(text, words):
+    # Whole words, allowing plural and past-tense forms (concern, concerns, concerned)
+    return any(re.search(rf"(?<![a-z']){re.escape(word)}(?:s|ed)?(?![a-z'])", text) for word in words)
+
+
+def classify_sentiment(text):
+    text = text.lower()
+    if _contains_word(text, NEGATIVE_WORDS):
+        return {"sentiment": "negative", "reason": "customer raised concerns"}
+    if _contains_word(text, POSITIVE_WORDS):
+        return {"sentiment": "positive", "reason": "customer agreed to proceed"}
+    return {"sentiment": "unknown", "reason": "response is ambiguous"}
+
+
+def _content_text(content):
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+
+def reply_for(messages):
+    """The assistant reply for a chat request"""
+    user_text = next((_content_text(m.get("content")) for m in reversed(messages) if m.get("role") == "user"), "")
+    for rule in CONFIG["script"]:
+        if re.search(rule["match"], user_text, re.IGNORECASE | re.DOTALL):
+            reply = rule["reply"]
+            return reply if isinstance(reply, str) else json.dumps(reply)
+    prompt = SENTIMENT_PROMPT.search(user_text)
+    if prompt:
+        reply = json.dumps(classify_sentiment(prompt.group(1)))
+        if random.random() < CONFIG["markdown_rate"]:
+            reply = f"```json\n{reply}\n```"
+        return reply
+    return "Thanks for the update. Let me know if there is anything else I can help with."
+
+
+def count_tokens(text):
+    # Rough English average of 4 characters per token
+    return max(1, math.ceil(len(text) / 4))
+
+
+def _take_rate_limit_token():
+    """Return 0 if the request may proceed, else the seconds until a token is available"""
+    if random.random() < CONFIG["rate_limit_rate"]:
+        return 1.0
+    rpm = CONFIG["rpm"]
+    if not rpm:
+        return 0
+    with _stats_lock:
+        now = time.monotonic()
+        _bucket["tokens"] = min(rpm, _bucket["tokens"] + (now - _bucket["updated"]) * rpm / 60)
+        _bucket["updated"] = now
+        if _bucket["tokens"] >= 1:
+            _bucket["tokens"] -= 1
+            return 0
+        return (1 - _bucket["tokens"]) * 60 / rpm
+
+
+class Handler(QuietHandler):
+    def _send_json(self, status, payload, headers=None):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_chunk(self, data):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def do_GET(self):
+        if self.path.startswith("/v1/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "gpt-4o", "object": "model", "owned_by": "local"}]})
+        elif self.path.startswith("/stats"):
+            if "reset" in self.path:
+                reset_stats()
+            self._send_json(200, stats())
+        else:
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.startswith("/v1/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found", "type": "invalid_request_error"}})
+            return
+        with _stats_lock:
+            _stats["requests"] += 1
+            _connections.add(self.client_address)
+
+        retry_after = _take_rate_limit_token()
+        if retry_after:
+            with _stats_lock:
+                _stats["rate_limited"] += 1
+            self._send_json(429, {"error": {
+                "message": "Rate limit reached for requests", "type": "requests", "code": "rate_limit_exceeded",
+            }}, headers={"Retry-After": str(math.ceil(retry_after)), "retry-after-ms": str(int(retry_after * 1000))})
+            return
+
+        model = request.get("model", "gpt-4o")
+        reply = reply_for(request.get("messages", []))
+        usage = {
+            "prompt_tokens": sum(count_tokens(_content_text(m.get("content"))) for m in request.get("messages", [])),
+            "completion_tokens": count_tokens(reply),
+        }
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        created = int(time.time())
+
+        time.sleep(parse_latency(CONFIG["ttft"])())
+
+        if not request.get("stream"):
+            time.sleep(usage["completion_tokens"] / CONFIG["tokens_per_second"] if CONFIG["tokens_per_second"] else 0)
+            self._send_json(200, {
+                "id": completion_id, "object": "chat.completion", "created": created, "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": reply}, "finish_reason": "stop"}],
+                "usage": usage,
+            })
+            return
+
+        with _stats_lock:
+            _stats["streamed"] += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+
+        def event(delta, finish_reason=None, **extra):
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": created, "model": model,
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}], **extra}
+            self._send_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+
+        try:
+            event({"role": "assistant", "content": ""})
+            pieces = re.findall(r"\S+\s*|\s+", reply)
+            delay = 1 / CONFIG["tokens_per_second"] if CONFIG["tokens_per_second"] else 0
+            for piece in pieces:
+                event({"content": piece})
+                if delay:
+                    time.sleep(delay * count_tokens(piece))
+            event({}, "stop")
+            if (request.get("stream_options") or {}).get("include_usage"):
+                self._send_chunk(f"data: {json.dumps({'id': completion_id, 'object': 'chat.completion.chunk', 'created': created, 'model': model, 'choices': [], 'usage': usage})}\n\n".encode())
+            self._send_chunk(b"data: [DONE]\n\n")
+            self._send_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+
+
+def make_server(host="127.0.0.1", port=8900):
+    return fake_server.make_server(Handler, host, port)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local OpenAI-compatible chat completions server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--ttft", default="0", help="time-to-first-token latency spec (ms)")
+    parser.add_argument("--tokens-per-second", type=float, default=0, help="generation speed (0 = instant)")
+    parser.add_argument("--rpm", type=int, default=0, help="requests per minute before 429s (0 = unlimited)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0, help="fraction of requests rejected with 429")
+    parser.add_argument("--markdown-rate", type=float, default=0, help="fraction of JSON replies wrapped in ```json")
+    parser.add_argument("--script", help="JSON file of {match, reply} rules")
+    args = parser.parse_args()
+
+    parse_latency(args.ttft)  # fail fast on a bad spec
+    script = []
+    if args.script:
+        with open(args.script) as f:
+            script = json.load(f)
+    CONFIG.update(ttft=args.ttft, tokens_per_second=args.tokens_per_second, rpm=args.rpm,
+                  rate_limit_rate=args.rate_limit_rate, markdown_rate=args.markdown_rate, script=script)
+    reset_stats()
+    print(f"Fake OpenAI server on http://{args.host}:{args.port}/v1")
+    make_server(args.host, args.port).serve_forever()
+
+
+if __name__ == "__main__":
+    main()
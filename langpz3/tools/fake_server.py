@@ -0,0 +1,49 @@
+"""
+Pieces shared by the local stand-in servers (tools/fake_openai_server.py and
+pz3/_flask-graph-gcp-bridge/local_langsmith.py).
+
+parse_latency turns a latency spec in milliseconds ("0", "fixed:50",
+"uniform:20:200", "lognormal:<median>:<sigma>", "exp:<mean>") into a
+function returning a delay in seconds. QuietHandler and make_server give a
+stdlib ThreadingHTTPServer speaking HTTP/1.1 with keep-alive, so connection
+reuse by the clients under test is visible.
+"""
+
+import math
+import random
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def parse_latency(spec):
+    """Turn a latency spec into a function returning a delay in seconds"""
+    kind, _, args = str(spec).partition(":")
+    values = [float(v) for v in args.split(":")] if args else []
+    if kind in ("", "0", "none"):
+        return lambda: 0.0
+    if kind == "fixed":
+        return lambda: values[0] / 1000
+    if kind == "uniform":
+        return lambda: random.uniform(values[0], values[1]) / 1000
+    if kind == "lognormal":
+        mu = math.log(values[0])
+        return lambda: random.lognormvariate(mu, values[1]) / 1000
+    if kind == "exp":
+        return lambda: random.expovariate(1 / values[0]) / 1000
+    raise ValueError(f"Unknown latency spec {spec}")
+
+
+class QuietHandler(BaseHTTPRequestHandler):
+    """HTTP/1.1 keep-alive handler without per-request logging"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; with Nagle on, keep-alive connections stall on delayed ACKs
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(handler, host, port):
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+"""
+Open-loop load generator for the bridges (langgraph-server.py /api/agent and
+the GCP bridge /workflow).
+
+Requests are sent on a fixed schedule (rate r -> one every 1/r seconds, or
+Poisson arrivals with --poisson) whether or not earlier requests have
+finished, and each latency is measured from the request's *intended* send
+time. A stalled server therefore shows up as growing latency rather than as
+a quietly reduced request rate (coordinated omission).
+
+Each request replays one customer utterance as a workflow payload. The
+utterances come from the pickled conversations in a memory directory
+(--memory-dir), or default to the POSITIVE_RESPONSES/NEGATIVE_RESPONSES
+corpus from workflow2.
+
+    python tools/load_generator.py --url http://localhost:8000/api/agent --rates 2,5,10,20 --duration 30
+    python tools/load_generator.py --url http://localhost:8080/workflow --api-key KEY --rates 50 --hgrm out.hgrm
+
+For each rate the output gives achieved throughput, latency percentiles and
+an error breakdown, forming a throughput-vs-latency curve (--csv to save it).
+--hgrm writes the last step's histogram in HdrHistogram's percentile format.
+"""
+
+import argparse
+import asyncio
+import csv
+import glob
+import math
+import os
+import pickle
+import random
+import sys
+from collections import Counter
+
+import httpx
+
+AGENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "agent")
+
+
+class LogHistogram:
+    """Latency histogram with bounded relative error (HDR-style log buckets)"""
+
+    def __init__(self, precision=0.01, lowest=1e-6):
+        self.base = math.log1p(precision)
+        self.lowest = lowest
+        self.counts = Counter()
+        self.total = 0
+        self.max = 0.0
+
+    def record(self, value):
+        index = int(math.log(max(value, self.lowest) / self.lowest) / self.base)
+        self.counts[index] += 1
+        self.total += 1
+        self.max = max(self.max, value)
+
+    def _value(self, index):
+        # Upper edge of the bucket, so percentiles never under-report
+        return self.lowest * math.exp((index + 1) * self.base)
+
+    def percentile(self, q):
+        if not self.total:
+            return 0.0
+        target = max(1, math.ceil(self.total * q / 100))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._value(index), self.max)
+        return self.max
+
+    def write_hgrm(self, path, unit_scale=1000.0):
+        """Write the percentile distribution in HdrHistogram's .hgrm text format (milliseconds)"""
+        with open(path, "w") as f:
+            f.write(f"{'Value':>12} {'Percentile':>14} {'TotalCount':>10} {'1/(1-Percentile)':>14}\n\n")
+            seen = 0
+            for index in sorted(self.counts):
+                seen += self.counts[index]
+                fraction = seen / self.total
+                inverse = "inf" if fraction >= 1 else f"{1 / (1 - fraction):.2f}"
+                value = min(self._value(index), self.max) * unit_scale
+                f.write(f"{value:12.3f} {fraction:14.12f} {seen:10d} {inverse:>14}\n")
+            f.write(f"#[Max     = {self.max * unit_scale:12.3f}, Total count    = {self.total:12d}]\n")
+
+
+def load_memory_corpus(memory_dir):
+    """Human utterances from every pickled conversation in memory_dir"""
+    sys.path.append(AGENT_DIR)
+    utterances = []
+    for path in sorted(glob.glob(os.path.join(memory_dir, "*_messages.pkl"))):
+        with open(path, "rb") as f:
+            for message in pickle.load(f):
+                if isinstance(message, tuple):
+                    # Compact (type, content, id) record written by workflow2
+                    message = {"type": message[0], "content": message[1]}
+                kind = getattr(message, "type", None) or (message.get("type") if isinstance(message, dict) else None)
+                content = getattr(message, "content", None) or (message.get("content") if isinstance(message, dict) else None)
+                if kind == "human" and isinstance(content, str) and content.strip():
+                    utterances.append(content)
+    return utterances
+
+
+def load_synthetic_corpus():
+    sys.path.append(AGENT_DIR)
+    from workflow2 import NEGATIVE_RESPONSES, POSITIVE_RESPONSES
+    return list(POSITIVE_RESPONSES) + list(NEGATIVE_RESPONSES)
+
+
+def make_payload(utterance, index, customers):
+    customer_id = index % customers
+    return {
+        "customer": {"name": f"Load Test {customer_id}", "email": f"loadtest+{customer_id}@example.com",
+                     "phoneNumber": "555-000-0000", "zipCode": "94105"},
+        "task": {"description": "Kitchen renovation", "category": "Remodeling"},
+        "vendor": {"name": "Bay Area Remodelers", "email": "contact@bayarearemodelers.com", "phoneNumber": "555-987-6543"},
+        "messages": [{"type": "human", "content": utterance}],
+    }
+
+
+def _error_kind(exc):
+    if isinstance(exc, httpx.TimeoutException):
+        return "timeout"
+    if isinstance(exc, httpx.ConnectError):
+        return "connect_error"
+    if isinstance(exc, httpx.TransportError):
+        return "transport_error"
+    return type(exc).__name__
+
+
+async def run_step(client, url, headers, corpus, rate, duration, poisson=False, max_in_flight=1000, customers=100):
+    """Drive one fixed-rate step; returns (histogram, error counter, sent, elapsed)"""
+    histogram = LogHistogram()
+    errors = Counter()
+    tasks = set()
+    loop = asyncio.get_running_loop()
+
+    async def send(payload, intended):
+        try:
+            response = await client.post(url, json=payload, headers=headers)
+            if response.status_code >= 400:
+                errors[f"http_{response.status_code}"] += 1
+        except Exception as e:
+            errors[_error_kind(e)] += 1
+        # Measured from the intended send time, so queueing anywhere counts
+        histogram.record(loop.time() - intended)
+
+    start = loop.time()
+    intended = start
+    sent = 0
+    # Fixed rate: the n-th send is due at start + n / rate, computed from the count so
+    # float error cannot add a send; Poisson gaps are a running sum of exponential draws
+    sends = math.ceil(round(rate * duration, 9))
+    while (intended < start + duration) if poisson else (sent < sends):
+        delay = intended - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if len(tasks) >= max_in_flight:
+            errors["client_backlog"] += 1
+        else:
+            payload = make_payload(random.choice(corpus), sent, customers)
+            task = asyncio.create_task(send(payload, intended))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        sent += 1
+        intended = intended + random.expovariate(rate) if poisson else start + sent / rate
+    if tasks:
+        await asyncio.wait(tasks)
+    return histogram, errors, sent, loop.time() - start
+
+
+async def ramp(url, rates, duration, corpus, api_key=None, timeout=60.0, connections=100, poisson=False,
+               max_in_flight=1000, customers=100, stop_p99=None):
+    """Run each rate in turn and return one result row per step"""
+    headers = {"x-api-key": api_key} if api_key else {}
+    limits = httpx.Limits(max_connections=connections, max_keepalive_connections=connections)
+    rows = []
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        for rate in rates:
+            histogram, errors, sent, elapsed = await run_step(
+                client, url, headers, corpus, rate, duration, poisson, max_in_flight, customers)
+            failed = sum(errors.values())
+            # Backlogged requests were never sent, so they are not in the histogram
+            succeeded = histogram.total - (failed - errors["client_backlog"])
+            row = {
+                "rate": rate,
+                "sent": sent,
+                "throughput": succeeded / elapsed,
+                "p50_ms": histogram.percentile(50) * 1000,
+                "p90_ms": histogram.percentile(90) * 1000,
+                "p99_ms": histogram.percentile(99) * 1000,
+                "p999_ms": histogram.percentile(99.9) * 1000,
+                "max_ms": histogram.max * 1000,
+                "error_rate": failed / sent if sent else 0.0,
+                "errors": dict(errors),
+                "histogram": histogram,
+            }
+            rows.append(row)
+            print(f"{rate:>8.1f} {row['throughput']:>8.1f} {row['p50_ms']:>9.1f} {row['p90_ms']:>9.1f} "
+                  f"{row['p99_ms']:>9.1f} {row['p999_ms']:>9.1f} {row['error_rate'] * 100:>6.1f}%  {row['errors'] or ''}")
+            if stop_p99 is not None and row["p99_ms"] > stop_p99:
+                print(f"Stopping: p99 {row['p99_ms']:.0f} ms is over {stop_p99:.0f} ms")
+                break
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000/api/agent")
+    parser.add_argument("--api-key", default=os.environ.get("API_KEY"), help="x-api-key for the GCP bridge")
+    parser.add_argument("--rates", default="1,2,5,10", help="comma-separated requests/second, run in order")
+    parser.add_argument("--duration", type=float, default=30, help="seconds per rate")
+    parser.add_argument("--poisson", action="store_true", help="exponential inter-arrival times")
+    parser.add_argument("--memory-dir", help="replay utterances from pickled conversations here")
+    parser.add_argument("--customers", type=int, default=100, help="distinct customer emails to spread load over")
+    parser.add_argument("--connections", type=int, default=100)
+    parser.add_argument("--max-in-flight", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--stop-p99-ms", type=float, help="stop ramping once p99 exceeds this")
+    parser.add_argument("--csv", help="write the throughput/latency curve here")
+    parser.add_argument("--hgrm", help="write the last step's histogram here (HdrHistogram format)")
+    args = parser.parse_args()
+
+    corpus = load_memory_corpus(args.memory_dir) if args.memory_dir else load_synthetic_corpus()
+    if not corpus:
+        parser.error(f"No human messages found in {args.memory_dir}")
+    rates = [float(rate) for rate in args.rates.split(",")]
+
+    print(f"Replaying {len(corpus)} utterances against {args.url}")
+    print(f"{'rate':>8} {'req/s':>8} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'p99.9 ms':>9} {'errors':>7}")
+    rows = asyncio.run(ramp(args.url, rates, args.duration, corpus, args.api_key, args.timeout, args.connections,
+                            args.poisson, args.max_in_flight, args.customers, args.stop_p99_ms))
+
+    if args.csv:
+        fields = ["rate", "sent", "throughput", "p50_ms", "p90_ms", "p99_ms", "p999_ms", "max_ms", "error_rate", "errors"]
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction="ignore")
+            writer.writeheader()
+            writer.writerows(rows)
+    if args.hgrm and rows:
+        rows[-1]["histogram"].write_hgrm(args.hgrm)
+
+
+if __name__ == "__main__":
+    main()
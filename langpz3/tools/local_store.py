@@ -0,0 +1,124 @@
+"""
+Local storage for exported LangGraph/LangSmith records.
+
+Watermark keeps a small JSON state file (cursor, high-water timestamps)
+between invocations and replaces it atomically, so an interrupted sync never
+leaves a half-written state behind. PartitionedWriter appends records to
+day partitions:
+
+    <root>/<dataset>/date=YYYY-MM-DD/part-<writer>.jsonl     (default)
+    <root>/<dataset>/date=YYYY-MM-DD/part-<writer>-<n>.parquet (needs pyarrow)
+
+JSONL parts are appended to; Parquet parts are immutable, so each flush
+writes a new file per day. Both layouts can be read as one dataset by DuckDB,
+pandas or pyarrow.dataset with hive partitioning.
+"""
+
+import json
+import os
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timezone
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class Watermark:
+    """A JSON dict persisted at path"""
+
+    def __init__(self, path):
+        self.path = path
+        self.state = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                self.state = json.load(f)
+
+    def get(self, key, default=None):
+        return self.state.get(key, default)
+
+    def update(self, **values):
+        """Set values and write the state file atomically"""
+        self.state.update(values)
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".watermark-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(self.state, f, indent=2, default=str)
+        os.replace(tmp_path, self.path)
+
+
+def day_of(value):
+    """YYYY-MM-DD for an ISO timestamp string, datetime or epoch seconds"""
+    if value is None:
+        return "unknown"
+    if isinstance(value, (int, float)):
+        value = datetime.fromtimestamp(value, timezone.utc)
+    if isinstance(value, datetime):
+        return value.astimezone(timezone.utc).strftime("%Y-%m-%d") if value.tzinfo else value.strftime("%Y-%m-%d")
+    return str(value)[:10]
+
+
+class PartitionedWriter:
+    """Buffers records and writes them to day partitions of a dataset"""
+
+    def __init__(self, root, dataset, time_field, format="jsonl", flush_every=1000):
+        if format not in ("jsonl", "parquet"):
+            raise ValueError(f"Unknown format {format}")
+        if format == "parquet" and pyarrow is None:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow); use format='jsonl'")
+        self.directory = os.path.join(root, dataset)
+        self.time_field = time_field
+        self.format = format
+        self.flush_every = flush_every
+        # One part file per writer keeps concurrent exporters from interleaving lines
+        self.writer_id = f"{int(time.time())}-{uuid.uuid4().hex[:8]}"
+        self.buffer = defaultdict(list)
+        self.buffered = 0
+        self.written = 0
+        self.parts = 0
+
+    def write(self, record):
+        self.buffer[day_of(record.get(self.time_field))].append(record)
+        self.buffered += 1
+        if self.buffered >= self.flush_every:
+            self.flush()
+
+    def write_many(self, records):
+        for record in records:
+            self.write(record)
+
+    def flush(self):
+        for day, records in self.buffer.items():
+            partition = os.path.join(self.directory, f"date={day}")
+            os.makedirs(partition, exist_ok=True)
+            if self.format == "jsonl":
+                with open(os.path.join(partition, f"part-{self.writer_id}.jsonl"), "a") as f:
+                    f.writelines(json.dumps(record, default=str) + "\n" for record in records)
+            else:
+                # Nested values are kept as JSON text so every part has a flat, stable schema
+                rows = [
+                    {k: v if isinstance(v, (str, int, float, bool)) or v is None else json.dumps(v, default=str)
+                     for k, v in record.items()}
+                    for record in records
+                ]
+                path = os.path.join(partition, f"part-{self.writer_id}-{self.parts}.parquet")
+                pyarrow.parquet.write_table(pyarrow.Table.from_pylist(rows), path)
+                self.parts += 1
+            self.written += len(records)
+        self.buffer.clear()
+        self.buffered = 0
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,94 @@
+"""
+Async helpers for driving runs on a LangGraph server without 1-second polling.
+
+wait_for_run() blocks on runs.join, which the server holds open until the run
+finishes, so the result arrives the moment it is ready; the run's status is
+then checked, so an errored or interrupted run raises. Servers that reject
+join fall back to poll_run(), which polls with jittered exponential backoff
+(50ms growing to 2s) instead of a fixed sleep. run_many() pushes many inputs
+through one client, and therefore one pooled httpx connection pool, with a
+concurrency cap. It yields each result as soon as that run completes.
+
+    client = get_client(url="http://localhost:2024")
+    async for result in run_many(client, "workflow2", inputs, concurrency=16):
+        print(result["index"], result["status"], result["latency"])
+"""
+
+import asyncio
+import logging
+import random
+import time
+
+import httpx
+
+logger = logging.getLogger('run_client')
+
+# Run statuses after which a run will not change again
+TERMINAL_STATUSES = {"success", "error", "timeout", "interrupted"}
+
+
+async def poll_run(client, thread_id, run_id, initial_delay=0.05, max_delay=2.0, backoff=1.5, timeout=300.0):
+    """Poll a run until it reaches a terminal status, backing off between polls"""
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    while True:
+        run = await client.runs.get(thread_id, run_id)
+        if run["status"] in TERMINAL_STATUSES:
+            return run
+        if time.monotonic() >= deadline:
+            raise TimeoutError(f"Run {run_id} still {run['status']} after {timeout}s")
+        await asyncio.sleep(delay * random.uniform(0.8, 1.2))
+        delay = min(delay * backoff, max_delay)
+
+
+async def wait_for_run(client, thread_id, run_id, timeout=300.0):
+    """Wait for a run to finish and return its final state values; raises RuntimeError if it did not succeed"""
+    try:
+        values = await asyncio.wait_for(client.runs.join(thread_id, run_id), timeout)
+    except httpx.HTTPStatusError as e:
+        if e.response is None or e.response.status_code not in (404, 405, 501):
+            raise
+        logger.info(f"runs.join not supported ({e.response.status_code}), polling run {run_id}")
+    else:
+        # join returns the thread's values whatever the outcome
+        run = await client.runs.get(thread_id, run_id)
+        if run["status"] != "success":
+            raise RuntimeError(f"Run {run_id} finished with status {run['status']}")
+        return values
+    run = await poll_run(client, thread_id, run_id, timeout=timeout)
+    if run["status"] != "success":
+        raise RuntimeError(f"Run {run_id} finished with status {run['status']}")
+    thread = await client.threads.get(thread_id)
+    return thread["values"]
+
+
+async def run_and_wait(client, assistant_id, input, thread_id=None):
+    """Create a run and wait for its output in a single request (stateless if no thread_id)"""
+    return await client.runs.wait(thread_id, assistant_id, input=input)
+
+
+async def run_many(client, assistant_id, inputs, concurrency=16, stateless=True):
+    """Run every input and yield a result dict per run in completion order"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_one(index, input):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                thread_id = None
+                if not stateless:
+                    thread_id = (await client.threads.create())["thread_id"]
+                output = await run_and_wait(client, assistant_id, input, thread_id)
+                return {"index": index, "status": "success", "output": output,
+                        "error": None, "latency": time.perf_counter() - start}
+            except Exception as e:
+                return {"index": index, "status": "error", "output": None,
+                        "error": str(e), "latency": time.perf_counter() - start}
+
+    tasks = [asyncio.create_task(run_one(i, input)) for i, input in enumerate(inputs)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+"""
+Incremental sync of LangSmith traces to local day partitions.
+
+The high-water mark (latest start_time seen) is kept in a local state file, so
+each sync only scans [watermark - overlap, now]. That range is split into
+windows that are fetched in parallel with Client.list_runs. The overlap
+re-scans the last few minutes to catch runs that were still being ingested;
+repeats are dropped by a seen-ID index. The index is a Bloom filter that
+answers "definitely new" without touching disk, backed by a SQLite set that
+confirms the rare Bloom hits. The cost of a sync is O(new runs) rather than
+O(all runs).
+
+    python tools/trace_sync.py --project prizm-workflow-2 --out traces/
+"""
+
+import argparse
+import hashlib
+import math
+import os
+import sqlite3
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from local_store import PartitionedWriter, Watermark
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings, persisted as a raw bit array"""
+
+    def __init__(self, capacity=1_000_000, error_rate=0.01, path=None):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.path = path
+        self.bits = bytearray((self.size + 7) // 8)
+        if path and os.path.exists(path):
+            with open(path, "rb") as f:
+                stored = f.read()
+            if len(stored) == len(self.bits):
+                self.bits[:] = stored
+
+    def _positions(self, key):
+        # Double hashing: h1 + i*h2 from one 128-bit digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def save(self):
+        if self.path:
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(self.bits)
+            os.replace(tmp_path, self.path)
+
+
+class SeenIndex:
+    """Set of already-synced run ids: Bloom filter in front of a SQLite table"""
+
+    def __init__(self, directory, capacity=1_000_000):
+        os.makedirs(directory, exist_ok=True)
+        self.bloom = BloomFilter(capacity, path=os.path.join(directory, "seen.bloom"))
+        self.db = sqlite3.connect(os.path.join(directory, "seen.sqlite"))
+        self.db.execute("CREATE TABLE IF NOT EXISTS seen (id TEXT PRIMARY KEY)")
+        self.disk_lookups = 0
+
+    def add_new(self, ids):
+        """Record ids and return the ones not seen before, in order"""
+        new = []
+        batch = set()
+        for run_id in ids:
+            if run_id in batch:
+                continue
+            if run_id in self.bloom:
+                self.disk_lookups += 1
+                if self.db.execute("SELECT 1 FROM seen WHERE id = ?", (run_id,)).fetchone():
+                    continue
+            batch.add(run_id)
+            new.append(run_id)
+        for run_id in new:
+            self.bloom.add(run_id)
+        self.db.executemany("INSERT OR IGNORE INTO seen (id) VALUES (?)", ((run_id,) for run_id in new))
+        return new
+
+    def commit(self):
+        self.db.commit()
+        self.bloom.save()
+
+    def close(self):
+        self.commit()
+        self.db.close()
+
+
+def time_windows(start, end, count):
+    """Split [start, end) into count equal windows"""
+    step = (end - start) / count
+    return [(start + step * i, end if i == count - 1 else start + step * (i + 1)) for i in range(count)]
+
+
+def _record(run):
+    record = run.model_dump() if hasattr(run, "model_dump") else run.dict()
+    record["id"] = str(record["id"])
+    return record
+
+
+def fetch_window(client, project_name, start, end, select=None):
+    window_filter = f'and(gte(start_time, "{start.isoformat()}"), lt(start_time, "{end.isoformat()}"))'
+    return [_record(run) for run in client.list_runs(project_name=project_name, filter=window_filter, select=select)]
+
+
+def sync(client, project_name, out_dir, windows=8, overlap=timedelta(minutes=5),
+         initial_lookback=timedelta(days=7), format="jsonl", now=None, select=None):
+    """Append runs started since the last sync to out_dir; returns counts"""
+    state_dir = os.path.join(out_dir, "_state")
+    watermark = Watermark(os.path.join(state_dir, f"{project_name}.json"))
+    seen = SeenIndex(state_dir)
+    now = now or datetime.now(timezone.utc)
+    last = watermark.get("start_time")
+    start = datetime.fromisoformat(last) - overlap if last else now - initial_lookback
+
+    fetched = 0
+    high = datetime.fromisoformat(last) if last else None
+    with PartitionedWriter(out_dir, project_name, "start_time", format) as writer, \
+            ThreadPoolExecutor(max_workers=windows) as pool:
+        futures = [pool.submit(fetch_window, client, project_name, a, b, select)
+                   for a, b in time_windows(start, now, windows)]
+        for future in futures:
+            records = future.result()
+            fetched += len(records)
+            by_id = {record["id"]: record for record in records}
+            for run_id in seen.add_new(by_id):
+                record = by_id[run_id]
+                writer.write(record)
+                started = record.get("start_time")
+                if isinstance(started, datetime):
+                    started = started if started.tzinfo else started.replace(tzinfo=timezone.utc)
+                    high = started if high is None else max(high, started)
+    seen.close()
+    if high is not None:
+        watermark.update(start_time=high.isoformat(), synced_at=now.isoformat())
+    return {"fetched": fetched, "new": writer.written, "since": start, "disk_lookups": seen.disk_lookups}
+
+
+def main():
+    from langsmith import Client
+
+    parser = argparse.ArgumentParser(description="Sync new LangSmith runs to local day partitions")
+    parser.add_argument("--project", default="prizm-workflow-2")
+    parser.add_argument("--out", default="traces")
+    parser.add_argument("--windows", type=int, default=8, help="time windows fetched in parallel")
+    parser.add_argument("--overlap-minutes", type=float, default=5)
+    parser.add_argument("--lookback-days", type=float, default=7, help="range for the first sync")
+    parser.add_argument("--format", choices=["jsonl", "parquet"], default="jsonl")
+    args = parser.parse_args()
+
+    result = sync(
+        Client(), args.project, args.out, windows=args.windows,
+        overlap=timedelta(minutes=args.overlap_minutes),
+        initial_lookback=timedelta(days=args.lookback_days), format=args.format,
+    )
+    print(f"Fetched {result['fetched']} runs since {result['since']}, {result['new']} new")
+
+
+if __name__ == "__main__":
+    main()
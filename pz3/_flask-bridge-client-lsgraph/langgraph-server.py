@@ -3,7 +3,6 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import sys
 import os
-import json
 import logging
 
 # Configure logging
@@ -17,18 +16,51 @@ logger = logging.getLogger('langgraph-server')
 # Adjust the import path as needed for your specific setup
 #import sys
 #sys.path.append("/path/to/my/modules/")
-sys.path.append(os.path.join(os.path.dirname(__file__), "../hello-graph/agent"))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "langpz3", "agent"))
 try:
     from workflow2 import app as workflow_app
+    from token_accounting import ledger as usage_ledger
+    from vendor_matching import get_vendor_index
+    from payload_schema import WORKFLOW_SCHEMA, compile_schema, validate_batch
     logger.info("Successfully imported LangGraph workflow")
 except Exception as e:
     logger.error(f"Error importing LangGraph workflow: {str(e)}")
     logger.error("Using mock workflow instead")
     workflow_app = None
+    usage_ledger = None
+    get_vendor_index = None
+    compile_schema = None
 
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
+# Shared JSON codec (see ../_flask-bridge-common/json_provider.py); encodes the
+# LangChain messages in workflow results, which Flask's default encoder rejects
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "_flask-bridge-common"))
+import json_codec
+from json_provider import install_json_provider
+install_json_provider(app)
+
+# gzip/br/zstd responses negotiated from Accept-Encoding (see ../_flask-bridge-common/compression.py);
+# restored message histories make /api/agent bodies large and repetitive
+from compression import install_compression
+install_compression(app)
+
+# Opt-in request profiling (see ../_flask-bridge-common/request_profiler.py)
+if os.environ.get("REQUEST_PROFILING", "False").lower() == "true":
+    from request_profiler import install_profiler
+    install_profiler(app)
+
+# Payload validators, compiled once: reject bad requests here, before any graph work
+if compile_schema is not None:
+    validate_payload = compile_schema(WORKFLOW_SCHEMA, coerce=True, normalize=True)
+    # With a vendor directory workflow2 picks the vendor, so a request may omit it
+    validate_payload_matched = compile_schema(WORKFLOW_SCHEMA, coerce=True, normalize=True,
+                                              optional_sections=("vendor",))
+
+def payload_validator():
+    return validate_payload_matched if get_vendor_index() is not None else validate_payload
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint to verify the server is running"""
@@ -37,6 +69,28 @@ def health_check():
         "workflow_loaded": workflow_app is not None
     })
 
+@app.route('/metrics/usage', methods=['GET'])
+def usage_metrics():
+    """Token, latency and cost totals for the runs served, with the top customers and vendors"""
+    if usage_ledger is None:
+        return jsonify({"error": "workflow not loaded"}), 503
+    top = request.args.get('top', 10, type=int)
+    key = request.args.get('by', 'cost_usd')
+    return jsonify(usage_ledger.snapshot(top=top, key=key))
+
+@app.route('/api/vendors/match', methods=['GET'])
+def vendor_match():
+    """Best vendors for a task category near a ZIP code, from the directory in VENDORS_FILE"""
+    index = get_vendor_index() if get_vendor_index else None
+    if index is None:
+        return jsonify({"error": "no vendor directory loaded (set VENDORS_FILE)"}), 503
+    category = request.args.get('category')
+    zip_code = request.args.get('zip')
+    if not category or not zip_code:
+        return jsonify({"error": "category and zip are required"}), 400
+    k = min(max(request.args.get('k', 5, type=int), 1), 50)
+    return jsonify({"category": category, "zip": zip_code, "matches": index.match(category, zip_code, k=k)})
+
 @app.route('/api/agent', methods=['POST'])
 def agent_endpoint():
     """Main endpoint for interacting with the LangGraph agent"""
@@ -49,21 +103,27 @@ def agent_endpoint():
             return jsonify({"error": "No input data provided"}), 400
         
         # Log the incoming request
-        logger.info(f"Received request: {json.dumps(data, indent=2)}")
+        logger.info(f"Received request: {request.get_data(as_text=True)}")
         
         # Check if workflow is available
         if workflow_app is None:
             logger.warning("LangGraph workflow not available, using mock response")
             return mock_response(data)
         
+        data, errors = payload_validator()(data)
+        if errors:
+            logger.warning(f"Rejected invalid payload: {errors}")
+            return jsonify({"error": errors[0], "errors": errors}), 400
+        
         # Process the input with the LangGraph workflow
         try:
             logger.info("Processing with LangGraph workflow")
             result = workflow_app.invoke(data)
-            logger.info(f"LangGraph workflow result: {json.dumps(result, default=str)}")
             
-            # Return the result
-            return jsonify(result)
+            # Encode once and use the same bytes for the log and the response
+            body = json_codec.dumpb(result)
+            logger.info(f"LangGraph workflow result: {body.decode()}")
+            return app.response_class(body, mimetype="application/json")
         except Exception as e:
             logger.error(f"Error in LangGraph workflow: {str(e)}")
             import traceback
@@ -76,6 +136,32 @@ def agent_endpoint():
         logger.error(traceback.format_exc())
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/agent/batch', methods=['POST'])
+def agent_batch_endpoint():
+    """Run several workflow payloads: a JSON list, or {"requests": [...]}.
+    Each payload is validated first; invalid ones get their errors and are not run."""
+    data = request.get_json(silent=True)
+    payloads = data.get("requests") if isinstance(data, dict) else data
+    if not isinstance(payloads, list) or not payloads:
+        return jsonify({"error": "Expected a non-empty list of requests"}), 400
+    if workflow_app is None:
+        return jsonify({"error": "workflow not loaded"}), 503
+    
+    valid, rejected = validate_batch(payloads, payload_validator())
+    logger.info(f"Batch of {len(payloads)}: {len(valid)} valid, {len(rejected)} rejected")
+    results = [None] * len(payloads)
+    for position, errors in rejected.items():
+        results[position] = {"error": errors[0], "errors": errors}
+    if valid:
+        outputs = workflow_app.batch([payload for _, payload in valid], return_exceptions=True)
+        for (position, _), output in zip(valid, outputs):
+            if isinstance(output, Exception):
+                logger.error(f"Error in LangGraph workflow for batch item {position}: {output}")
+                output = {"error": str(output)}
+            results[position] = output
+    return app.response_class(json_codec.dumpb({"results": results, "rejected": len(rejected)}),
+                              mimetype="application/json")
+
 def mock_response(data):
     """Generate a mock response when the workflow is unavailable"""
     message = data.get("task", {}).get("description", "")
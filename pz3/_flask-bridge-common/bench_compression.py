@@ -0,0 +1,137 @@
+#!/usr/bin/env python
+"""
+Wire bytes and CPU for compressed /api/agent responses.
+
+Builds a workflow2 result carrying --messages restored messages (templated
+customer/agent turns with message ids, as in a long conversation),
+encoded with the shared JSON codec, then reports:
+- per encoding and level: compressed size, ratio, compress and decompress
+  CPU time;
+- per request through a Flask app with install_compression, for each
+  Accept-Encoding: bytes on the wire and CPU per request, compared with
+  sending the body uncompressed;
+- peak memory beyond the body while producing the response, with one-shot
+  compression vs streaming (the body above COMPRESSION_STREAM_BYTES).
+
+    python bench_compression.py --messages 2000
+"""
+
+import argparse
+import gzip
+import os
+import random
+import sys
+import time
+import tracemalloc
+import uuid
+
+from flask import Flask
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "langpz3", "agent"))
+import json_codec
+from compression import Codec, available_encodings, brotli, install_compression, zstandard
+
+LEVELS = {"gzip": [1, 3, 6, 9], "br": [1, 3, 5, 11], "zstd": [1, 3, 9]}
+DECOMPRESS = {
+    "gzip": gzip.decompress,
+    "br": lambda data: brotli.decompress(data),
+    "zstd": lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data),
+}
+
+CUSTOMER_TURNS = [
+    "I have some concerns about the timeline. Can they start next month instead?",
+    "Sounds great, I'll reach out to them right away.",
+    "What would the {item} cost for a {size} kitchen in {zip}?",
+    "Can you send me the vendor's phone number again?",
+]
+AGENT_TURNS = [
+    "Hello {name}! I'm your project assistant. I've matched your {category} task with {vendor}. "
+    "They are available to discuss your project: {description}.",
+    "I understand your concern about the timeline. {vendor} can usually schedule {category} work "
+    "within two weeks of the first visit. Would you like me to ask about next month?",
+    "The typical range for {item} in {zip} is ${low} to ${high}, depending on materials and access.",
+]
+
+
+def make_result(n_messages, seed=0):
+    rng = random.Random(seed)
+    fields = dict(name="Test User", category="Remodeling", vendor="Bay Area Remodelers",
+                  description="Kitchen renovation with new cabinets", item="cabinets", size="medium", zip="94105")
+    messages = []
+    for i in range(n_messages):
+        template = rng.choice(CUSTOMER_TURNS if i % 2 else AGENT_TURNS)
+        text = template.format(low=rng.randrange(2, 9) * 1000, high=rng.randrange(10, 30) * 1000, **fields)
+        messages.append({"type": "human" if i % 2 else "ai", "content": text, "id": str(uuid.UUID(int=rng.getrandbits(128)))})
+    return {
+        "customer": {"name": "Test User", "email": "test@example.com", "phoneNumber": "5550123456", "zipCode": "94105"},
+        "task": {"description": fields["description"], "category": fields["category"]},
+        "vendor": {"name": fields["vendor"], "email": "contact@example.com", "phoneNumber": "5559876543"},
+        "messages": messages, "sentiment": "positive", "reason": "", "current_step": "complete",
+    }
+
+
+def cpu_ms(fn, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        result = fn()
+    return (time.process_time() - start) * 1000 / repeat, result
+
+
+def make_app(body, stream_bytes):
+    app = Flask(__name__)
+    app.logger.disabled = True
+    install_compression(app, min_bytes=1024, stream_bytes=stream_bytes)
+    app.add_url_rule("/api/agent", "agent", lambda: app.response_class(body, mimetype="application/json"))
+    return app
+
+
+def request_cost(client, encoding, repeat):
+    headers = {"Accept-Encoding": encoding} if encoding else {}
+
+    def fetch():
+        response = client.get("/api/agent", headers=headers)
+        return response.get_data(), response.headers.get("Content-Encoding")
+    return cpu_ms(fetch, repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    body = json_codec.dumpb(make_result(args.messages))
+    encodings = available_encodings(["zstd", "br", "gzip"])
+    print(f"Response with {args.messages} messages: {len(body) / 1024:.0f} KB; encodings: {', '.join(encodings)}")
+
+    print(f"{'encoding':>8} {'level':>5} {'KB':>8} {'ratio':>6} {'compress ms':>12} {'decompress ms':>14}")
+    for encoding in encodings:
+        for level in LEVELS[encoding]:
+            codec = Codec(encoding, level)
+            compress_ms, compressed = cpu_ms(lambda: codec.compress(body), args.repeat)
+            decompress_ms, plain = cpu_ms(lambda: DECOMPRESS[encoding](compressed), args.repeat)
+            assert plain == body == DECOMPRESS[encoding](b"".join(codec.stream([body[:5000], body[5000:]])))
+            print(f"{encoding:>8} {level:>5} {len(compressed) / 1024:>8.1f} {len(body) / len(compressed):>6.1f} "
+                  f"{compress_ms:>12.2f} {decompress_ms:>14.2f}")
+
+    print("\nPer request through install_compression (default levels):")
+    print(f"{'Accept-Encoding':>16} {'wire KB':>8} {'CPU ms':>7}")
+    client = make_app(body, stream_bytes=len(body) + 1).test_client()
+    for encoding in [None] + encodings:
+        ms, (data, used) = request_cost(client, encoding, args.repeat)
+        assert used == encoding
+        print(f"{encoding or 'identity':>16} {len(data) / 1024:>8.1f} {ms:>7.2f}")
+
+    print(f"\nPeak memory beyond the body while compressing ({encodings[0]}):")
+    for name, stream_bytes in (("one-shot", len(body) + 1), ("streamed", 0)):
+        client = make_app(body, stream_bytes).test_client()
+        tracemalloc.start()
+        response = client.get("/api/agent", headers={"Accept-Encoding": encodings[0]}, buffered=False)
+        wire = sum(len(chunk) for chunk in response.response)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name:>16} {peak / 1024:>8.0f} KB peak, {wire / 1024:.1f} KB sent")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+"""
+Cache locality through customer_router.py across local worker processes.
+
+Starts --workers worker processes. Each worker keeps an LRU cache of
+customers (standing in for a bridge's memory/sentiment cache) and answers
+with whether the request hit it. Customer traffic is replayed through the
+router with round-robin and consistent-hash routing, and the run reports:
+- router locality;
+- worker cache hit rate;
+- the share of customers that move to another worker when one is added.
+
+    python bench_router.py --workers 4 --customers 2000 --requests 4000
+"""
+
+import argparse
+import multiprocessing
+import random
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from customer_router import CustomerRouter, HashRing, _hash, customer_key
+
+
+def run_worker(port, cache_size):
+    cache = OrderedDict()
+    stats = {"hits": 0, "misses": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, body):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            with lock:
+                self._send(f'{{"hits": {stats["hits"]}, "misses": {stats["misses"]}}}'.encode())
+                if "reset" in self.path:
+                    stats.update(hits=0, misses=0)
+                    cache.clear()
+
+        def do_POST(self):
+            customer = customer_key(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            with lock:
+                hit = customer in cache
+                stats["hits" if hit else "misses"] += 1
+                cache[customer] = True
+                cache.move_to_end(customer)
+                if len(cache) > cache_size:
+                    cache.popitem(last=False)
+            self._send(f'{{"port": {port}, "cache_hit": {str(hit).lower()}}}'.encode())
+
+    ThreadingHTTPServer(("127.0.0.1", port), Handler).serve_forever()
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs):
+        pass
+
+
+def wait_for(url, timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.exceptions.ConnectionError:
+            time.sleep(0.05)
+    raise RuntimeError(f"{url} did not start")
+
+
+def replay(router, backends, customers, total, concurrency):
+    for backend in backends:
+        requests.get(f"{backend}/stats?reset=1")
+    server = make_server("127.0.0.1", 0, router, threaded=True, request_handler=QuietHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/api/agent"
+    # Zipf-like traffic: a few customers are much more active than the rest
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(customers)]
+    emails = [f"customer{i}@example.com" for i in random.choices(range(customers), weights, k=total)]
+    session = requests.Session()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(lambda email: session.post(url, json={"customer": {"email": email}}), emails))
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+    worker_stats = [requests.get(f"{backend}/stats").json() for backend in backends]
+    hits = sum(s["hits"] for s in worker_stats)
+    return router.stats.snapshot(), hits / total, total / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--customers", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--cache-size", type=int, default=200, help="customers cached per worker")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--base-port", type=int, default=8701)
+    args = parser.parse_args()
+
+    ports = [args.base_port + i for i in range(args.workers)]
+    processes = [multiprocessing.Process(target=run_worker, args=(port, args.cache_size), daemon=True) for port in ports]
+    for process in processes:
+        process.start()
+    backends = [f"http://127.0.0.1:{port}" for port in ports]
+    try:
+        for backend in backends:
+            wait_for(f"{backend}/stats")
+        print(f"{args.workers} workers, {args.customers} customers, {args.requests} requests, "
+              f"cache {args.cache_size} customers/worker")
+        print(f"{'routing':>12} {'locality':>9} {'cache hits':>11} {'req/s':>8}")
+        for strategy in ("round_robin", "hash"):
+            random.seed(7)
+            stats, hit_rate, throughput = replay(CustomerRouter(backends, strategy=strategy), backends,
+                                                 args.customers, args.requests, args.concurrency)
+            print(f"{strategy:>12} {stats['locality']:>9.1%} {hit_rate:>11.1%} {throughput:>8.0f}")
+    finally:
+        for process in processes:
+            process.terminate()
+
+    # Scale-out: how many customers change worker when one more is added
+    keys = [f"customer{i}@example.com" for i in range(args.customers)]
+    grown = backends + [f"http://127.0.0.1:{args.base_port + args.workers}"]
+    before, after = HashRing(backends), HashRing(grown)
+    ring_moved = sum(before.node_for(k) != after.node_for(k) for k in keys) / len(keys)
+    modulo_moved = sum(_hash(k) % len(backends) != _hash(k) % len(grown) for k in keys) / len(keys)
+    print(f"Adding worker {args.workers + 1}: ring moves {ring_moved:.1%} of customers, "
+          f"modulo hashing {modulo_moved:.1%} (ideal {1 / len(grown):.1%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+"""
+Response compression for the Flask bridges, negotiated from Accept-Encoding.
+
+Responses that carry a conversation's full message history are hundreds of
+KB of repetitive text, which compresses 5-20x. Supported encodings, in the
+order preferred when the client accepts several equally:
+- zstd  (needs the zstandard package)
+- br    (needs brotli or brotlicffi)
+- gzip  (standard library)
+Encodings whose package is missing are not offered.
+
+A response is compressed when it is a 2xx, not already encoded, of a text or
+JSON type, and at least COMPRESSION_MIN_BYTES long (small bodies gain little
+and fit a packet anyway). Bodies up to COMPRESSION_STREAM_BYTES are
+compressed in one call and keep a Content-Length. Larger ones, and streamed
+responses, are compressed chunk by chunk as the server writes them, so the
+whole compressed copy is never held next to the original. Levels default to
+the fast end (zstd 1, br 3, gzip 3): on message histories higher levels gain
+a few percent of ratio for 2-3x the CPU; see bench_compression.py.
+
+    from compression import install_compression
+    install_compression(app)
+
+Environment:
+    COMPRESSION_ENCODINGS     comma-separated encodings to offer (default zstd,br,gzip;
+                              empty disables compression)
+    COMPRESSION_MIN_BYTES     smallest body compressed (default 1024)
+    COMPRESSION_STREAM_BYTES  bodies above this are streamed (default 262144)
+    COMPRESSION_ZSTD_LEVEL, COMPRESSION_BR_LEVEL, COMPRESSION_GZIP_LEVEL
+"""
+
+import os
+import threading
+import zlib
+from functools import lru_cache
+
+from flask import request
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+COMPRESSION_ENCODINGS = [e.strip().lower() for e in os.environ.get("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",")
+                         if e.strip()]
+COMPRESSION_MIN_BYTES = int(os.environ.get("COMPRESSION_MIN_BYTES", "1024"))
+COMPRESSION_STREAM_BYTES = int(os.environ.get("COMPRESSION_STREAM_BYTES", str(256 * 1024)))
+LEVELS = {
+    "zstd": int(os.environ.get("COMPRESSION_ZSTD_LEVEL", "1")),
+    "br": int(os.environ.get("COMPRESSION_BR_LEVEL", "3")),
+    "gzip": int(os.environ.get("COMPRESSION_GZIP_LEVEL", "3")),
+}
+CHUNK_SIZE = 64 * 1024
+
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "application/javascript", "application/xml")
+
+
+class Codec:
+    """One content coding: one-shot compress and a streaming compressor"""
+
+    def __init__(self, name, level):
+        self.name = name
+        self.level = level
+        # A ZstdCompressor must not be used by two threads at once
+        self._local = threading.local()
+
+    @property
+    def _zstd(self):
+        compressor = getattr(self._local, "zstd", None)
+        if compressor is None:
+            compressor = self._local.zstd = zstandard.ZstdCompressor(level=self.level)
+        return compressor
+
+    def compress(self, data):
+        if self.name == "zstd":
+            return self._zstd.compress(data)
+        if self.name == "br":
+            return brotli.compress(data, quality=self.level)
+        return zlib.compress(data, self.level, wbits=31)  # 31: gzip framing
+
+    def compressobj(self):
+        """Object with compress(chunk) -> bytes and flush() -> the remaining bytes"""
+        if self.name == "zstd":
+            return self._zstd.compressobj()
+        if self.name == "br":
+            return _BrotliStream(self.level)
+        return zlib.compressobj(self.level, zlib.DEFLATED, 31)
+
+    def stream(self, chunks):
+        """Compress an iterable of byte chunks lazily"""
+        compressor = self.compressobj()
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            out = compressor.compress(chunk)
+            if out:
+                yield out
+        tail = compressor.flush()
+        if tail:
+            yield tail
+
+
+class _BrotliStream:
+    def __init__(self, level):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, chunk):
+        return self._compressor.process(chunk)
+
+    def flush(self):
+        return self._compressor.finish()
+
+
+def available_encodings(encodings=None):
+    """The configured encodings whose package is installed, most preferred first"""
+    installed = {"zstd": zstandard is not None, "br": brotli is not None, "gzip": True}
+    return [e for e in (COMPRESSION_ENCODINGS if encodings is None else encodings) if installed.get(e)]
+
+
+@lru_cache(maxsize=256)
+def negotiate(accept_encoding, offered):
+    """The encoding to use for an Accept-Encoding header value, or None.
+
+    Highest q-value wins; ties go to the order of `offered` (a tuple). q=0
+    refuses an encoding, and "*" stands for any encoding not listed."""
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.lower().split(","):
+        name, _, params = item.partition(";")
+        name = name.strip()
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name:
+            weights[name] = q
+    best, best_q = None, 0.0
+    for encoding in offered:
+        q = weights.get(encoding, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def _compressible(response):
+    mimetype = response.mimetype or ""
+    # Server-sent events must reach the client as they are written
+    return mimetype.startswith("text/") and mimetype != "text/event-stream" or mimetype in COMPRESSIBLE_TYPES
+
+
+def install_compression(app, encodings=None, min_bytes=None, stream_bytes=None):
+    """Compress the app's responses for clients that accept it"""
+    offered = tuple(available_encodings(encodings))
+    if not offered:
+        app.logger.info("Response compression off")
+        return app
+    codecs = {name: Codec(name, LEVELS[name]) for name in offered}
+    min_bytes = COMPRESSION_MIN_BYTES if min_bytes is None else min_bytes
+    stream_bytes = COMPRESSION_STREAM_BYTES if stream_bytes is None else stream_bytes
+
+    @app.after_request
+    def compress_response(response):
+        if not 200 <= response.status_code < 300 or response.status_code == 204 \
+                or "Content-Encoding" in response.headers or response.direct_passthrough \
+                or not _compressible(response):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = negotiate(request.headers.get("Accept-Encoding", ""), offered)
+        if encoding is None:
+            return response
+        codec = codecs[encoding]
+
+        if response.is_streamed:
+            response.response = codec.stream(response.response)
+        else:
+            body = response.get_data()
+            if len(body) < min_bytes:
+                return response
+            if len(body) <= stream_bytes:
+                response.set_data(codec.compress(body))
+            else:
+                view = memoryview(body)
+                response.response = codec.stream(view[i:i + CHUNK_SIZE] for i in range(0, len(body), CHUNK_SIZE))
+                response.headers.pop("Content-Length", None)
+        response.headers["Content-Encoding"] = encoding
+        # A strong ETag names the uncompressed bytes
+        if response.headers.get("ETag", "").startswith('"'):
+            response.headers["ETag"] = "W/" + response.headers["ETag"]
+        return response
+
+    app.logger.info(f"Response compression: {', '.join(offered)}")
+    return app
@@ -0,0 +1,271 @@
+#!/usr/bin/env python
+"""
+Consistent-hash routing tier for the bridges.
+
+A WSGI proxy in front of several bridge workers (processes or nodes) that
+sends every request for a customer to the same worker, so per-worker caches
+of conversation memory or sentiment stay hot. The routing key is
+customer.email from the JSON body, trimmed as the bridges' payload
+validation trims it: workflow2 keys memory on the same string. Requests
+without one are spread round-robin.
+
+Workers are placed on a hash ring with ROUTER_VNODES virtual nodes each.
+Adding or removing a worker only moves the customers on its arcs (about 1/N
+of them) instead of reshuffling everyone. A worker that refuses connections
+is skipped for ROUTER_DOWN_SECONDS; its customers fall through to the next
+worker on the ring and return once it is back.
+
+GET /router/stats reports per-worker request counts, failovers and hit
+locality: the fraction of repeat requests from a customer that went to the
+same worker as that customer's previous request.
+
+    python customer_router.py --backends http://127.0.0.1:8001,http://127.0.0.1:8002 --port 8000
+    ROUTER_BACKENDS=http://10.0.0.5:8000,http://10.0.0.6:8000 gunicorn -w 4 'customer_router:from_env()'
+
+Responses carry an X-Routed-To header naming the worker.
+"""
+
+import argparse
+import bisect
+import hashlib
+import itertools
+import json
+import os
+import threading
+import time
+from collections import Counter, OrderedDict
+
+import requests
+import urllib3
+from requests.adapters import HTTPAdapter
+
+ROUTER_BACKENDS = [b.strip().rstrip("/") for b in os.environ.get("ROUTER_BACKENDS", "").split(",") if b.strip()]
+ROUTER_VNODES = int(os.environ.get("ROUTER_VNODES", "160"))
+ROUTER_TIMEOUT = float(os.environ.get("ROUTER_TIMEOUT", "60"))
+ROUTER_DOWN_SECONDS = float(os.environ.get("ROUTER_DOWN_SECONDS", "10"))
+ROUTER_POOL_SIZE = int(os.environ.get("ROUTER_POOL_SIZE", "32"))
+
+# Not forwarded in either direction
+HOP_BY_HOP = {"connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te", "trailers",
+              "transfer-encoding", "upgrade", "host", "content-length"}
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "big")
+
+
+def customer_key(body):
+    """Routing key from a JSON request body, or None"""
+    try:
+        email = json.loads(body).get("customer", {}).get("email")
+    except (ValueError, AttributeError, UnicodeDecodeError):
+        return None
+    if isinstance(email, str) and email.strip():
+        return email.strip()
+    return None
+
+
+def read_body(environ):
+    """The request body; a chunked request has no Content-Length and is read to EOF"""
+    stream = environ["wsgi.input"]
+    length = environ.get("CONTENT_LENGTH")
+    if length:
+        return stream.read(int(length))
+    # Without a length, reading is only safe when the server marks the input as ending at the body
+    if environ.get("wsgi.input_terminated"):
+        return stream.read()
+    return b""
+
+
+class HashRing:
+    """Consistent hash ring with virtual nodes"""
+
+    def __init__(self, nodes=(), vnodes=ROUTER_VNODES):
+        self.vnodes = vnodes
+        self.nodes = set()
+        self._points = []
+        self._owners = []
+        for node in nodes:
+            self.add(node)
+
+    def add(self, node):
+        if node in self.nodes:
+            return
+        self.nodes.add(node)
+        for i in range(self.vnodes):
+            point = _hash(f"{node}#{i}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove(self, node):
+        self.nodes.discard(node)
+        kept = [(p, n) for p, n in zip(self._points, self._owners) if n != node]
+        self._points = [p for p, _ in kept]
+        self._owners = [n for _, n in kept]
+
+    def preference(self, key):
+        """Distinct nodes in ring order from key's position; the first owns the key"""
+        if not self._points:
+            return
+        start = bisect.bisect(self._points, _hash(key))
+        seen = set()
+        for i in range(len(self._points)):
+            node = self._owners[(start + i) % len(self._points)]
+            if node not in seen:
+                seen.add(node)
+                yield node
+                if len(seen) == len(self.nodes):
+                    return
+
+    def node_for(self, key):
+        return next(self.preference(key), None)
+
+
+class LocalityStats:
+    """Router-side view of how well customers stick to one worker"""
+
+    def __init__(self, max_customers=100000):
+        self.max_customers = max_customers
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.keyless = 0
+        self.repeat_requests = 0
+        self.same_worker = 0
+        self.failovers = 0
+        self.per_worker = Counter()
+        # Last worker per customer, oldest first so the map stays bounded
+        self._last = OrderedDict()
+
+    def record(self, customer, worker, failover=False):
+        with self.lock:
+            self.requests += 1
+            self.per_worker[worker] += 1
+            self.failovers += failover
+            if customer is None:
+                self.keyless += 1
+                return
+            previous = self._last.pop(customer, None)
+            if previous is not None:
+                self.repeat_requests += 1
+                self.same_worker += previous == worker
+            self._last[customer] = worker
+            if len(self._last) > self.max_customers:
+                self._last.popitem(last=False)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "requests": self.requests,
+                "keyless": self.keyless,
+                "repeat_requests": self.repeat_requests,
+                "locality": self.same_worker / self.repeat_requests if self.repeat_requests else 1.0,
+                "failovers": self.failovers,
+                "per_worker": dict(self.per_worker),
+            }
+
+
+class CustomerRouter:
+    """WSGI app forwarding each request to its customer's worker
+
+    strategy="round_robin" ignores the key; it is the baseline for comparing
+    locality."""
+
+    def __init__(self, backends, vnodes=ROUTER_VNODES, timeout=ROUTER_TIMEOUT, strategy="hash"):
+        if not backends:
+            raise ValueError("CustomerRouter needs at least one backend")
+        self.backends = [b.rstrip("/") for b in backends]
+        self.ring = HashRing(self.backends, vnodes)
+        self.timeout = timeout
+        self.strategy = strategy
+        self.stats = LocalityStats()
+        self._down_until = {}
+        self._round_robin = itertools.cycle(self.backends)
+        self._round_robin_lock = threading.Lock()
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.backends), pool_maxsize=ROUTER_POOL_SIZE)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def candidates(self, customer):
+        """Workers to try in order: the owner first, then its ring successors"""
+        if customer is None or self.strategy == "round_robin":
+            with self._round_robin_lock:
+                first = next(self._round_robin)
+            order = [first] + [b for b in self.backends if b != first]
+        else:
+            order = list(self.ring.preference(customer))
+        now = time.monotonic()
+        live = [node for node in order if self._down_until.get(node, 0) <= now]
+        return live or order
+
+    def _respond_json(self, start_response, status, payload):
+        body = json.dumps(payload).encode()
+        start_response(status, [("Content-Type", "application/json"), ("Content-Length", str(len(body)))])
+        return [body]
+
+    def __call__(self, environ, start_response):
+        path = environ.get("PATH_INFO", "/")
+        if path == "/router/stats":
+            now = time.monotonic()
+            return self._respond_json(start_response, "200 OK", dict(
+                self.stats.snapshot(), strategy=self.strategy, workers=self.backends,
+                down=[node for node, until in self._down_until.items() if until > now]))
+
+        body = read_body(environ)
+        customer = customer_key(body) if body else None
+        headers = {key[5:].replace("_", "-").title(): value for key, value in environ.items()
+                   if key.startswith("HTTP_") and key[5:].replace("_", "-").lower() not in HOP_BY_HOP}
+        if environ.get("CONTENT_TYPE"):
+            headers["Content-Type"] = environ["CONTENT_TYPE"]
+        # Otherwise requests asks for gzip on the client's behalf
+        headers.setdefault("Accept-Encoding", "identity")
+        query = environ.get("QUERY_STRING")
+        target = path + (f"?{query}" if query else "")
+
+        # Only connection failures fail over; the request never reached that worker
+        for attempt, node in enumerate(self.candidates(customer)[:2]):
+            try:
+                response = self.session.request(environ["REQUEST_METHOD"], node + target, data=body,
+                                                headers=headers, timeout=self.timeout, stream=True)
+                # Pass the body through as the worker encoded it (gzip/br/zstd negotiated with the client)
+                with response:
+                    content = response.raw.read(decode_content=False)
+            except requests.exceptions.ConnectionError as e:
+                print(f"Worker {node} unavailable, skipping it for {ROUTER_DOWN_SECONDS}s: {str(e)}")
+                self._down_until[node] = time.monotonic() + ROUTER_DOWN_SECONDS
+                continue
+            except (requests.exceptions.Timeout, urllib3.exceptions.ReadTimeoutError):
+                return self._respond_json(start_response, "504 Gateway Timeout", {"error": f"Worker {node} timed out"})
+            self.stats.record(customer, node, failover=attempt > 0)
+            response_headers = [(k, v) for k, v in response.headers.items() if k.lower() not in HOP_BY_HOP]
+            response_headers += [("Content-Length", str(len(content))), ("X-Routed-To", node)]
+            start_response(f"{response.status_code} {response.reason}", response_headers)
+            return [content]
+        return self._respond_json(start_response, "502 Bad Gateway", {"error": "No worker available"})
+
+
+def from_env():
+    """WSGI entry point configured from ROUTER_BACKENDS (for gunicorn)"""
+    return CustomerRouter(ROUTER_BACKENDS)
+
+
+def main():
+    from werkzeug.serving import run_simple
+
+    parser = argparse.ArgumentParser(description="Consistent-hash customer router for the bridges")
+    parser.add_argument("--backends", default=",".join(ROUTER_BACKENDS), help="comma-separated worker base URLs")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 8000)))
+    parser.add_argument("--vnodes", type=int, default=ROUTER_VNODES)
+    args = parser.parse_args()
+
+    backends = [b.strip() for b in args.backends.split(",") if b.strip()]
+    if not backends:
+        parser.error("No backends given (--backends or ROUTER_BACKENDS)")
+    print(f"Routing customers across {len(backends)} workers on port {args.port}")
+    run_simple(args.host, args.port, CustomerRouter(backends, args.vnodes), threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Flask JSON provider backed by the shared codec (langpz3/agent/json_codec.py).
+
+request.json, jsonify and returned dicts all go through json_codec: orjson
+when installed, compact stdlib json otherwise, and LangChain messages in
+workflow results are encoded instead of failing.
+
+    from json_provider import install_json_provider
+    install_json_provider(app)
+"""
+
+import os
+import sys
+
+from flask.json.provider import JSONProvider
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "langpz3", "agent"))
+import json_codec
+
+
+class CodecJSONProvider(JSONProvider):
+    """Flask JSONProvider that encodes with json_codec (compact output)"""
+
+    def dumps(self, obj, **kwargs):
+        return json_codec.dumps(obj)
+
+    def loads(self, s, **kwargs):
+        return json_codec.loads(s)
+
+    def response(self, *args, **kwargs):
+        # Encode straight to bytes; the default provider goes through str first
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(json_codec.dumpb(obj), mimetype="application/json")
+
+
+def install_json_provider(app):
+    app.json = CodecJSONProvider(app)
+    app.logger.info(f"JSON provider: {json_codec.BACKEND}")
+    return app
@@ -0,0 +1,216 @@
+"""
+Opt-in request profiling for the Flask bridges.
+
+Nothing here is imported unless a bridge runs with REQUEST_PROFILING=true,
+so the mode costs nothing when it is off. When it is on, a request is
+profiled if:
+- it carries a valid X-Profile-Request header:
+  "<unix time>:<hex HMAC-SHA256(PROFILE_SECRET, '<unix time>:<METHOD>:<target>')>",
+  accepted for 5 minutes, where target is the path plus "?<query string>"
+  when there is one, or
+- it is picked by PROFILE_SAMPLE_RATE (fraction of requests, default 0).
+
+GET /debug/profile?seconds=N (signed the same way, so the signature fixes N)
+samples every thread in the process for N seconds and returns the folded
+stacks.
+
+Each profile is written to PROFILE_DIR (default ./profiles) as:
+- <id>.prof    cProfile stats (PROFILE_MODE=cprofile, the default): snakeviz, pstats
+- <id>.folded  sampled stacks (PROFILE_MODE=sample): flamegraph.pl, speedscope
+- <id>.alloc.txt  top allocators from tracemalloc (PROFILE_TRACEMALLOC=true)
+
+Profiled responses carry an X-Profile-Id header. tracemalloc is
+process-wide, so allocations from concurrent requests are included.
+
+    sign_request(secret, "POST", "/api/agent") -> header value for X-Profile-Request
+    sign_request(secret, "GET", "/debug/profile?seconds=5")
+"""
+
+import cProfile
+import hashlib
+import hmac
+import math
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+
+from flask import Response, g, jsonify, request
+
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "./profiles")
+PROFILE_SECRET = os.environ.get("PROFILE_SECRET", "")
+PROFILE_SAMPLE_RATE = float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_MODE = os.environ.get("PROFILE_MODE", "cprofile")
+PROFILE_TRACEMALLOC = os.environ.get("PROFILE_TRACEMALLOC", "False").lower() == "true"
+PROFILE_SAMPLE_INTERVAL = float(os.environ.get("PROFILE_SAMPLE_INTERVAL", "0.005"))
+PROFILE_MAX_SECONDS = 60
+SIGNATURE_MAX_AGE = 300
+
+# Only one cProfile can be active per process
+_cprofile_lock = threading.Lock()
+
+
+def sign_request(secret, method, target, timestamp=None):
+    """Value for the X-Profile-Request header; target is the path and query string"""
+    timestamp = str(int(timestamp if timestamp is not None else time.time()))
+    digest = hmac.new(secret.encode(), f"{timestamp}:{method}:{target}".encode(), hashlib.sha256).hexdigest()
+    return f"{timestamp}:{digest}"
+
+
+def verify_signature(header, method, target, secret=None, now=None):
+    secret = PROFILE_SECRET if secret is None else secret
+    if not secret or not header or ":" not in header:
+        return False
+    timestamp, _, _ = header.partition(":")
+    if not timestamp.isdigit() or abs((now or time.time()) - int(timestamp)) > SIGNATURE_MAX_AGE:
+        return False
+    return hmac.compare_digest(header, sign_request(secret, method, target, int(timestamp)))
+
+
+def _request_target():
+    """The request's path and query string, as signed"""
+    query = request.query_string.decode("latin-1")
+    return f"{request.path}?{query}" if query else request.path
+
+
+def _signed():
+    return verify_signature(request.headers.get("X-Profile-Request"), request.method, _request_target())
+
+
+class StackSampler:
+    """Samples the stacks of one thread (or all threads) into folded-stack counts"""
+
+    def __init__(self, thread_id=None, interval=PROFILE_SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or (self.thread_id is not None and thread_id != self.thread_id):
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        return self
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class RequestProfile:
+    """One profiling session: cProfile or the sampler, plus optional tracemalloc"""
+
+    def __init__(self, name, mode=PROFILE_MODE, thread_id=None):
+        self.id = f"{time.strftime('%Y%m%d-%H%M%S')}-{name}-{uuid.uuid4().hex[:8]}"
+        self.mode = mode
+        self.thread_id = thread_id
+        self.profiler = None
+        self.sampler = None
+        self.started_tracemalloc = False
+
+    def start(self):
+        if self.mode == "cprofile" and _cprofile_lock.acquire(blocking=False):
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        else:
+            # Sampling mode, or another request already holds cProfile
+            self.sampler = StackSampler(self.thread_id).start()
+        if PROFILE_TRACEMALLOC and not tracemalloc.is_tracing():
+            tracemalloc.start(10)
+            self.started_tracemalloc = True
+        return self
+
+    def stop(self):
+        """Stop profiling and write the output files; returns their paths"""
+        os.makedirs(PROFILE_DIR, exist_ok=True)
+        base = os.path.join(PROFILE_DIR, self.id)
+        paths = []
+        if self.profiler is not None:
+            self.profiler.disable()
+            _cprofile_lock.release()
+            self.profiler.dump_stats(base + ".prof")
+            paths.append(base + ".prof")
+        if self.sampler is not None:
+            self.sampler.stop()
+            with open(base + ".folded", "w") as f:
+                f.write(self.sampler.folded())
+            paths.append(base + ".folded")
+        if tracemalloc.is_tracing() and (self.started_tracemalloc or PROFILE_TRACEMALLOC):
+            snapshot = tracemalloc.take_snapshot()
+            if self.started_tracemalloc:
+                tracemalloc.stop()
+            with open(base + ".alloc.txt", "w") as f:
+                for stat in snapshot.statistics("lineno")[:25]:
+                    f.write(f"{stat}\n")
+            paths.append(base + ".alloc.txt")
+        return paths
+
+
+def _should_profile():
+    if _signed():
+        return True
+    return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+
+def install_profiler(app):
+    """Add the profiling hooks and /debug/profile endpoint to a Flask app"""
+
+    @app.before_request
+    def start_profile():
+        if request.path != "/debug/profile" and _should_profile():
+            g.request_profile = RequestProfile(request.endpoint or "request", thread_id=threading.get_ident()).start()
+
+    @app.after_request
+    def stop_profile(response):
+        profile = g.pop("request_profile", None)
+        if profile is not None:
+            profile.stop()
+            response.headers["X-Profile-Id"] = profile.id
+        return response
+
+    @app.teardown_request
+    def release_profile(exc):
+        # A request that raised never reaches after_request; don't leave cProfile running
+        profile = g.pop("request_profile", None)
+        if profile is not None:
+            profile.stop()
+
+    @app.route("/debug/profile", methods=["GET"])
+    def debug_profile():
+        if not _signed():
+            return jsonify({"error": "Invalid or missing profile signature"}), 403
+        try:
+            seconds = float(request.args.get("seconds", 10))
+        except ValueError:
+            seconds = math.nan
+        if not math.isfinite(seconds):
+            return jsonify({"error": "seconds must be a number"}), 400
+        seconds = min(max(seconds, 0.0), PROFILE_MAX_SECONDS)
+        profile = RequestProfile("process", mode="sample")
+        profile.start()
+        time.sleep(seconds)
+        profile.stop()
+        return Response(profile.sampler.folded(), mimetype="text/plain", headers={"X-Profile-Id": profile.id})
+
+    app.logger.info(f"Request profiling enabled (sample rate {PROFILE_SAMPLE_RATE}, mode {PROFILE_MODE}, dir {PROFILE_DIR})")
+    return app
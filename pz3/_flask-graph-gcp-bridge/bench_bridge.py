@@ -0,0 +1,101 @@
+"""
+Benchmark the bridge against the local LangSmith stand-in.
+
+Starts local_langsmith.py and the bridge (main.py) in this process on
+ephemeral ports, drives /workflow with concurrent clients and reports, per
+scenario, throughput, latency percentiles, status codes, and how many
+upstream connections the bridge opened.
+
+    python bench_bridge.py --requests 400 --concurrency 16
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from werkzeug.serving import make_server
+
+import local_langsmith
+
+PAYLOAD = {
+    "customer": {"name": "John Smith", "email": "john.smith@example.com", "phoneNumber": "555-123-4567", "zipCode": "94105"},
+    "task": {"description": "Kitchen renovation", "category": "Remodeling"},
+    "vendor": {"name": "Bay Area Remodelers", "email": "contact@bayarearemodelers.com", "phoneNumber": "555-987-6543"},
+}
+
+def serve(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def run_scenario(bridge_url, count, concurrency):
+    local = threading.local()
+
+    def call(_):
+        if not hasattr(local, "session"):
+            local.session = requests.Session()
+        start = time.perf_counter()
+        status = local.session.post(f"{bridge_url}/workflow", json=PAYLOAD,
+                                    headers={"x-api-key": os.environ["API_KEY"]}).status_code
+        return status, time.perf_counter() - start
+
+    local_langsmith.reset_stats()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(call, range(count)))
+    elapsed = time.perf_counter() - start
+    latencies = sorted(latency for _, latency in results)
+    codes = {}
+    for status, _ in results:
+        codes[status] = codes.get(status, 0) + 1
+    return {
+        "rps": count / elapsed,
+        "p50": statistics.median(latencies) * 1000,
+        "p99": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "codes": codes,
+        "upstream_connections": local_langsmith.stats()["connections"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Bridge benchmark against the local LangSmith stand-in")
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    upstream = serve(local_langsmith.make_server(port=0))
+    os.environ["LANGSMITH_API_URL"] = f"http://127.0.0.1:{upstream.server_port}/api/v1"
+    os.environ.setdefault("API_KEY", "bench-key")
+    os.environ.setdefault("LANGSMITH_POOL_SIZE", str(args.concurrency))
+    import main as bridge  # reads its settings from the environment at import
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    bridge.logger.setLevel(logging.CRITICAL)
+    bridge_url = f"http://127.0.0.1:{serve(make_server('127.0.0.1', 0, bridge.app, threaded=True)).server_port}"
+
+    pooled_post = bridge.session.post
+
+    def post_without_reuse(*a, **kw):
+        kw["headers"] = dict(kw.get("headers") or {}, Connection="close")
+        return pooled_post(*a, **kw)
+
+    scenarios = [
+        ("pooled, 20ms", {"latency": "fixed:20"}, pooled_post, 30),
+        ("no reuse, 20ms", {"latency": "fixed:20"}, post_without_reuse, 30),
+        ("pooled, lognormal 50ms", {"latency": "lognormal:50:0.8"}, pooled_post, 30),
+        ("pooled, 5% errors", {"latency": "fixed:20", "error_rate": 0.05}, pooled_post, 30),
+        ("pooled, 5% slow-loris", {"latency": "fixed:20", "slow_loris_rate": 0.05, "slow_loris_seconds": 5}, pooled_post, 1),
+    ]
+    print(f"{'scenario':<24} {'req/s':>7} {'p50 ms':>8} {'p99 ms':>8} {'conns':>6}  status codes")
+    for name, config, post, timeout in scenarios:
+        local_langsmith.CONFIG.update(latency="0", error_rate=0, slow_loris_rate=0)
+        local_langsmith.CONFIG.update(config)
+        bridge.session.post = post
+        bridge.LANGSMITH_TIMEOUT = timeout
+        r = run_scenario(bridge_url, args.requests, args.concurrency)
+        print(f"{name:<24} {r['rps']:>7.1f} {r['p50']:>8.1f} {r['p99']:>8.1f} {r['upstream_connections']:>6}  {r['codes']}")
+
+if __name__ == "__main__":
+    main()
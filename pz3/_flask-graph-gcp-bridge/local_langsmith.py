@@ -0,0 +1,183 @@
+"""
+Local stand-in for the LangSmith graph invoke API, for exercising the bridge offline.
+
+Implements POST /api/v1/projects/<project>/graphs/<graph>/invoke. The backend
+is either a fake that echoes the input with a workflow2-shaped result, or
+the real workflow2 graph from langpz3/agent. Latency, error rate and
+slow-loris behaviour are injectable, so bridge throughput, connection reuse
+and timeout handling can be measured on a laptop:
+
+    python local_langsmith.py --port 8123 --latency lognormal:200:0.5 --error-rate 0.02
+    LANGSMITH_API_URL=http://localhost:8123/api/v1 python main.py
+
+Latency specs (milliseconds): "0", "fixed:50", "uniform:20:200",
+"lognormal:<median>:<sigma>", "exp:<mean>".
+
+GET /stats reports requests, injected errors, slow-loris responses and the
+number of distinct client connections seen. Fewer connections than requests
+means keep-alive is working. The server is a stdlib ThreadingHTTPServer
+speaking HTTP/1.1: the Flask/werkzeug dev server closes every connection,
+so it cannot show connection reuse.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+
+# parse_latency and the server boilerplate are shared with tools/fake_openai_server.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "langpz3", "tools"))
+import fake_server
+from fake_server import QuietHandler, parse_latency
+
+CONFIG = {
+    "backend": os.environ.get("LOCAL_LANGSMITH_BACKEND", "fake"),
+    "latency": os.environ.get("LOCAL_LANGSMITH_LATENCY", "0"),
+    "error_rate": float(os.environ.get("LOCAL_LANGSMITH_ERROR_RATE", "0")),
+    "slow_loris_rate": float(os.environ.get("LOCAL_LANGSMITH_SLOW_LORIS_RATE", "0")),
+    "slow_loris_seconds": float(os.environ.get("LOCAL_LANGSMITH_SLOW_LORIS_SECONDS", "60")),
+    "api_key": os.environ.get("LOCAL_LANGSMITH_API_KEY"),
+}
+
+INVOKE_PATH = re.compile(r"^/api/v1/projects/([^/]+)/graphs/([^/]+)/invoke$")
+
+_stats_lock = threading.Lock()
+_stats = {"requests": 0, "errors": 0, "slow_loris": 0}
+_connections = set()
+_workflow_app = None
+
+
+def reset_stats():
+    with _stats_lock:
+        for key in _stats:
+            _stats[key] = 0
+        _connections.clear()
+
+
+def stats():
+    with _stats_lock:
+        return dict(_stats, connections=len(_connections))
+
+
+def fake_workflow(data):
+    """Result shaped like workflow2's output, without running the graph"""
+    return dict(
+        data,
+        summary=f"Task: {data['task'].get('description')}, Vendor: {data['vendor'].get('name')}",
+        sentiment="positive",
+        reason="local stand-in",
+        current_step="complete",
+        sentiment_attempts=1,
+    )
+
+
+def real_workflow(data):
+    global _workflow_app
+    if _workflow_app is None:
+        agent_dir = os.environ.get(
+            "WORKFLOW2_AGENT_DIR",
+            os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "langpz3", "agent"),
+        )
+        sys.path.append(agent_dir)
+        from workflow2 import app as workflow_app
+        _workflow_app = workflow_app
+    return _workflow_app.invoke(data)
+
+
+class Handler(QuietHandler):
+    def _send(self, status, payload, slow_seconds=0):
+        body = json.dumps(payload, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not slow_seconds:
+            self.wfile.write(body)
+            return
+        # Slow-loris: trickle the body out so every socket read succeeds but the response never finishes in time
+        step = max(1, len(body) // 100)
+        pause = slow_seconds / math.ceil(len(body) / step)
+        for i in range(0, len(body), step):
+            self.wfile.write(body[i:i + step])
+            self.wfile.flush()
+            time.sleep(pause)
+
+    def do_GET(self):
+        if self.path.startswith("/stats"):
+            if "reset" in self.path:
+                reset_stats()
+            self._send(200, stats())
+        else:
+            self._send(404, {"detail": "Not found"})
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        match = INVOKE_PATH.match(self.path)
+        if not match:
+            self._send(404, {"detail": "Not found"})
+            return
+        with _stats_lock:
+            _stats["requests"] += 1
+            _connections.add(self.client_address)
+
+        if CONFIG["api_key"] and self.headers.get("Authorization") != f"Bearer {CONFIG['api_key']}":
+            self._send(401, {"detail": "Invalid API key"})
+            return
+
+        time.sleep(parse_latency(CONFIG["latency"])())
+
+        if random.random() < CONFIG["error_rate"]:
+            with _stats_lock:
+                _stats["errors"] += 1
+            status = random.choice([500, 503])
+            self._send(status, {"detail": f"Injected error {status} for {match.group(1)}/{match.group(2)}"})
+            return
+
+        try:
+            data = json.loads(body)
+        except ValueError as e:
+            self._send(400, {"detail": f"Invalid JSON body: {e}"})
+            return
+        try:
+            result = real_workflow(data) if CONFIG["backend"] == "workflow2" else fake_workflow(data)
+        except Exception as e:
+            # Answer like the real API rather than dropping the connection
+            self._send(500, {"detail": f"Workflow failed: {type(e).__name__}: {e}"})
+            return
+
+        slow_seconds = 0
+        if random.random() < CONFIG["slow_loris_rate"]:
+            with _stats_lock:
+                _stats["slow_loris"] += 1
+            slow_seconds = CONFIG["slow_loris_seconds"]
+        try:
+            self._send(200, result, slow_seconds)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on a slow response
+            self.close_connection = True
+
+
+def make_server(host="127.0.0.1", port=8123):
+    return fake_server.make_server(Handler, host, port)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the LangSmith graph invoke API")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8123)
+    parser.add_argument("--backend", choices=["fake", "workflow2"], default=CONFIG["backend"])
+    parser.add_argument("--latency", default=CONFIG["latency"])
+    parser.add_argument("--error-rate", type=float, default=CONFIG["error_rate"])
+    parser.add_argument("--slow-loris-rate", type=float, default=CONFIG["slow_loris_rate"])
+    parser.add_argument("--slow-loris-seconds", type=float, default=CONFIG["slow_loris_seconds"])
+    args = parser.parse_args()
+    parse_latency(args.latency)  # fail fast on a bad spec
+    CONFIG.update(backend=args.backend, latency=args.latency, error_rate=args.error_rate,
+                  slow_loris_rate=args.slow_loris_rate, slow_loris_seconds=args.slow_loris_seconds)
+    print(f"Local LangSmith stand-in on http://{args.host}:{args.port}/api/v1 ({CONFIG['backend']} backend)")
+    make_server(args.host, args.port).serve_forever()
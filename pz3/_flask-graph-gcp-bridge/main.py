@@ -1,7 +1,11 @@
 import os
+import sys
 import json
+import time
 import requests
+import urllib3
 import logging
+from requests.adapters import HTTPAdapter
 from flask import Flask, request, jsonify
 from functools import wraps
 
@@ -15,9 +19,74 @@ LANGSMITH_API_URL = os.environ.get("LANGSMITH_API_URL", "https://smith.langchain
 PROJECT_NAME = os.environ.get("LANGSMITH_PROJECT", "prizm-workflow-2")
 GRAPH_NAME = os.environ.get("LANGSMITH_GRAPH", "contractor_workflow2")
 API_KEY = os.environ.get("API_KEY", "your-secret-api-key")  # Change this in production
+# Total time allowed for a graph invocation, including reading the response
+LANGSMITH_TIMEOUT = float(os.environ.get("LANGSMITH_TIMEOUT", "30"))
+LANGSMITH_CONNECT_TIMEOUT = float(os.environ.get("LANGSMITH_CONNECT_TIMEOUT", "5"))
+# Keep-alive connections held open to LangSmith (one per concurrent request)
+LANGSMITH_POOL_SIZE = int(os.environ.get("LANGSMITH_POOL_SIZE", "10"))
 
 app = Flask(__name__)
 
+# One session per process so calls reuse TLS connections instead of handshaking each time
+session = requests.Session()
+session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=LANGSMITH_POOL_SIZE))
+session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=LANGSMITH_POOL_SIZE))
+
+# Shared JSON codec (orjson when installed); falls back to Flask's encoder when
+# ../_flask-bridge-common is not deployed with the function
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "_flask-bridge-common"))
+try:
+    from json_provider import install_json_provider
+    install_json_provider(app)
+except ImportError as e:
+    logger.info(f"Using Flask's default JSON provider ({e})")
+
+# gzip/br/zstd responses negotiated from Accept-Encoding (../_flask-bridge-common/compression.py)
+try:
+    from compression import install_compression
+    install_compression(app)
+except ImportError as e:
+    logger.info(f"Responses are not compressed ({e})")
+
+# Payload schema validation at the edge (langpz3/agent/payload_schema.py); falls
+# back to checking the top-level sections when langpz3 is not deployed alongside
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "langpz3", "agent"))
+try:
+    from payload_schema import WORKFLOW_SCHEMA, compile_schema
+    validate_payload = compile_schema(WORKFLOW_SCHEMA, coerce=True, normalize=True)
+except ImportError as e:
+    logger.info(f"Payload schema unavailable, checking required sections only ({e})")
+    validate_payload = None
+
+# Opt-in request profiling (see ../_flask-bridge-common/request_profiler.py)
+if os.environ.get("REQUEST_PROFILING", "False").lower() == "true":
+    from request_profiler import install_profiler
+    install_profiler(app)
+
+def read_with_deadline(response, deadline):
+    """Read the response body, giving up once the overall deadline has passed.
+
+    requests' read timeout applies per socket read, so a server trickling bytes
+    could otherwise hold the request open indefinitely. Before each read the
+    socket timeout is cut to the time left, so no read outlasts the deadline."""
+    chunks = []
+    sock = getattr(getattr(response.raw, "connection", None), "sock", None)
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            response.close()
+            raise requests.exceptions.ReadTimeout(f"Response not complete after {LANGSMITH_TIMEOUT}s")
+        if sock is not None:
+            sock.settimeout(remaining)
+        try:
+            chunk = response.raw.read1(65536, decode_content=True)
+        except urllib3.exceptions.ReadTimeoutError as e:
+            response.close()
+            raise requests.exceptions.ReadTimeout(f"Response not complete after {LANGSMITH_TIMEOUT}s") from e
+        if not chunk:
+            return b"".join(chunks)
+        chunks.append(chunk)
+
 def require_api_key(view_function):
     @wraps(view_function)
     def decorated_function(*args, **kwargs):
@@ -35,14 +104,20 @@ def health_check():
 @require_api_key
 def run_workflow():
     data = request.json
-    logger.info(f"Received request with data: {json.dumps(data, default=str)[:200]}...")
+    logger.info(f"Received request with data: {request.get_data(as_text=True)[:200]}...")
     
-    # Basic validation
-    required_fields = ['customer', 'task', 'vendor']
-    for field in required_fields:
-        if field not in data:
-            logger.error(f"Missing required field: {field}")
-            return jsonify({"error": f"Missing required field: {field}"}), 400
+    # Validate before spending a LangSmith round trip on the request
+    if validate_payload is not None:
+        data, errors = validate_payload(data)
+        if errors:
+            logger.error(f"Invalid payload: {errors}")
+            return jsonify({"error": errors[0], "errors": errors}), 400
+    else:
+        required_fields = ['customer', 'task', 'vendor']
+        for field in required_fields:
+            if field not in data:
+                logger.error(f"Missing required field: {field}")
+                return jsonify({"error": f"Missing required field: {field}"}), 400
     
     try:
         # Compose headers with the LangSmith API key
@@ -57,27 +132,47 @@ def run_workflow():
         
         # Call the API
         logger.info("Sending request to LangSmith")
-        response = requests.post(
+        deadline = time.monotonic() + LANGSMITH_TIMEOUT
+        response = session.post(
             url,
             headers=headers,
             json=data,
-            timeout=30  # Set a reasonable timeout
+            timeout=(LANGSMITH_CONNECT_TIMEOUT, LANGSMITH_TIMEOUT),
+            stream=True
         )
+        body = read_with_deadline(response, deadline)
         
-        # Check for errors
-        response.raise_for_status()
-        result = response.json()
-        logger.info(f"Received successful response from LangSmith: {str(result)[:200]}...")
+        # Check for errors (the body has already been read, so report it from there)
+        if response.status_code >= 400:
+            logger.error(f"LangSmith returned {response.status_code}: {body[:200]!r}")
+            try:
+                detail = json.loads(body).get('detail', response.reason)
+            except (ValueError, AttributeError):
+                detail = body.decode("utf-8", errors="replace")[:500] or response.reason
+            return jsonify({
+                "error": "Error invoking workflow",
+                "detail": detail
+            }), 500
+        logger.info(f"Received successful response from LangSmith ({len(body)} bytes): "
+                    f"{body[:200].decode('utf-8', errors='replace')}...")
         
-        # Return the result
-        return jsonify(result), 200
+        # Return the body as received rather than re-encoding the parsed result
+        return app.response_class(body, status=200, mimetype="application/json")
+    
+    except requests.exceptions.Timeout as e:
+        logger.error(f"Timed out invoking workflow: {e}")
+        return jsonify({
+            "error": "Workflow timed out",
+            "detail": str(e)
+        }), 504
     
     except requests.exceptions.RequestException as e:
         # Handle API errors
         error_message = str(e)
         logger.error(f"Error invoking workflow: {error_message}")
         try:
-            if e.response and e.response.text:
+            # A Response is falsy for 4xx/5xx, so compare with None
+            if e.response is not None and e.response.text:
                 error_details = json.loads(e.response.text)
                 error_message = error_details.get('detail', str(e))
         except: